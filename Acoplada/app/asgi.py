@@ -0,0 +1,400 @@
+"""
+Variante asíncrona (ASGI) de la API de main.py: mismas rutas /items, mismas respuestas y
+mismo mapeo de errores, pero con la base de datos asíncrona (asyncpg) de DatabaseFactory.create_async().
+Una consulta lenta solo bloquea su propia petición, no el proceso entero.
+
+Ejecución (varios procesos):
+    uvicorn asgi:app --host 0.0.0.0 --port 8080 --workers 4
+"""
+import json
+from contextlib import asynccontextmanager
+
+from pydantic import ValidationError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import etags
+import serialization
+from models.item import Item, validate_bulk
+from db.factory import DatabaseFactory
+from db.db import (DEFAULT_PAGE_SIZE, MAX_BULK_SIZE, MAX_LOOKUP_SIZE, MIN_SEARCH_LENGTH, VersionMismatchError,
+                   normalize_ids, parse_since, search_terms)
+from db.asyncpg_db import CONNECTION_ERRORS, DATABASE_ERRORS, INTEGRITY_ERRORS
+
+# --- Inicialización de la Base de Datos ---
+# El pool se crea al arrancar cada worker (lifespan), dentro de su propio bucle de eventos.
+db = DatabaseFactory.create_async()
+
+@asynccontextmanager
+async def lifespan(app):
+    await db.initialize()
+    try:
+        yield
+    finally:
+        await db.close()
+
+# --- Middlewares ---
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,x-api-key,If-Match,If-None-Match',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+    'Access-Control-Expose-Headers': 'ETag',
+}
+
+class CORSMiddleware:
+    """Añade las cabeceras de CORS a todas las respuestas (equivale al after_request de main.py)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        async def send_with_cors(message):
+            if message['type'] == 'http.response.start':
+                headers = [(k, v) for k, v in message.get('headers', [])
+                           if k.decode().lower() not in {h.lower() for h in CORS_HEADERS}]
+                headers += [(k.lower().encode(), v.encode()) for k, v in CORS_HEADERS.items()]
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+# --- Errores de la DB (mismo mapeo que main.py) ---
+def _db_error(e: Exception) -> JSONResponse:
+    """OperationalError (conexión) -> 503; cualquier otro error de la DB -> 500."""
+    if isinstance(e, CONNECTION_ERRORS):
+        return JSONResponse({'error': 'Database connection error', 'details': str(e)}, 503)
+    return JSONResponse({'error': 'Database error', 'details': str(e)}, 500)
+
+# --- ETags (versión de la fila o contador de cambios de la tabla, ver etags.py) ---
+def _with_etag(response: Response, version: int) -> Response:
+    """Añade la ETag (débil si el cuerpo va comprimido) y obliga al navegador a revalidar."""
+    weak = 'W/' if 'content-encoding' in response.headers else ''
+    response.headers['ETag'] = f'{weak}"{version}"'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _precondition_failed(e) -> JSONResponse:
+    return JSONResponse({'error': 'Precondition failed (If-Match)', 'details': str(e)}, 412)
+
+async def _json_body(request: Request):
+    """Lee el cuerpo JSON; None si está vacío o no es JSON válido (Flask respondería 400)."""
+    try:
+        return await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+def _json_bytes(request: Request, body: bytes, status: int = 200) -> Response:
+    """Respuesta con un JSON ya codificado por serialization.encoder, comprimido si el cliente lo acepta."""
+    headers = {}
+    if serialization.should_compress(body):
+        headers['Vary'] = 'Accept-Encoding'
+        body, encoding = serialization.compress(body, request.headers.get('accept-encoding'))
+        if encoding:
+            headers['Content-Encoding'] = encoding
+    return Response(body, status, headers=headers, media_type='application/json')
+
+def _invalid_body() -> JSONResponse:
+    return JSONResponse({'error': 'Cuerpo (body) de la petición inválido'}, 400)
+
+# --- Endpoints CRUD ---
+async def create_item(request: Request):
+    """Crea un nuevo item (persona)."""
+    data = await _json_body(request)
+    if not isinstance(data, dict):
+        return _invalid_body()
+    try:
+        item = Item(**data)
+        created = await db.create_item(item)
+        return _json_bytes(request, serialization.encoder.item(created), 201)
+    except ValidationError as e:
+        return JSONResponse({'error': 'Validation error', 'details': e.errors(include_url=False, include_context=False)}, 400)
+    except INTEGRITY_ERRORS as e:
+        return JSONResponse({'error': 'Database integrity error (ID already exists)', 'details': str(e)}, 409)
+    except CONNECTION_ERRORS + DATABASE_ERRORS as e:
+        return _db_error(e)
+
+async def bulk_create_items(request: Request):
+    """
+    Crea o actualiza (?upsert=true, por defecto) un lote de items (personas) en un solo viaje a la DB.
+    Devuelve el resultado de cada fila: created, updated, conflict, invalid o error.
+    """
+    data = await _json_body(request)
+    if not isinstance(data, list):
+        return JSONResponse({'error': 'El cuerpo debe ser una lista JSON de items.'}, 400)
+    if len(data) > MAX_BULK_SIZE:
+        return JSONResponse({'error': f'El lote supera el máximo de {MAX_BULK_SIZE} items.'}, 413)
+    upsert = request.query_params.get('upsert', 'true').lower() != 'false'
+
+    # 1. Validación de la lista entera en una llamada: las filas inválidas no abortan el lote.
+    results, valid, positions = validate_bulk(data)
+
+    # 2. Inserción/actualización conjunta de las filas válidas.
+    try:
+        for index, result in zip(positions, await db.bulk_upsert_items(valid, upsert=upsert)):
+            results[index] = {'index': index, **result}
+    except CONNECTION_ERRORS + DATABASE_ERRORS as e:
+        return _db_error(e)
+
+    summary = {status: 0 for status in ('created', 'updated', 'conflict', 'invalid', 'error')}
+    for result in results:
+        summary[result['status']] += 1
+    return JSONResponse({'summary': summary, 'results': results}, 200)
+
+async def lookup_items(request: Request):
+    """Obtiene de una vez los items de una lista de DNIs ({"ids": [...]}) y los que no existen."""
+    data = await _json_body(request)
+    try:
+        if not isinstance(data, dict):
+            raise ValueError("El cuerpo debe ser un objeto JSON con la lista 'ids'.")
+        item_ids = normalize_ids(data.get('ids'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, 400)
+    if len(item_ids) > MAX_LOOKUP_SIZE:
+        return JSONResponse({'error': f'La consulta supera el máximo de {MAX_LOOKUP_SIZE} DNIs.'}, 413)
+    try:
+        items = await db.get_items_by_ids(item_ids)
+    except CONNECTION_ERRORS + DATABASE_ERRORS as e:
+        return _db_error(e)
+    found = {item.id for item in items}
+    missing = [item_id for item_id in item_ids if item_id not in found]
+    return _json_bytes(request, serialization.encoder.lookup(items, missing))
+
+async def get_item(request: Request):
+    """Obtiene un item (persona) por su ID (DNI). Responde 304 si coincide con If-None-Match."""
+    item_id = request.path_params['item_id']
+    try:
+        known = etags.etag_versions(request.headers.get('if-none-match'))
+        item, version = await db.get_item_with_version(item_id, known)
+        if version is None:
+            return JSONResponse({'error': 'Item no encontrado'}, 404)
+        if item is None:
+            return _with_etag(Response(status_code=304), version)
+        return _with_etag(_json_bytes(request, serialization.encoder.item(item)), version)
+    except CONNECTION_ERRORS + DATABASE_ERRORS as e:
+        return _db_error(e)
+
+async def get_all_items(request: Request):
+    """
+    Obtiene los items (personas) paginados por DNI.
+    Parámetros: ?limit=&after=<cursor>&puesto_trabajo=&nombre=<prefijo>
+    Responde 304 si la tabla no ha cambiado desde la ETag enviada en If-None-Match.
+    """
+    params = request.query_params
+    try:
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+        if limit < 1:
+            raise ValueError(limit)
+    except ValueError:
+        return JSONResponse({'error': "El parámetro 'limit' debe ser un entero positivo."}, 400)
+
+    try:
+        # El contador se lee antes que los datos (ver main.py).
+        version = await db.get_items_version()
+        if version in etags.etag_versions(request.headers.get('if-none-match')):
+            return _with_etag(Response(status_code=304), version)
+
+        items, next_cursor = await db.get_items_page(
+            limit=limit,
+            after=params.get('after'),
+            puesto_trabajo=params.get('puesto_trabajo'),
+            nombre_prefix=params.get('nombre'),
+        )
+        return _with_etag(_json_bytes(request, serialization.encoder.page(items, next_cursor)), version)
+    except CONNECTION_ERRORS + DATABASE_ERRORS as e:
+        return _db_error(e)
+
+async def get_changes(request: Request):
+    """Cambios posteriores al token ?since= (sin él, solo el token actual). Parámetros: ?since=&limit= (ver main.py)"""
+    params = request.query_params
+    try:
+        since = parse_since(params.get('since'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, 400)
+    try:
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+        if limit < 1:
+            raise ValueError(limit)
+    except ValueError:
+        return JSONResponse({'error': "El parámetro 'limit' debe ser un entero positivo."}, 400)
+
+    try:
+        changes, next_since, has_more = await db.get_changes(since, limit=limit)
+    except CONNECTION_ERRORS + DATABASE_ERRORS as e:
+        return _db_error(e)
+    return _json_bytes(request, serialization.encoder.changes(changes, next_since, has_more))
+
+async def get_item_stats(request: Request):
+    """Número de items (personas) por puesto y en total, de la tabla resumen (ver main.py)."""
+    try:
+        stats, version = await db.get_item_stats()
+    except CONNECTION_ERRORS + DATABASE_ERRORS as e:
+        return _db_error(e)
+    if version in etags.etag_versions(request.headers.get('if-none-match')):
+        return _with_etag(Response(status_code=304), version)
+    return _with_etag(JSONResponse({'total': sum(stats.values()), 'puestos': stats}, 200), version)
+
+async def search_items(request: Request):
+    """
+    Busca items (personas) por nombre y apellidos, ordenados por relevancia.
+    Parámetros: ?q=<texto>&limit=&offset=&puesto_trabajo= (ver main.py)
+    """
+    params = request.query_params
+    text = params.get('q', '')
+    if len(''.join(search_terms(text))) < MIN_SEARCH_LENGTH:
+        return JSONResponse({'error': f"El parámetro 'q' debe tener al menos {MIN_SEARCH_LENGTH} letras o números."}, 400)
+    try:
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+        offset = int(params.get('offset', 0))
+        if limit < 1 or offset < 0:
+            raise ValueError(limit, offset)
+    except ValueError:
+        return JSONResponse({'error': "Los parámetros 'limit' y 'offset' deben ser enteros (limit positivo, offset no negativo)."}, 400)
+
+    try:
+        version = await db.get_items_version()
+        if version in etags.etag_versions(request.headers.get('if-none-match')):
+            return _with_etag(Response(status_code=304), version)
+
+        items, next_offset = await db.search_items(
+            text, limit=limit, offset=offset, puesto_trabajo=params.get('puesto_trabajo'),
+        )
+        return _with_etag(_json_bytes(request, serialization.encoder.search_page(items, next_offset)), version)
+    except CONNECTION_ERRORS + DATABASE_ERRORS as e:
+        return _db_error(e)
+
+# Número de filas que se agrupan en cada bloque enviado al cliente durante la exportación.
+EXPORT_CHUNK_ROWS = 500
+
+async def export_items(request: Request):
+    """
+    Exporta todos los items (personas) en streaming, sin materializar la tabla en memoria.
+    Formato: ?format=json (array JSON, por defecto) o ?format=ndjson (un JSON por línea).
+    """
+    fmt = request.query_params.get('format', 'json')
+    if fmt not in ('json', 'ndjson'):
+        return JSONResponse({'error': "El parámetro 'format' debe ser 'json' o 'ndjson'."}, 400)
+
+    rows = db.iter_items()
+    try:
+        # Se lee la primera fila antes de empezar la respuesta para poder devolver
+        # un 503/500 si la DB falla (una vez enviadas las cabeceras ya no es posible).
+        first = await anext(rows, None)
+    except CONNECTION_ERRORS + DATABASE_ERRORS as e:
+        await rows.aclose()
+        return _db_error(e)
+
+    async def generate():
+        try:
+            if fmt == 'json':
+                yield '['
+            chunk = []
+            item, index = first, 0
+            while item is not None:
+                data = item.model_dump_json()
+                if fmt == 'ndjson':
+                    chunk.append(data + '\n')
+                else:
+                    chunk.append(data if index == 0 else ',' + data)
+                if len(chunk) >= EXPORT_CHUNK_ROWS:
+                    yield ''.join(chunk)
+                    chunk = []
+                item, index = await anext(rows, None), index + 1
+            if chunk:
+                yield ''.join(chunk)
+            if fmt == 'json':
+                yield ']'
+        finally:
+            # Devuelve la conexión al pool aunque el cliente corte la descarga.
+            await rows.aclose()
+
+    media_type = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return StreamingResponse(generate(), media_type=media_type)
+
+async def update_item(request: Request):
+    """Actualiza un item (persona) por su ID (DNI). Con If-Match solo si no ha cambiado (412 si no)."""
+    item_id = request.path_params['item_id']
+    data = await _json_body(request)
+    if not isinstance(data, dict):
+        return _invalid_body()
+    data.pop('created_at', None)
+    # El 'id' de la URL sustituye al del cuerpo para validar el modelo 'Item' completo.
+    data['id'] = item_id
+    try:
+        item = Item(**data)
+        version = etags.expected_version(request.headers.get('if-match'))
+        updated = await db.update_item(item_id, item, expected_version=etags.write_version(version))
+        etags.check_exists(version, updated, item_id)
+        if updated:
+            return _json_bytes(request, serialization.encoder.item(updated))
+        return JSONResponse({'error': 'Item no encontrado'}, 404)
+    except VersionMismatchError as e:
+        return _precondition_failed(e)
+    except ValidationError as e:
+        return JSONResponse({'error': 'Validation error', 'details': e.errors(include_url=False, include_context=False)}, 400)
+    except ValueError as e:
+        # If-Match con varias ETags
+        return JSONResponse({'error': str(e)}, 400)
+    except INTEGRITY_ERRORS as e:
+        return JSONResponse({'error': 'Database integrity error', 'details': str(e)}, 409)
+    except CONNECTION_ERRORS + DATABASE_ERRORS as e:
+        return _db_error(e)
+
+async def delete_item(request: Request):
+    """Elimina un item (persona) por su ID (DNI). Con If-Match solo si no ha cambiado (412 si no)."""
+    item_id = request.path_params['item_id']
+    try:
+        version = etags.expected_version(request.headers.get('if-match'))
+        deleted = await db.delete_item(item_id, expected_version=etags.write_version(version))
+        etags.check_exists(version, deleted, item_id)
+        if deleted:
+            return Response(status_code=204)
+        return JSONResponse({'error': 'Item no encontrado'}, 404)
+    except VersionMismatchError as e:
+        return _precondition_failed(e)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, 400)
+    except CONNECTION_ERRORS + DATABASE_ERRORS as e:
+        return _db_error(e)
+
+async def options(request: Request):
+    """Preflight de CORS (las cabeceras las añade CORSMiddleware)."""
+    return Response(status_code=200)
+
+async def health(request: Request):
+    """Endpoint simple para verificar que el servicio está activo."""
+    return JSONResponse({'status': 'healthy'}, 200)
+
+async def pool_stats(request: Request):
+    """Estadísticas del pool de conexiones de asyncpg."""
+    return JSONResponse(db.pool_stats(), 200)
+
+async def cache_stats(request: Request):
+    """La variante asíncrona no usa la caché de lectura."""
+    return JSONResponse({'backend': 'none'}, 200)
+
+# Las rutas estáticas van antes que /items/{item_id}, igual que en el enrutado de Flask.
+routes = [
+    Route('/items', create_item, methods=['POST']),
+    Route('/items', get_all_items, methods=['GET']),
+    Route('/items/bulk', bulk_create_items, methods=['POST']),
+    Route('/items/changes', get_changes, methods=['GET']),
+    Route('/items/export', export_items, methods=['GET']),
+    Route('/items/lookup', lookup_items, methods=['POST']),
+    Route('/items/search', search_items, methods=['GET']),
+    Route('/items/stats', get_item_stats, methods=['GET']),
+    Route('/items/{item_id}', get_item, methods=['GET']),
+    Route('/items/{item_id}', update_item, methods=['PUT']),
+    Route('/items/{item_id}', delete_item, methods=['DELETE']),
+    Route('/items', options, methods=['OPTIONS']),
+    Route('/items/{item_id}', options, methods=['OPTIONS']),
+    Route('/health', health, methods=['GET']),
+    Route('/health/pool', pool_stats, methods=['GET']),
+    Route('/health/cache', cache_stats, methods=['GET']),
+]
+
+app = CORSMiddleware(Starlette(routes=routes, lifespan=lifespan))
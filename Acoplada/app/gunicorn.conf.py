@@ -0,0 +1,82 @@
+"""
+Configuración de gunicorn para servir la aplicación en producción (ver Dockerfile):
+    gunicorn -c gunicorn.conf.py main:app
+
+Todos los valores se leen de variables de entorno GUNICORN_* para ajustarlos desde la
+definición de la tarea de ECS sin reconstruir la imagen.
+"""
+import os
+import sys
+
+# --- Servidor ---
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '8080')}")
+
+# Procesos (workers) e hilos por proceso. Con 'gthread' cada worker atiende 'threads'
+# peticiones a la vez; mientras un hilo espera a la DB (E/S) los demás siguen trabajando.
+# No se deriva de cpu_count(): en Fargate devuelve las vCPU del host, no la fracción de la
+# tarea (0,25 vCPU / 512 MB en main.yaml), y cada worker suma su pool, su hilo de LISTEN y su
+# cola de escrituras. El valor por defecto es conservador; main.yaml lo fija explícitamente.
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Segundos que se mantiene abierta una conexión keep-alive esperando la siguiente petición.
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+# Un worker que no responde en 'timeout' segundos se reinicia.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+# Tiempo para terminar las peticiones en curso tras SIGTERM. Por defecto algo menos que los
+# 30 s que ECS espera antes de enviar SIGKILL al parar una tarea.
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '25'))
+
+# Reciclado opcional de workers cada N peticiones (0 = nunca), con algo de aleatoriedad
+# para que no se reinicien todos a la vez.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '0'))
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG') or None
+errorlog = '-'
+
+# La aplicación NO se precarga en el proceso maestro: cada worker importa main.py tras el
+# fork y crea su propio pool, así ninguna conexión (socket) se comparte entre procesos.
+preload_app = False
+
+# Cada hilo necesita como mucho una conexión: por defecto el pool de cada worker se limita
+# al número de hilos (conexiones totales = workers x threads).
+os.environ.setdefault('DB_POOL_MAX', str(threads))
+# Los streams SSE (GET /items/stream) ocupan un hilo cada uno: como mucho la mitad de los hilos.
+os.environ.setdefault('CHANGES_STREAM_MAX_CLIENTS', str(max(1, threads // 2)))
+
+
+# --- Hooks ---
+def on_starting(server):
+    """
+    Se ejecuta una sola vez en el proceso maestro, antes de crear los workers: aplica el
+    esquema de la DB y marca DB_SCHEMA_MODE=skip para que los workers (que heredan el
+    entorno) solo abran su pool en initialize() en lugar de repetir el DDL.
+    """
+    from db.pool import ConnectionPool
+    from db.postgres_db import PostgresDatabase, connect_from_env, schema_mode
+
+    if schema_mode() == 'skip':
+        return
+    db = PostgresDatabase(pool=ConnectionPool(connect_from_env, min_size=0, max_size=1))
+    try:
+        db.initialize_schema()
+    finally:
+        # Se cierra antes del fork: los workers no heredan ninguna conexión abierta.
+        db.close()
+    os.environ['DB_SCHEMA_MODE'] = 'skip'
+
+
+def worker_exit(server, worker):
+    """
+    Aplica las escrituras diferidas pendientes del worker (ver write_queue.py), deja de escuchar
+    los avisos de cambios y cierra las conexiones de su pool al terminar (parada o reciclado).
+    """
+    main = sys.modules.get('main')
+    if main is not None and getattr(main, 'write_consumer', None) is not None:
+        main.write_consumer.stop()
+    if main is not None and getattr(main, 'change_notifier', None) is not None:
+        main.change_notifier.stop()
+    if main is not None and hasattr(main, 'db'):
+        main.db.close()
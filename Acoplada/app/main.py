@@ -1,9 +1,23 @@
-from flask import Flask, request, jsonify
+import functools
+import itertools
+import os
+import threading
+import time
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from pydantic import ValidationError
 import psycopg2
 from botocore.exceptions import ClientError # Mirar desacoplado
-from models.item import Item 
+from models.item import Item, validate_bulk
+from db import notifications, replicas
 from db.factory import DatabaseFactory
+from db.db import (DEFAULT_PAGE_SIZE, MAX_BULK_SIZE, MAX_LOOKUP_SIZE, MAX_PAGE_SIZE, MIN_SEARCH_LENGTH,
+                   VersionMismatchError, normalize_ids, parse_since, search_terms)
+from db.postgres_db import connect_from_env
+import metrics
+import serialization
+import etags
+import idempotency
+import write_queue
 
 app = Flask(__name__)
 
@@ -15,25 +29,165 @@ try:
 except ValueError as e:
     raise RuntimeError(f"Error initializing DB: {e}") from e
 
+# --- Escrituras diferidas (WRITE_QUEUE_BACKEND, ver write_queue.py) ---
+# Con una cola configurada, POST /items y PUT /items/<id> responden 202 y este hilo aplica
+# las escrituras por lotes. Cada worker de gunicorn tiene su propio consumidor.
+write_consumer = None
+if write_queue.get_queue() is not None:
+    write_consumer = write_queue.WriteBehindConsumer.from_env(write_queue.get_queue(), db)
+    write_consumer.start()
+
+# --- Almacén de claves de idempotencia ---
+# El almacén se crea al arrancar: un IDEMPOTENCY_BACKEND erróneo impide arrancar el worker en
+# lugar de fallar en cada petición con la cabecera.
+idempotency.get_store(lambda: db)
+
 # --- Middlewares ---
+@app.before_request
+def start_db_context():
+    """Cada petición empieza sin escrituras propias (read-your-writes con réplicas, ver db/replicas.py)."""
+    g.db_context_token = replicas.start_request()
+
+@app.teardown_request
+def end_db_context(exc):
+    token = g.pop('db_context_token', None)
+    if token is not None:
+        replicas.end_request(token)
+
 @app.after_request
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type,x-api-key'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type,x-api-key,If-Match,If-None-Match,Idempotency-Key'
     response.headers['Access-Control-Allow-Methods'] = 'GET,POST,PUT,DELETE,OPTIONS'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag,Idempotent-Replayed'
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Comprime (br/gzip, según Accept-Encoding) las respuestas JSON grandes; no las de streaming."""
+    if (response.status_code != 200 or response.is_streamed or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers):
+        return response
+    data = response.get_data()
+    if not serialization.should_compress(data):
+        return response
+    response.vary.add('Accept-Encoding')
+    body, encoding = serialization.compress(data, request.headers.get('Accept-Encoding'))
+    if encoding:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        # La versión comprimida es otra representación: la ETag pasa a ser débil (W/"n").
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
     return response
 
+def _json_bytes(body: bytes, status: int = 200):
+    """Respuesta con un JSON ya codificado por serialization.encoder."""
+    return app.response_class(body, status=status, mimetype='application/json')
+
+# --- Métricas por fase (METRICS_ENABLED=true, ver metrics.py) ---
+# Desactivadas, no se registra ningún hook ni el endpoint /metrics.
+if metrics.ENABLED:
+    @app.before_request
+    def start_metrics():
+        rule = request.url_rule.rule if request.url_rule else 'unmatched'
+        g.metrics_token = metrics.start_request(f"{request.method} {rule}")
+
+    @app.teardown_request
+    def end_metrics(exc):
+        token = g.pop('metrics_token', None)
+        if token is not None:
+            metrics.end_request(token)
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        """Histogramas de duración por endpoint y fase (Prometheus, o JSON con ?format=json)."""
+        if request.args.get('format') == 'json':
+            return jsonify(metrics.registry.snapshot()), 200
+        return Response(metrics.registry.prometheus(), mimetype='text/plain; version=0.0.4')
+
+# --- ETags (versión de la fila o contador de cambios de la tabla) ---
+def _expected_version():
+    """
+    Versión exigida por If-Match (None sin cabecera, etags.ANY_VERSION con '*', -1 si no es
+    una versión válida). ValueError si trae varias ETags (ver etags.py).
+    """
+    return etags.expected_version(request.headers.get('If-Match'))
+
+def _with_etag(response, version: int, status: int = 200):
+    """Añade la ETag y obliga al navegador a revalidar (If-None-Match) en cada uso."""
+    response.set_etag(str(version))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response, status
+
+def _precondition_failed(e):
+    return jsonify({'error': 'Precondition failed (If-Match)', 'details': str(e)}), 412
+
+def _accepted(op: str, item: Item):
+    """Encola la escritura y responde 202 con su tracking_id (estado en GET /items/writes/<tracking_id>)."""
+    tracking_id = write_queue.enqueue_write(write_queue.get_queue(), op, item)
+    response = jsonify({'tracking_id': tracking_id, 'id': item.id, 'status': 'queued'})
+    response.headers['Location'] = f"/items/writes/{tracking_id}"
+    return response, 202
+
+# --- Idempotency-Key (IDEMPOTENCY_BACKEND, ver idempotency.py) ---
+def _idempotent(view):
+    """
+    Con la cabecera Idempotency-Key, ejecuta la vista una sola vez por clave: los reintentos
+    reciben la respuesta guardada sin volver a validar ni a escribir en 'items'.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(idempotency.HEADER)
+        store = idempotency.get_store(lambda: db) if key is not None else None
+        if store is None:
+            return view(*args, **kwargs)
+
+        produced = []
+        def run():
+            response = app.make_response(view(*args, **kwargs))
+            produced.append(response)
+            return {'statusCode': response.status_code, 'headers': dict(response.headers),
+                    'body': response.get_data(as_text=True)}
+
+        try:
+            key = idempotency.validate_key(key)
+            fingerprint = idempotency.request_fingerprint(request.method, request.path, request.get_data())
+            stored, replayed = idempotency.run_once(store, key, fingerprint, run)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except idempotency.IdempotencyKeyInUse as e:
+            return jsonify({'error': str(e)}), 409
+        except idempotency.IdempotencyKeyReused as e:
+            return jsonify({'error': str(e)}), 422
+        except psycopg2.OperationalError as e:
+            return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+        except psycopg2.Error as e:
+            return jsonify({'error': 'Database error', 'details': str(e)}), 500
+        if not replayed:
+            return produced[0]
+        response = app.response_class(stored['body'], status=stored['statusCode'], headers=stored['headers'])
+        response.headers[idempotency.REPLAYED_HEADER] = 'true'
+        return response
+    return wrapper
+
 # --- Endpoints CRUD ---
 @app.route('/items', methods=['POST'])
+@_idempotent
 def create_item():
     """Crea un nuevo item (persona)."""
     try:
         data = request.get_json()
-        item = Item(**data)
+        with metrics.phase('model'):
+            item = Item(**data)
+        if write_queue.get_queue() is not None:
+            return _accepted('create', item)
         created = db.create_item(item)
-        return jsonify(created.model_dump()), 201
+        with metrics.phase('serialize'):
+            return _json_bytes(serialization.encoder.item(created), 201)
     except ValidationError as e:
-        return jsonify({'error': 'Validation error', 'details': e.errors()}), 400
+        return jsonify({'error': 'Validation error', 'details': e.errors(include_url=False, include_context=False)}), 400
     except psycopg2.IntegrityError as e:
         return jsonify({'error': 'Database integrity error (ID already exists)', 'details': str(e)}), 409
     except psycopg2.OperationalError as e:
@@ -41,14 +195,75 @@ def create_item():
     except psycopg2.Error as e:
         return jsonify({'error': 'Database error', 'details': str(e)}), 500
 
+@app.route('/items/bulk', methods=['POST'])
+def bulk_create_items():
+    """
+    Crea o actualiza (?upsert=true, por defecto) un lote de items (personas) en un solo viaje a la DB.
+    Devuelve el resultado de cada fila: created, updated, conflict, invalid o error.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        return jsonify({'error': 'El cuerpo debe ser una lista JSON de items.'}), 400
+    if len(data) > MAX_BULK_SIZE:
+        return jsonify({'error': f'El lote supera el máximo de {MAX_BULK_SIZE} items.'}), 413
+    upsert = request.args.get('upsert', 'true').lower() != 'false'
+
+    # 1. Validación de la lista entera en una llamada: las filas inválidas no abortan el lote.
+    with metrics.phase('model'):
+        results, valid, positions = validate_bulk(data)
+
+    # 2. Inserción/actualización conjunta de las filas válidas.
+    try:
+        for index, result in zip(positions, db.bulk_upsert_items(valid, upsert=upsert)):
+            results[index] = {'index': index, **result}
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+
+    summary = {status: 0 for status in ('created', 'updated', 'conflict', 'invalid', 'error')}
+    for result in results:
+        summary[result['status']] += 1
+    return jsonify({'summary': summary, 'results': results}), 200
+
+@app.route('/items/lookup', methods=['POST'])
+def lookup_items():
+    """
+    Obtiene de una vez los items (personas) de una lista de DNIs: {"ids": [...]}.
+    Devuelve los encontrados, en el orden pedido, y los DNIs que no existen ('missing').
+    """
+    data = request.get_json(silent=True)
+    try:
+        if not isinstance(data, dict):
+            raise ValueError("El cuerpo debe ser un objeto JSON con la lista 'ids'.")
+        item_ids = normalize_ids(data.get('ids'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if len(item_ids) > MAX_LOOKUP_SIZE:
+        return jsonify({'error': f'La consulta supera el máximo de {MAX_LOOKUP_SIZE} DNIs.'}), 413
+
+    try:
+        items = db.get_items_by_ids(item_ids)
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    found = {item.id for item in items}
+    missing = [item_id for item_id in item_ids if item_id not in found]
+    with metrics.phase('serialize'):
+        return _json_bytes(serialization.encoder.lookup(items, missing))
+
 @app.route('/items/<item_id>', methods=['GET']) 
 def get_item(item_id):
-    """Obtiene un item (persona) por su ID (DNI)."""
+    """Obtiene un item (persona) por su ID (DNI). Responde 304 si coincide con If-None-Match."""
     try:
-        item = db.get_item(item_id)
-        if item:
-            return jsonify(item.model_dump()), 200
-        return jsonify({'error': 'Item no encontrado'}), 404
+        item, version = db.get_item_with_version(item_id, etags.etag_versions(request.headers.get('If-None-Match')))
+        if version is None:
+            return jsonify({'error': 'Item no encontrado'}), 404
+        if item is None:
+            return _with_etag(app.response_class(status=304), version, 304)
+        with metrics.phase('serialize'):
+            return _with_etag(_json_bytes(serialization.encoder.item(item)), version)
     except psycopg2.OperationalError as e:
         return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
     except psycopg2.Error as e:
@@ -56,18 +271,253 @@ def get_item(item_id):
 
 @app.route('/items', methods=['GET'])
 def get_all_items():
-    """Obtiene todos los items (personas)."""
+    """
+    Obtiene los items (personas) paginados por DNI.
+    Parámetros: ?limit=&after=<cursor>&puesto_trabajo=&nombre=<prefijo>
+    Responde 304 si la tabla no ha cambiado desde la ETag enviada en If-None-Match.
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        if limit < 1:
+            raise ValueError(limit)
+    except ValueError:
+        return jsonify({'error': "El parámetro 'limit' debe ser un entero positivo."}), 400
+
+    try:
+        # El contador se lee antes que los datos: si cambia entre medias, la ETag
+        # enviada será anterior a los datos y el cliente simplemente volverá a descargarlos.
+        version = db.get_items_version()
+        if version in etags.etag_versions(request.headers.get('If-None-Match')):
+            return _with_etag(app.response_class(status=304), version, 304)
+
+        items, next_cursor = db.get_items_page(
+            limit=limit,
+            after=request.args.get('after'),
+            puesto_trabajo=request.args.get('puesto_trabajo'),
+            nombre_prefix=request.args.get('nombre'),
+        )
+        with metrics.phase('serialize'):
+            return _with_etag(_json_bytes(serialization.encoder.page(items, next_cursor)), version)
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+
+@app.route('/items/search', methods=['GET'])
+def search_items():
+    """
+    Busca items (personas) por nombre y apellidos, ordenados por relevancia.
+    Parámetros: ?q=<texto>&limit=&offset=&puesto_trabajo=
+    Cada palabra de 'q' se busca como prefijo, sin distinguir mayúsculas ni acentos.
+    Responde 304 si la tabla no ha cambiado desde la ETag enviada en If-None-Match.
+    """
+    text = request.args.get('q', '')
+    if len(''.join(search_terms(text))) < MIN_SEARCH_LENGTH:
+        return jsonify({'error': f"El parámetro 'q' debe tener al menos {MIN_SEARCH_LENGTH} letras o números."}), 400
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        offset = int(request.args.get('offset', 0))
+        if limit < 1 or offset < 0:
+            raise ValueError(limit, offset)
+    except ValueError:
+        return jsonify({'error': "Los parámetros 'limit' y 'offset' deben ser enteros (limit positivo, offset no negativo)."}), 400
+
     try:
-        items = db.get_all_items()
-        return jsonify([item.model_dump() for item in items]), 200
+        version = db.get_items_version()
+        if version in etags.etag_versions(request.headers.get('If-None-Match')):
+            return _with_etag(app.response_class(status=304), version, 304)
+
+        items, next_offset = db.search_items(
+            text, limit=limit, offset=offset, puesto_trabajo=request.args.get('puesto_trabajo'),
+        )
+        with metrics.phase('serialize'):
+            return _with_etag(_json_bytes(serialization.encoder.search_page(items, next_offset)), version)
     except psycopg2.OperationalError as e:
         return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
     except psycopg2.Error as e:
         return jsonify({'error': 'Database error', 'details': str(e)}), 500
 
+# Número de filas que se agrupan en cada bloque enviado al cliente durante la exportación.
+EXPORT_CHUNK_ROWS = 500
+
+@app.route('/items/export', methods=['GET'])
+def export_items():
+    """
+    Exporta todos los items (personas) en streaming, sin materializar la tabla en memoria.
+    Formato: ?format=json (array JSON, por defecto) o ?format=ndjson (un JSON por línea).
+    """
+    fmt = request.args.get('format', 'json')
+    if fmt not in ('json', 'ndjson'):
+        return jsonify({'error': "El parámetro 'format' debe ser 'json' o 'ndjson'."}), 400
+
+    try:
+        rows = db.iter_items()
+        # Se lee la primera fila antes de empezar la respuesta para poder devolver
+        # un 503/500 si la DB falla (una vez enviadas las cabeceras ya no es posible).
+        first = next(rows, None)
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+
+    def generate():
+        if fmt == 'json':
+            yield '['
+        chunk = []
+        items = itertools.chain([first], rows) if first is not None else ()
+        for index, item in enumerate(items):
+            data = item.model_dump_json()
+            if fmt == 'ndjson':
+                chunk.append(data + '\n')
+            else:
+                chunk.append(data if index == 0 else ',' + data)
+            if len(chunk) >= EXPORT_CHUNK_ROWS:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+        if fmt == 'json':
+            yield ']'
+
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+# --- Estadísticas ---
+@app.route('/items/stats', methods=['GET'])
+def get_item_stats():
+    """
+    Número de items (personas) por puesto de trabajo y en total, leídos de la tabla resumen
+    'items_stats' en lugar de descargar y contar todo el listado. Responde 304 si la tabla no
+    ha cambiado desde la ETag enviada en If-None-Match.
+    """
+    try:
+        stats, version = db.get_item_stats()
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    if version in etags.etag_versions(request.headers.get('If-None-Match')):
+        return _with_etag(app.response_class(status=304), version, 304)
+    return _with_etag(jsonify({'total': sum(stats.values()), 'puestos': stats}), version)
+
+# --- Feed de cambios ---
+@app.route('/items/changes', methods=['GET'])
+def get_changes():
+    """
+    Cambios (altas/modificaciones y borrados) posteriores al token ?since=, en orden, para que
+    el cliente aplique solo las diferencias. Sin 'since' devuelve solo el token actual, desde
+    el que empezar a seguir los cambios. Parámetros: ?since=<token>&limit=
+    Si 'has_more' es true, hay que volver a llamar con 'next_since'.
+    """
+    try:
+        since = parse_since(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        if limit < 1:
+            raise ValueError(limit)
+    except ValueError:
+        return jsonify({'error': "El parámetro 'limit' debe ser un entero positivo."}), 400
+
+    try:
+        changes, next_since, has_more = db.get_changes(since, limit=limit)
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    with metrics.phase('serialize'):
+        return _json_bytes(serialization.encoder.changes(changes, next_since, has_more))
+
+# Stream SSE de cambios (GET /items/stream). Cada stream ocupa un hilo del worker mientras
+# está abierto, así que se limitan por worker (CHANGES_STREAM_MAX_CLIENTS, la mitad de los
+# hilos con gunicorn.conf.py) y se cierran tras CHANGES_STREAM_TIMEOUT segundos: el navegador
+# (EventSource) reconecta solo y continúa desde el último evento (Last-Event-ID).
+CHANGES_STREAM_MAX_CLIENTS = int(os.getenv('CHANGES_STREAM_MAX_CLIENTS', '2'))
+CHANGES_STREAM_TIMEOUT = float(os.getenv('CHANGES_STREAM_TIMEOUT', '300'))
+# Sin avisos, cada CHANGES_STREAM_HEARTBEAT segundos se vuelve a leer el feed (con réplicas, el
+# aviso del primario puede llegar antes que el cambio a la réplica) y se envía un comentario
+# para que los proxies no cierren la conexión por inactividad.
+CHANGES_STREAM_HEARTBEAT = float(os.getenv('CHANGES_STREAM_HEARTBEAT', '15'))
+
+_stream_slots = threading.BoundedSemaphore(CHANGES_STREAM_MAX_CLIENTS)
+_notifier_lock = threading.Lock()
+change_notifier = None
+
+def _get_change_notifier():
+    """Escucha de NOTIFY del worker (ver db/notifications.py); se crea con el primer stream."""
+    global change_notifier
+    with _notifier_lock:
+        if change_notifier is None:
+            change_notifier = notifications.notifier_from_env(connect_from_env)
+            change_notifier.start()
+        return change_notifier
+
+def _sse_event(change: dict) -> str:
+    data = serialization.encoder.change(change).decode()
+    return f"id: {change['version']}\nevent: {change['op']}\ndata: {data}\n\n"
+
+@app.route('/items/stream', methods=['GET'])
+def stream_changes():
+    """
+    Stream SSE (text/event-stream) de los cambios posteriores a ?since= o, al reconectar, a la
+    cabecera Last-Event-ID; sin ninguno de los dos, desde ahora. Cada evento es 'upsert' o
+    'delete', con la versión como 'id' y el cambio (como en GET /items/changes) como 'data'.
+    """
+    try:
+        since = parse_since(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not _stream_slots.acquire(blocking=False):
+        return jsonify({'error': 'Demasiados streams abiertos, reintenta más tarde.'}), 503
+    try:
+        notifier = _get_change_notifier()
+        if since is None:
+            _, since, _ = db.get_changes(None)
+    except psycopg2.OperationalError as e:
+        _stream_slots.release()
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        _stream_slots.release()
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+
+    def generate(since):
+        deadline = time.monotonic() + CHANGES_STREAM_TIMEOUT
+        # La generación se toma antes de leer: un aviso posterior a la lectura no se pierde.
+        seen = notifier.generation
+        yield "retry: 3000\n\n"  # Milisegundos que espera EventSource antes de reconectar
+        while True:
+            try:
+                changes, since, has_more = db.get_changes(since, limit=MAX_PAGE_SIZE)
+            except psycopg2.Error as e:
+                # El cliente reconecta solo y sigue desde el último evento recibido.
+                print(f"ERROR: No se pudo leer el feed de cambios del stream: {e}")
+                yield "event: error\ndata: {\"error\": \"Database error\"}\n\n"
+                return
+            if changes:
+                yield ''.join(_sse_event(change) for change in changes)
+            if has_more:
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            generation = notifier.wait(seen, min(CHANGES_STREAM_HEARTBEAT, remaining))
+            if generation is None:
+                yield ": keepalive\n\n"
+            else:
+                seen = generation
+
+    response = Response(stream_with_context(generate(since)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Sin búfer en proxies como nginx
+    # El hueco se libera al cerrar la respuesta, también si el cliente se desconecta antes.
+    response.call_on_close(_stream_slots.release)
+    return response
+
 @app.route('/items/<item_id>', methods=['PUT']) 
+@_idempotent
 def update_item(item_id):
-    """Actualiza un item (persona) por su ID (DNI)."""
+    """Actualiza un item (persona) por su ID (DNI). Con If-Match solo si no ha cambiado (412 si no)."""
     try:
         data = request.get_json()
         data.pop('id', None) 
@@ -79,14 +529,26 @@ def update_item(item_id):
         data['id'] = item_id
         # --- FIN DE LA CORRECCIÓN ---
         
-        item = Item(**data) # Ahora la validación funcionará
-        updated = db.update_item(item_id, item)
+        with metrics.phase('model'):
+            item = Item(**data) # Ahora la validación funcionará
+        # Con If-Match la comprobación de versión necesita la fila actual: siempre síncrona.
+        expected_version = _expected_version()
+        if write_queue.get_queue() is not None and expected_version is None:
+            return _accepted('update', item)
+        updated = db.update_item(item_id, item, expected_version=etags.write_version(expected_version))
+        etags.check_exists(expected_version, updated, item_id)
         
         if updated:
-            return jsonify(updated.model_dump()), 200
+            with metrics.phase('serialize'):
+                return _json_bytes(serialization.encoder.item(updated))
         return jsonify({'error': 'Item no encontrado'}), 404
+    except VersionMismatchError as e:
+        return _precondition_failed(e)
     except ValidationError as e:
-        return jsonify({'error': 'Validation error', 'details': e.errors()}), 400
+        return jsonify({'error': 'Validation error', 'details': e.errors(include_url=False, include_context=False)}), 400
+    except ValueError as e:
+        # If-Match con varias ETags
+        return jsonify({'error': str(e)}), 400
     except psycopg2.IntegrityError as e:
         return jsonify({'error': 'Database integrity error', 'details': str(e)}), 409
     except psycopg2.OperationalError as e:
@@ -96,20 +558,66 @@ def update_item(item_id):
 
 @app.route('/items/<item_id>', methods=['DELETE'])
 def delete_item(item_id):
-    """Elimina un item (persona) por su ID (DNI)."""
+    """Elimina un item (persona) por su ID (DNI). Con If-Match solo si no ha cambiado (412 si no)."""
     try:
-        if db.delete_item(item_id):
+        expected_version = _expected_version()
+        deleted = db.delete_item(item_id, expected_version=etags.write_version(expected_version))
+        etags.check_exists(expected_version, deleted, item_id)
+        if deleted:
             return '', 204
         return jsonify({'error': 'Item no encontrado'}), 404
+    except VersionMismatchError as e:
+        return _precondition_failed(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+
+@app.route('/items/writes/<tracking_id>', methods=['GET'])
+def get_write_status(tracking_id):
+    """Estado de una escritura diferida: 'pending' mientras no se ha aplicado, o su resultado."""
+    if not write_queue.is_tracking_id(tracking_id):
+        return jsonify({'error': 'tracking_id no válido'}), 400
+    try:
+        result = db.get_write_result(tracking_id)
     except psycopg2.OperationalError as e:
         return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
     except psycopg2.Error as e:
         return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    return jsonify(result or {'tracking_id': tracking_id, 'status': 'pending'}), 200
 
 @app.route('/health', methods=['GET'])
 def health():
     """Endpoint simple para verificar que el servicio está activo."""
     return jsonify({'status': 'healthy'}), 200
 
+@app.route('/health/pool', methods=['GET'])
+def pool_stats():
+    """Estadísticas del pool de conexiones (tamaño, conexiones ociosas/en uso, esperas, etc.)."""
+    return jsonify(db.pool_stats()), 200
+
+@app.route('/health/cache', methods=['GET'])
+def cache_stats():
+    """Contadores de la caché de lectura (aciertos, fallos, desalojos...)."""
+    if not hasattr(db, 'cache_stats'):
+        return jsonify({'backend': 'none'}), 200
+    return jsonify(db.cache_stats()), 200
+
+@app.route('/health/changes', methods=['GET'])
+def change_stream_stats():
+    """Estado de la escucha de NOTIFY de los streams SSE de este worker."""
+    if change_notifier is None:
+        return jsonify({'listening': False}), 200
+    return jsonify({'listening': True, **change_notifier.stats()}), 200
+
+@app.route('/health/writes', methods=['GET'])
+def write_queue_stats():
+    """Estado de la cola de escrituras diferidas (mensajes pendientes, lotes aplicados...)."""
+    if write_consumer is None:
+        return jsonify({'backend': 'none'}), 200
+    return jsonify(write_consumer.stats()), 200
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080)
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Instrumentación ligera por petición: tiempo de cada fase (checkout de la conexión del pool,
+SQL, construcción de modelos y serialización) por endpoint, agregado en histogramas que se
+publican en GET /metrics (formato de texto de Prometheus, o JSON con ?format=json).
+
+Se activa con METRICS_ENABLED=true. Desactivada (por defecto), phase() devuelve siempre el
+mismo contexto vacío y main.py no registra los hooks ni el endpoint, así que no se mide nada.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Optional
+
+ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+# Límites superiores (ms) de los buckets de los histogramas; el último bucket es +Inf.
+BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+PHASES = ('checkout', 'sql', 'model', 'serialize')
+
+
+class Histogram:
+    """Histograma acumulativo de duraciones en milisegundos (no es seguro entre hilos por sí solo)."""
+
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value_ms: float):
+        for index, bound in enumerate(BUCKETS_MS):
+            if value_ms <= bound:
+                break
+        else:
+            index = len(BUCKETS_MS)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value_ms
+
+    def snapshot(self) -> dict:
+        # Buckets acumulativos como en Prometheus: [límite superior, observaciones <= límite]
+        buckets, total = [], 0
+        for bound, count in zip(BUCKETS_MS + ('+Inf',), self.counts):
+            total += count
+            buckets.append([bound, total])
+        return {'count': self.count, 'sum_ms': round(self.sum, 3), 'buckets': buckets}
+
+
+class _RequestTimer:
+    """Tiempos acumulados de las fases de la petición en curso."""
+
+    __slots__ = ('endpoint', 'started', 'phases')
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.phases = {}
+
+
+class Registry:
+    """Histogramas por (endpoint, fase), incluida la fase 'total' de la petición completa."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, endpoint: str, phases: dict):
+        with self._lock:
+            for phase_name, value_ms in phases.items():
+                histogram = self._histograms.get((endpoint, phase_name))
+                if histogram is None:
+                    histogram = self._histograms[(endpoint, phase_name)] = Histogram()
+                histogram.observe(value_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            result = {}
+            for (endpoint, phase_name), histogram in sorted(self._histograms.items()):
+                result.setdefault(endpoint, {})[phase_name] = histogram.snapshot()
+            return result
+
+    def prometheus(self) -> str:
+        """Histogramas en el formato de texto de Prometheus (una serie por endpoint y fase)."""
+        lines = [
+            '# HELP app_request_phase_ms Duración de cada fase de la petición en milisegundos.',
+            '# TYPE app_request_phase_ms histogram',
+        ]
+        for endpoint, phases in self.snapshot().items():
+            for phase_name, data in phases.items():
+                labels = f'endpoint="{endpoint}",phase="{phase_name}"'
+                for bound, count in data['buckets']:
+                    lines.append(f'app_request_phase_ms_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'app_request_phase_ms_sum{{{labels}}} {data["sum_ms"]}')
+                lines.append(f'app_request_phase_ms_count{{{labels}}} {data["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+_current: ContextVar[Optional[_RequestTimer]] = ContextVar('metrics_request', default=None)
+
+
+# --- API usada por main.py y la capa de DB ---
+def start_request(endpoint: str):
+    """Empieza a medir una petición; devuelve el token para end_request()."""
+    return _current.set(_RequestTimer(endpoint))
+
+
+def end_request(token):
+    """Termina la petición en curso y registra sus fases y su duración total."""
+    timer = _current.get()
+    _current.reset(token)
+    if timer is None:
+        return
+    phases = dict(timer.phases)
+    phases['total'] = (time.perf_counter() - timer.started) * 1000
+    registry.observe(timer.endpoint, phases)
+
+
+@contextmanager
+def _timed_phase(name: str):
+    timer = _current.get()
+    if timer is None:  # Fuera de una petición (p. ej. initialize()): no se mide
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        timer.phases[name] = timer.phases.get(name, 0.0) + elapsed
+
+
+_NO_PHASE = nullcontext()
+
+
+def _no_phase(name: str):
+    return _NO_PHASE
+
+
+# Con las métricas desactivadas, phase() no mide nada: devuelve siempre el mismo contexto vacío.
+phase = _timed_phase if ENABLED else _no_phase
@@ -0,0 +1,75 @@
+"""
+Serialización de las respuestas con items y compresión negociada con Accept-Encoding.
+
+Los items se codifican con el codificador común de core/encoders.py ('pydantic' por defecto u
+'orjson', según JSON_BACKEND), que se crea al importar este módulo (al arrancar cada worker).
+
+Las respuestas de al menos COMPRESSION_MIN_SIZE bytes (1024 por defecto, 0 = nunca) se
+comprimen con br (si está instalado el paquete opcional brotli) o gzip, según lo que acepte el
+cliente en Accept-Encoding.
+"""
+import gzip
+import os
+from typing import Optional, Tuple
+
+from encoders import get_encoder
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = 5      # Buen equilibrio entre CPU y tamaño para JSON
+BROTLI_QUALITY = 4  # Calidades altas de brotli son demasiado lentas para respuestas dinámicas
+
+encoder = get_encoder()
+
+
+# --- Compresión ---
+def _accepted_encodings(accept_encoding: Optional[str]) -> set:
+    """Codificaciones aceptadas en Accept-Encoding (se descartan las de q=0)."""
+    accepted = set()
+    for part in (accept_encoding or '').lower().split(','):
+        name, *params = [token.strip() for token in part.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name)
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Elige 'br' o 'gzip' según Accept-Encoding (None si el cliente no acepta ninguna)."""
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def should_compress(body: bytes) -> bool:
+    """Indica si el cuerpo es lo bastante grande para comprimirlo (la respuesta varía con Accept-Encoding)."""
+    return COMPRESSION_MIN_SIZE > 0 and len(body) >= COMPRESSION_MIN_SIZE
+
+
+def compress(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Comprime el cuerpo si supera COMPRESSION_MIN_SIZE y el cliente lo acepta.
+    Devuelve (cuerpo, codificación), con codificación None si se envía sin comprimir.
+    """
+    if not should_compress(body):
+        return body, None
+    encoding = choose_encoding(accept_encoding)
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY), encoding
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), encoding
+    return body, None
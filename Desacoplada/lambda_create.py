@@ -1,71 +1,148 @@
 import json
 import os
 from pydantic import ValidationError
-from models.item import Item
+from models.item import Item, validate_bulk
 from db.factory import DatabaseFactory
+import metrics
+import serialization
+import idempotency
+import write_queue
+from db.db import MAX_BULK_SIZE
 from psycopg2 import OperationalError, IntegrityError
 from json import JSONDecodeError # Importante para capturar JSON malformado
 
 # --- Inicialización ---
-try:
-    db = DatabaseFactory.create()
-    db.initialize()
-except Exception as e:
-    print(f"ERROR: No se pudo inicializar la conexión a la BD: {e}")
-    db = None
+# La conexión y la verificación del esquema se aplazan a la primera invocación
+# (DB_INIT_MODE=lazy, por defecto); con DB_INIT_MODE=eager se hacen al importar.
+DatabaseFactory.preload()
+# El almacén de Idempotency-Key (IDEMPOTENCY_BACKEND) se crea al importar, sin conectar: una
+# configuración errónea hace fallar la inicialización en lugar de cada invocación.
+idempotency.get_store(DatabaseFactory.get_instance)
 
 # --- Headers de CORS ---
 CORS_HEADERS = {
     'Access-Control-Allow-Origin': '*',
     'Access-Control-Allow-Methods': 'POST, OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token'
+    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token, Idempotency-Key',
+    'Access-Control-Expose-Headers': 'Idempotent-Replayed'
 }
 
-def handler(event, context):
+def bulk_create(db, event, data):
     """
-    Maneja la petición POST para crear un nuevo item.
+    Modo masivo (POST /items/bulk o body con una lista JSON): valida la lista entera de una vez
+    y crea/actualiza (?upsert=true, por defecto) los válidos en un solo viaje a la BD.
     """
-    if db is None:
+    if not isinstance(data, list):
+        raise ValueError("En el modo masivo el body debe ser una lista JSON de items.")
+    if len(data) > MAX_BULK_SIZE:
         return {
-            'statusCode': 503,
+            'statusCode': 413, # Payload Too Large
             'headers': CORS_HEADERS,
-            'body': json.dumps({'error': 'Servicio no disponible por error de configuración de BD.'})
+            'body': json.dumps({'error': f'El lote supera el máximo de {MAX_BULK_SIZE} items.'})
         }
+    params = event.get('queryStringParameters') or {}
+    upsert = params.get('upsert', 'true').lower() != 'false'
+
+    # 1. Validación de la lista entera en una llamada: las filas inválidas no abortan el lote
+    with metrics.phase('model'):
+        results, valid, positions = validate_bulk(data)
+
+    # 2. Inserción/actualización conjunta de los items válidos
+    for index, result in zip(positions, db.bulk_upsert_items(valid, upsert=upsert)):
+        results[index] = {'index': index, **result}
+
+    summary = {status: 0 for status in ('created', 'updated', 'conflict', 'invalid', 'error')}
+    for result in results:
+        summary[result['status']] += 1
+
+    return {
+        'statusCode': 200,
+        'headers': CORS_HEADERS,
+        'body': json.dumps({'summary': summary, 'results': results})
+    }
+
+@metrics.instrument('lambda_create')
+def handler(event, context):
+    """
+    Punto de entrada de la Lambda. Con la cabecera Idempotency-Key (IDEMPOTENCY_BACKEND, ver
+    idempotency.py) el alta se ejecuta una sola vez por clave y los reintentos reciben la
+    respuesta guardada sin volver a tocar la BD de items.
+    """
+    return idempotency.lambda_response(event, lambda: create(event), CORS_HEADERS, DatabaseFactory.get_instance)
+
+def invalid_body(e):
+    # Error si el body es nulo, no es JSON válido, o está vacío
+    return {
+        'statusCode': 400, # Bad Request
+        'headers': CORS_HEADERS,
+        'body': json.dumps({'error': 'Cuerpo (body) de la petición inválido', 'details': str(e)})
+    }
 
+def create(event):
+    """
+    Maneja la petición POST para crear un nuevo item (o un lote de items en modo masivo).
+    Con una cola de escrituras (WRITE_QUEUE_BACKEND) el alta individual se encola y responde 202.
+    """
+    queue = write_queue.get_queue()
     try:
         # 1. Parsear el body de la petición (de forma segura)
         body = event.get('body')
         if not body:
             raise ValueError("El cuerpo de la petición (body) está vacío.")
-        
         data = json.loads(body)
+    except (JSONDecodeError, TypeError, ValueError) as e:
+        return invalid_body(e)
+
+    # Modo masivo: POST /items/bulk o un body con una lista de items
+    bulk = event.get('resource') == '/items/bulk' or isinstance(data, list)
+
+    try:
+        # Con cola, el alta individual no necesita la BD; el modo masivo siempre escribe en ella.
+        db = DatabaseFactory.get_instance() if queue is None or bulk else None
+    except Exception as e:
+        print(f"ERROR: No se pudo inicializar la conexión a la BD: {e}")
+        return {
+            'statusCode': 503,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': 'Servicio no disponible por error de configuración de BD.'})
+        }
+
+    try:
+        if bulk:
+            return bulk_create(db, event, data)
 
         # 2. Validar los datos con Pydantic
-        item = Item(**data)
+        with metrics.phase('model'):
+            item = Item(**data)
 
-        # 3. Llamar a la base de datos para crear el item
+        # 3. Encolar el alta (escritura diferida) o llamar a la base de datos para crearlo
+        if queue is not None:
+            tracking_id = write_queue.enqueue_write(queue, 'create', item)
+            return {
+                'statusCode': 202, # Accepted: se aplicará por lotes (ver lambda_write_consumer.py)
+                'headers': {**CORS_HEADERS, 'Location': f"/items/writes/{tracking_id}"},
+                'body': json.dumps({'tracking_id': tracking_id, 'id': item.id, 'status': 'queued'})
+            }
         created_item = db.create_item(item)
 
         # 4. Devolver la respuesta de éxito (201 Created)
+        with metrics.phase('serialize'):
+            body = serialization.item(created_item)
         return {
             'statusCode': 201,
             'headers': CORS_HEADERS,
-            'body': created_item.model_dump_json()
+            'body': body
         }
 
-    except (JSONDecodeError, TypeError, ValueError) as e:
-        # Error si el body es nulo, no es JSON válido, o está vacío
-        return {
-            'statusCode': 400, # Bad Request
-            'headers': CORS_HEADERS,
-            'body': json.dumps({'error': 'Cuerpo (body) de la petición inválido', 'details': str(e)})
-        }
     except ValidationError as e:
+        # Antes que ValueError: ValidationError de pydantic hereda de ella
         return {
             'statusCode': 400, # Bad Request
             'headers': CORS_HEADERS,
-            'body': json.dumps({'error': 'Validation error', 'details': e.errors()})
+            'body': json.dumps({'error': 'Validation error', 'details': e.errors(include_url=False, include_context=False)})
         }
+    except (JSONDecodeError, TypeError, ValueError) as e:
+        return invalid_body(e)
     except IntegrityError as e:
         return {
             'statusCode': 409, # Conflict
@@ -1,28 +1,43 @@
 import json
 import os
 from db.factory import DatabaseFactory
+import etags
+import metrics
+from db.db import VersionMismatchError
 from psycopg2 import OperationalError, IntegrityError
 
 # --- Inicialización ---
-try:
-    db = DatabaseFactory.create()
-    db.initialize()
-except Exception as e:
-    print(f"ERROR: No se pudo inicializar la conexión a la BD: {e}")
-    db = None
+# La conexión y la verificación del esquema se aplazan a la primera invocación
+# (DB_INIT_MODE=lazy, por defecto); con DB_INIT_MODE=eager se hacen al importar.
+DatabaseFactory.preload()
 
 # --- Headers de CORS ---
 CORS_HEADERS = {
     'Access-Control-Allow-Origin': '*',
     'Access-Control-Allow-Methods': 'DELETE, OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token'
+    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token, If-Match, If-None-Match',
+    'Access-Control-Expose-Headers': 'ETag'
 }
 
+@metrics.instrument('lambda_delete')
 def handler(event, context):
     """
     Maneja la petición DELETE para eliminar un item por su ID.
+    Con If-Match solo elimina si la versión (ETag) sigue siendo la misma (412 si no).
     """
-    if db is None:
+    try:
+        version = etags.expected_version(etags.get_header(event, 'If-Match'))
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': str(e)})
+        }
+
+    try:
+        db = DatabaseFactory.get_instance()
+    except Exception as e:
+        print(f"ERROR: No se pudo inicializar la conexión a la BD: {e}")
         return {
             'statusCode': 503,
             'headers': CORS_HEADERS,
@@ -40,7 +55,8 @@ def handler(event, context):
             }
 
         # 2. Llamar a la base de datos para eliminar el item
-        deleted = db.delete_item(item_id)
+        deleted = db.delete_item(item_id, expected_version=etags.write_version(version))
+        etags.check_exists(version, deleted, item_id)
 
         # 3. Devolver la respuesta
         if deleted:
@@ -56,6 +72,12 @@ def handler(event, context):
                 'body': json.dumps({'error': 'Item no encontrado'})
             }
 
+    except VersionMismatchError as e:
+        return {
+            'statusCode': 412, # Precondition Failed (If-Match)
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': 'Precondition failed (If-Match)', 'details': str(e)})
+        }
     except IntegrityError as e:
         return {
             'statusCode': 409, # Conflict
@@ -1,28 +1,179 @@
 import json
 import os
 from db.factory import DatabaseFactory
+import metrics
+import serialization
+import write_queue
+import etags
+from db.db import DEFAULT_PAGE_SIZE, MAX_LOOKUP_SIZE, MIN_SEARCH_LENGTH, normalize_ids, parse_since, search_terms
 from psycopg2 import OperationalError
 
 # --- Inicialización ---
-try:
-    db = DatabaseFactory.create()
-    db.initialize()
-except Exception as e:
-    print(f"ERROR: No se pudo inicializar la conexión a la BD: {e}")
-    db = None
+# La conexión y la verificación del esquema se aplazan a la primera invocación
+# (DB_INIT_MODE=lazy, por defecto); con DB_INIT_MODE=eager se hacen al importar.
+DatabaseFactory.preload()
 
 # --- Headers de CORS ---
 CORS_HEADERS = {
     'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'GET, OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token'
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token, If-Match, If-None-Match',
+    'Access-Control-Expose-Headers': 'ETag'
 }
 
+# --- ETags (versión de la fila o contador de cambios de la tabla, ver etags.py) ---
+def with_etag(version, status_code=200, body=''):
+    """Respuesta con ETag; Cache-Control: no-cache obliga al navegador a revalidar con If-None-Match."""
+    return {
+        'statusCode': status_code,
+        'headers': {**CORS_HEADERS, 'ETag': f'"{version}"', 'Cache-Control': 'no-cache'},
+        'body': body
+    }
+
+def search(db, event):
+    """
+    Busca items por nombre y apellidos, ordenados por relevancia: ?q=<texto>&limit=&offset=&puesto_trabajo=
+    Cada palabra de 'q' se busca como prefijo, sin distinguir mayúsculas ni acentos.
+    """
+    params = event.get('queryStringParameters') or {}
+    text = params.get('q', '')
+    if len(''.join(search_terms(text))) < MIN_SEARCH_LENGTH:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f"El parámetro 'q' debe tener al menos {MIN_SEARCH_LENGTH} letras o números."})
+        }
+    try:
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+        offset = int(params.get('offset', 0))
+        if limit < 1 or offset < 0:
+            raise ValueError(limit, offset)
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': "Los parámetros 'limit' y 'offset' deben ser enteros (limit positivo, offset no negativo)."})
+        }
+
+    # Los resultados dependen de toda la tabla: la ETag es el contador de cambios, como en GET /items
+    version = db.get_items_version()
+    if version in etags.etag_versions(etags.get_header(event, 'If-None-Match')):
+        return with_etag(version, 304)
+
+    print(f"Buscando items (q={text!r}, limit={limit}, offset={offset})...")
+    items, next_offset = db.search_items(
+        text, limit=limit, offset=offset, puesto_trabajo=params.get('puesto_trabajo'),
+    )
+    with metrics.phase('serialize'):
+        body = serialization.search_page(items, next_offset)
+    return with_etag(version, 200, body)
+
+def lookup(db, event):
+    """
+    Obtiene de una vez los items de una lista de DNIs (POST /items/lookup con {"ids": [...]}):
+    los encontrados, en el orden pedido, y los DNIs que no existen ('missing').
+    """
+    try:
+        data = json.loads(event.get('body') or 'null')
+        if not isinstance(data, dict):
+            raise ValueError("El cuerpo debe ser un objeto JSON con la lista 'ids'.")
+        item_ids = normalize_ids(data.get('ids'))
+    except ValueError as e:  # Incluye JSONDecodeError
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': str(e)})
+        }
+    if len(item_ids) > MAX_LOOKUP_SIZE:
+        return {
+            'statusCode': 413, # Payload Too Large
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f'La consulta supera el máximo de {MAX_LOOKUP_SIZE} DNIs.'})
+        }
+
+    print(f"Buscando {len(item_ids)} items por ID...")
+    items = db.get_items_by_ids(item_ids)
+    found = {item.id for item in items}
+    missing = [item_id for item_id in item_ids if item_id not in found]
+    with metrics.phase('serialize'):
+        body = serialization.lookup(items, missing)
+    return {
+        'statusCode': 200,
+        'headers': CORS_HEADERS,
+        'body': body
+    }
+
+def changes(db, event):
+    """
+    Cambios (altas/modificaciones y borrados) posteriores al token: ?since=<token>&limit=
+    Sin 'since' devuelve solo el token actual, desde el que empezar a seguir los cambios.
+    """
+    params = event.get('queryStringParameters') or {}
+    try:
+        since = parse_since(params.get('since'))
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': str(e)})
+        }
+    try:
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+        if limit < 1:
+            raise ValueError(limit)
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': "El parámetro 'limit' debe ser un entero positivo."})
+        }
+
+    print(f"Buscando cambios (since={since}, limit={limit})...")
+    items_changes, next_since, has_more = db.get_changes(since, limit=limit)
+    with metrics.phase('serialize'):
+        body = serialization.changes(items_changes, next_since, has_more)
+    return {
+        'statusCode': 200,
+        'headers': CORS_HEADERS,
+        'body': body
+    }
+
+def stats(db, event):
+    """
+    Número de items por puesto de trabajo y en total, de la tabla resumen 'items_stats' (sin
+    recorrer 'items'). La ETag es el contador de cambios, como en GET /items.
+    """
+    counts, version = db.get_item_stats()
+    if version in etags.etag_versions(etags.get_header(event, 'If-None-Match')):
+        return with_etag(version, 304)
+    return with_etag(version, 200, json.dumps({'total': sum(counts.values()), 'puestos': counts}))
+
+def write_status(db, tracking_id):
+    """Estado de una escritura diferida (ver write_queue.py): 'pending' mientras no se ha aplicado, o su resultado."""
+    if not write_queue.is_tracking_id(tracking_id):
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': 'tracking_id no válido'})
+        }
+    result = db.get_write_result(tracking_id)
+    return {
+        'statusCode': 200,
+        'headers': CORS_HEADERS,
+        'body': json.dumps(result or {'tracking_id': tracking_id, 'status': 'pending'})
+    }
+
+@metrics.instrument('lambda_get')
 def handler(event, context):
     """
-    Maneja las peticiones GET para /items y /items/{id}.
+    Maneja las peticiones GET para /items, /items/search, /items/changes, /items/stats,
+    /items/{id} y /items/writes/{tracking_id}, y la consulta múltiple POST /items/lookup.
+    Responde 304 (sin cuerpo) si la ETag de If-None-Match sigue vigente.
     """
-    if db is None:
+    try:
+        db = DatabaseFactory.get_instance()
+    except Exception as e:
+        print(f"ERROR: No se pudo inicializar la conexión a la BD: {e}")
         return {
             'statusCode': 503,
             'headers': CORS_HEADERS,
@@ -30,19 +181,37 @@ def handler(event, context):
         }
 
     try:
+        # --- Ruta: POST /items/lookup ---
+        if event.get('resource') == '/items/lookup':
+            return lookup(db, event)
+
+        # --- Ruta: GET /items/changes ---
+        elif event.get('resource') == '/items/changes':
+            return changes(db, event)
+
+        # --- Ruta: GET /items/stats ---
+        elif event.get('resource') == '/items/stats':
+            return stats(db, event)
+
+        # --- Ruta: GET /items/writes/{tracking_id} ---
+        elif event.get('resource') == '/items/writes/{tracking_id}':
+            return write_status(db, (event.get('pathParameters') or {}).get('tracking_id'))
+
         # --- Ruta: GET /items/{id} ---
-        if event.get('pathParameters') and event['pathParameters'].get('id'):
+        elif event.get('pathParameters') and event['pathParameters'].get('id'):
             item_id = event['pathParameters']['id']
             print(f"Buscando item con ID: {item_id}")
             
-            item = db.get_item(item_id)
+            known = etags.etag_versions(etags.get_header(event, 'If-None-Match'))
+            item, version = db.get_item_with_version(item_id, known)
             
             if item:
-                return {
-                    'statusCode': 200,
-                    'headers': CORS_HEADERS,
-                    'body': item.model_dump_json()
-                }
+                with metrics.phase('serialize'):
+                    body = serialization.item(item)
+                return with_etag(version, 200, body)
+            elif version is not None:
+                # El cliente ya tiene esta versión: no se construye ni serializa el item
+                return with_etag(version, 304)
             else:
                 return {
                     'statusCode': 404,
@@ -50,18 +219,43 @@ def handler(event, context):
                     'body': json.dumps({'error': 'Item no encontrado'})
                 }
         
+        # --- Ruta: GET /items/search ---
+        elif event.get('resource') == '/items/search':
+            return search(db, event)
+
         # --- Ruta: GET /items ---
         else:
-            print("Buscando todos los items...")
-            items = db.get_all_items()
+            # Paginación por clave: ?limit=&after=<cursor>&puesto_trabajo=&nombre=<prefijo>
+            params = event.get('queryStringParameters') or {}
+            try:
+                limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+                if limit < 1:
+                    raise ValueError(limit)
+            except ValueError:
+                return {
+                    'statusCode': 400,
+                    'headers': CORS_HEADERS,
+                    'body': json.dumps({'error': "El parámetro 'limit' debe ser un entero positivo."})
+                }
+
+            # El contador se lee antes que los datos: si cambia entre medias, la ETag
+            # será anterior a los datos y el cliente simplemente los volverá a descargar
+            version = db.get_items_version()
+            if version in etags.etag_versions(etags.get_header(event, 'If-None-Match')):
+                return with_etag(version, 304)
+
+            print(f"Buscando items (limit={limit}, after={params.get('after')})...")
+            items, next_cursor = db.get_items_page(
+                limit=limit,
+                after=params.get('after'),
+                puesto_trabajo=params.get('puesto_trabajo'),
+                nombre_prefix=params.get('nombre'),
+            )
             
-            body = json.dumps([item.model_dump() for item in items])
+            with metrics.phase('serialize'):
+                body = serialization.page(items, next_cursor)
             
-            return {
-                'statusCode': 200,
-                'headers': CORS_HEADERS,
-                'body': body
-            }
+            return with_etag(version, 200, body)
 
     except OperationalError as e:
         print(f"ERROR de conexión a BD: {e}")
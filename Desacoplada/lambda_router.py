@@ -0,0 +1,65 @@
+import importlib
+import json
+from db.factory import DatabaseFactory
+import idempotency
+
+# --- Inicialización ---
+# Una sola función para todo el CRUD: los cuatro handlers comparten la instancia de
+# DatabaseFactory (una conexión y una caché por contenedor) en lugar de una por función.
+DatabaseFactory.preload()
+# Los handlers de escritura se importan en su primera petición: el almacén de Idempotency-Key
+# se crea aquí para que un IDEMPOTENCY_BACKEND erróneo haga fallar la inicialización.
+idempotency.get_store(DatabaseFactory.get_instance)
+
+# --- Headers de CORS ---
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token, If-Match, If-None-Match, Idempotency-Key',
+    'Access-Control-Expose-Headers': 'ETag, Idempotent-Replayed'
+}
+
+# --- Rutas (método, recurso de API Gateway) -> módulo del handler ---
+# Los módulos se importan en la primera petición que los usa, así un contenedor que solo
+# atiende GET/DELETE no carga pydantic (ver lambda_create y lambda_update).
+ROUTES = {
+    ('GET', '/items'): 'lambda_get',
+    ('GET', '/items/{id}'): 'lambda_get',
+    ('GET', '/items/search'): 'lambda_get',
+    ('GET', '/items/changes'): 'lambda_get',
+    ('GET', '/items/stats'): 'lambda_get',
+    ('GET', '/items/writes/{tracking_id}'): 'lambda_get',
+    ('POST', '/items'): 'lambda_create',
+    ('POST', '/items/bulk'): 'lambda_create',
+    ('POST', '/items/lookup'): 'lambda_get',
+    ('PUT', '/items/{id}'): 'lambda_update',
+    ('DELETE', '/items/{id}'): 'lambda_delete',
+}
+
+def handler(event, context):
+    """
+    Punto de entrada único: despacha la petición según httpMethod/resource al handler
+    de lambda_get, lambda_create, lambda_update o lambda_delete.
+    """
+    method = (event.get('httpMethod') or '').upper()
+    resource = event.get('resource') or ''
+
+    if method == 'OPTIONS':
+        return {'statusCode': 200, 'headers': CORS_HEADERS, 'body': ''}
+
+    module_name = ROUTES.get((method, resource))
+    if module_name is None:
+        allowed = sorted(m for m, r in ROUTES if r == resource)
+        if allowed:
+            return {
+                'statusCode': 405, # Method Not Allowed
+                'headers': {**CORS_HEADERS, 'Allow': ', '.join(allowed + ['OPTIONS'])},
+                'body': json.dumps({'error': f'Método {method} no permitido en {resource}.'})
+            }
+        return {
+            'statusCode': 404,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f'Ruta no encontrada: {method} {resource}'})
+        }
+
+    return importlib.import_module(module_name).handler(event, context)
@@ -3,31 +3,62 @@ import os
 from pydantic import ValidationError
 from models.item import Item
 from db.factory import DatabaseFactory
+import metrics
+import serialization
+import etags
+import idempotency
+import write_queue
+from db.db import VersionMismatchError
 from psycopg2 import OperationalError, IntegrityError
 from json import JSONDecodeError # Importar para manejo de JSON
 
 # --- Inicialización ---
-try:
-    db = DatabaseFactory.create()
-    db.initialize()
-except Exception as e:
-    print(f"ERROR: No se pudo inicializar la conexión a la BD: {e}")
-    db = None
+# La conexión y la verificación del esquema se aplazan a la primera invocación
+# (DB_INIT_MODE=lazy, por defecto); con DB_INIT_MODE=eager se hacen al importar.
+DatabaseFactory.preload()
+# El almacén de Idempotency-Key (IDEMPOTENCY_BACKEND) se crea al importar, sin conectar: una
+# configuración errónea hace fallar la inicialización en lugar de cada invocación.
+idempotency.get_store(DatabaseFactory.get_instance)
 
 # --- Headers de CORS ---
 # Definir los headers fuera del handler para reutilizarlos
 CORS_HEADERS = {
     'Access-Control-Allow-Origin': '*', # Permite cualquier origen
     'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token'
+    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token, If-Match, If-None-Match, Idempotency-Key',
+    'Access-Control-Expose-Headers': 'ETag, Idempotent-Replayed'
 }
 
-
+@metrics.instrument('lambda_update')
 def handler(event, context):
+    """
+    Punto de entrada de la Lambda. Con la cabecera Idempotency-Key (IDEMPOTENCY_BACKEND, ver
+    idempotency.py) la actualización se aplica una sola vez por clave y los reintentos reciben
+    la respuesta guardada.
+    """
+    return idempotency.lambda_response(event, lambda: update(event), CORS_HEADERS, DatabaseFactory.get_instance)
+
+def update(event):
     """
     Maneja la petición PUT para actualizar un item existente.
+    Con If-Match solo actualiza si la versión (ETag) sigue siendo la misma (412 si no).
+    Con una cola de escrituras (WRITE_QUEUE_BACKEND) y sin If-Match se encola y responde 202.
     """
-    if db is None:
+    try:
+        version = etags.expected_version(etags.get_header(event, 'If-Match'))
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': str(e)})
+        }
+
+    queue = write_queue.get_queue()
+    try:
+        # Con cola, solo las actualizaciones con If-Match (síncronas) necesitan la BD.
+        db = DatabaseFactory.get_instance() if queue is None else None
+    except Exception as e:
+        print(f"ERROR: No se pudo inicializar la conexión a la BD: {e}")
         return {
             'statusCode': 503,
             'headers': CORS_HEADERS,
@@ -55,17 +86,30 @@ def handler(event, context):
         data['id'] = item_id
         
         # 4. Validar los datos con Pydantic
-        item = Item(**data)
+        with metrics.phase('model'):
+            item = Item(**data)
 
-        # 5. Llamar a la base de datos para actualizar
-        updated_item = db.update_item(item_id, item)
+        # 5. Encolar la actualización o llamar a la base de datos. Con If-Match la comprobación
+        # de versión necesita la fila actual: siempre síncrona.
+        if queue is not None and version is None:
+            tracking_id = write_queue.enqueue_write(queue, 'update', item)
+            return {
+                'statusCode': 202, # Accepted: se aplicará por lotes (ver lambda_write_consumer.py)
+                'headers': {**CORS_HEADERS, 'Location': f"/items/writes/{tracking_id}"},
+                'body': json.dumps({'tracking_id': tracking_id, 'id': item.id, 'status': 'queued'})
+            }
+        updated_item = (db or DatabaseFactory.get_instance()).update_item(
+            item_id, item, expected_version=etags.write_version(version))
+        etags.check_exists(version, updated_item, item_id)
 
         # 6. Devolver la respuesta
         if updated_item:
+            with metrics.phase('serialize'):
+                body = serialization.item(updated_item)
             return {
                 'statusCode': 200,
                 'headers': CORS_HEADERS,
-                'body': updated_item.model_dump_json()
+                'body': body
             }
         else:
             return {
@@ -74,6 +118,13 @@ def handler(event, context):
                 'body': json.dumps({'error': 'Item no encontrado'})
             }
 
+    except ValidationError as e:
+        # Antes que ValueError: ValidationError de pydantic hereda de ella
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': 'Validation error', 'details': e.errors(include_url=False, include_context=False)})
+        }
     except (JSONDecodeError, TypeError, ValueError) as e:
         # Error si el body es nulo, no es JSON válido, o está vacío
         return {
@@ -81,11 +132,11 @@ def handler(event, context):
             'headers': CORS_HEADERS,
             'body': json.dumps({'error': 'Cuerpo (body) de la petición inválido', 'details': str(e)})
         }
-    except ValidationError as e:
+    except VersionMismatchError as e:
         return {
-            'statusCode': 400,
+            'statusCode': 412, # Precondition Failed (If-Match)
             'headers': CORS_HEADERS,
-            'body': json.dumps({'error': 'Validation error', 'details': e.errors()})
+            'body': json.dumps({'error': 'Precondition failed (If-Match)', 'details': str(e)})
         }
     except IntegrityError as e:
         return {
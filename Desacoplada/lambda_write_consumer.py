@@ -0,0 +1,62 @@
+"""
+Consumidor de la cola de escrituras diferidas (ver write_queue.py): lo invoca SQS (event source
+mapping) con lotes de mensajes encolados por lambda_create y lambda_update, y aplica cada lote
+en la BD con una sola transacción (Database.apply_write_batch).
+
+Con ReportBatchItemFailures, los mensajes que no se han podido aplicar se devuelven en
+'batchItemFailures' y SQS los reintenta; el resto se borran de la cola.
+
+En local, con WRITE_QUEUE_BACKEND=file, vacía el directorio de la cola:
+    PYTHONPATH=../core WRITE_QUEUE_BACKEND=file DB_HOST=... python lambda_write_consumer.py
+"""
+import json
+from db.factory import DatabaseFactory
+import metrics
+import write_queue
+
+# --- Inicialización ---
+# La conexión y la verificación del esquema se aplazan a la primera invocación
+# (DB_INIT_MODE=lazy, por defecto); con DB_INIT_MODE=eager se hacen al importar.
+DatabaseFactory.preload()
+
+@metrics.instrument('lambda_write_consumer')
+def handler(event, context):
+    """
+    Aplica los mensajes de un evento de SQS. Devuelve los que deben reintentarse.
+    """
+    records = event.get('Records') or []
+    writes, message_ids, failures = [], [], []
+    for record in records:
+        try:
+            writes.extend(write_queue.decode_writes([record['body']]))
+            message_ids.append(record['messageId'])
+        except (KeyError, TypeError, ValueError) as e:
+            # Un mensaje malformado no bloquea el lote: se reintenta solo y acaba en la DLQ.
+            print(f"ERROR: Mensaje {record.get('messageId')} inválido: {e}")
+            failures.append(record.get('messageId'))
+
+    if writes:
+        try:
+            db = DatabaseFactory.get_instance()
+            results = db.apply_write_batch(writes)
+        except Exception as e:
+            # Nada se ha aplicado (una sola transacción): SQS reintentará el lote entero.
+            print(f"ERROR: No se pudo aplicar el lote de {len(writes)} escrituras: {e}")
+            failures.extend(message_ids)
+        else:
+            summary = {}
+            for result in results:
+                summary[result['status']] = summary.get(result['status'], 0) + 1
+            print(f"Lote de {len(writes)} escrituras aplicado: {json.dumps(summary)}")
+
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures]}
+
+
+if __name__ == '__main__':
+    queue = write_queue.get_queue()
+    if queue is None:
+        raise SystemExit("Indica la cola con WRITE_QUEUE_BACKEND (file o sqs).")
+    consumer = write_queue.WriteBehindConsumer.from_env(queue, DatabaseFactory.get_instance())
+    while consumer.drain_once():
+        pass
+    print(f"Cola vaciada: {json.dumps(consumer.stats())}")
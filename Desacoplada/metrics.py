@@ -0,0 +1,95 @@
+"""
+Instrumentación ligera por invocación: tiempo de cada fase (obtención de la conexión, SQL,
+construcción de modelos y serialización) de cada endpoint, publicado como una línea de log en
+formato EMF (CloudWatch Embedded Metric Format). CloudWatch extrae de esas líneas las métricas
+(namespace METRICS_NAMESPACE, dimensiones Function y Endpoint) y calcula sus percentiles, sin
+llamadas a la API de CloudWatch dentro de la Lambda.
+
+Se activa con METRICS_ENABLED=true. Desactivada (por defecto), instrument() devuelve el handler
+sin envolver y phase() siempre el mismo contexto vacío, así que no se mide nada.
+"""
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes', 'on')
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'Desacoplada')
+
+PHASES = ('checkout', 'sql', 'model', 'serialize')
+
+_current = ContextVar('metrics_invocation', default=None)
+
+
+def emf_record(function_name: str, endpoint: str, phases: dict, status_code) -> dict:
+    """Construye el documento EMF de una invocación (una métrica por fase medida más 'total')."""
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [['Function', 'Endpoint']],
+                'Metrics': [{'Name': name, 'Unit': 'Milliseconds'} for name in phases],
+            }],
+        },
+        'Function': function_name,
+        'Endpoint': endpoint,
+        'StatusCode': status_code,
+    }
+    record.update({name: round(value, 3) for name, value in phases.items()})
+    return record
+
+
+def instrument(function_name: str):
+    """
+    Decorador para el handler de una Lambda: mide la invocación y escribe su línea EMF.
+    Con las métricas desactivadas devuelve el handler original (sin coste alguno).
+    """
+    def decorator(handler):
+        if not ENABLED:
+            return handler
+
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            phases = {}
+            token = _current.set(phases)
+            started = time.perf_counter()
+            response = None
+            try:
+                response = handler(event, context)
+                return response
+            finally:
+                phases['total'] = (time.perf_counter() - started) * 1000
+                _current.reset(token)
+                endpoint = f"{event.get('httpMethod')} {event.get('resource')}"
+                status_code = response.get('statusCode') if isinstance(response, dict) else None
+                print(json.dumps(emf_record(function_name, endpoint, phases, status_code)))
+
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def _timed_phase(name: str):
+    phases = _current.get()
+    if phases is None:  # Fuera de una invocación (p. ej. initialize()): no se mide
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+
+_NO_PHASE = nullcontext()
+
+
+def _no_phase(name: str):
+    return _NO_PHASE
+
+
+# Con las métricas desactivadas, phase() no mide nada: devuelve siempre el mismo contexto vacío.
+phase = _timed_phase if ENABLED else _no_phase
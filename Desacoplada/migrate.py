@@ -0,0 +1,17 @@
+"""
+Aplica el esquema de la base de datos fuera de banda (p. ej. desde CI o tras desplegar
+db_postgres.yaml), para que las Lambdas puedan arrancar con DB_SCHEMA_MODE=skip.
+
+Uso (con las mismas variables de entorno que las Lambdas y el núcleo común en el PYTHONPATH):
+    PYTHONPATH=../core DB_HOST=... DB_NAME=... DB_USER=... DB_PASS=... python migrate.py
+"""
+from db.pool import ConnectionPool
+from db.postgres_db import PostgresDatabase, SCHEMA_VERSION, connect_from_env
+
+if __name__ == '__main__':
+    db = PostgresDatabase(pool=ConnectionPool(connect_from_env, min_size=0, max_size=1))
+    try:
+        db.initialize_schema(force=True)
+    finally:
+        db.close()
+    print(f"Esquema aplicado (versión {SCHEMA_VERSION}).")
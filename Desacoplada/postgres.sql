@@ -3,12 +3,64 @@ CREATE TABLE items (
     nombre VARCHAR(100) NOT NULL,
     apellidos VARCHAR(150) NOT NULL,
     numero_telefono VARCHAR(20),
-    puesto_trabajo VARCHAR(50) NOT NULL CHECK (puesto_trabajo IN ('desarrollador', 'administrativo', 'notario', 'comercial'))
+    puesto_trabajo VARCHAR(50) NOT NULL CHECK (puesto_trabajo IN ('desarrollador', 'administrativo', 'notario', 'comercial')),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Búsqueda por nombre y apellidos (GET /items/search): tsvector en minúsculas y sin acentos,
+-- con el nombre con peso A y los apellidos con peso B para el ranking.
+CREATE OR REPLACE FUNCTION items_search_normalize(value TEXT) RETURNS TEXT AS $$
+    SELECT translate(lower(value), 'áàâäéèêëíìîïóòôöúùûüñç', 'aaaaeeeeiiiioooouuuunc')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE INDEX items_search_idx ON items USING GIN ((
+    setweight(to_tsvector('simple', items_search_normalize(nombre)), 'A') ||
+    setweight(to_tsvector('simple', items_search_normalize(apellidos)), 'B')
+));
+
+-- Filtro por puesto de trabajo del listado y de la búsqueda.
+CREATE INDEX items_puesto_trabajo_idx ON items (puesto_trabajo, id);
+
+-- Resultado de las escrituras diferidas (GET /items/writes/<tracking_id>).
+CREATE TABLE items_write_results (
+    tracking_id UUID PRIMARY KEY,
+    op VARCHAR(10) NOT NULL,
+    item_id VARCHAR(15) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    details TEXT,
+    processed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX items_write_results_processed_idx ON items_write_results (processed_at);
+
+-- Respuestas guardadas de las peticiones con cabecera Idempotency-Key (IDEMPOTENCY_BACKEND=postgres).
+-- 'response' es NULL mientras se procesa la primera petición con la clave.
+CREATE TABLE items_idempotency_keys (
+    idempotency_key VARCHAR(255) PRIMARY KEY,
+    fingerprint CHAR(64) NOT NULL,
+    response TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX items_idempotency_keys_created_idx ON items_idempotency_keys (created_at);
+
+-- DNIs borrados, para el feed de cambios (GET /items/changes). Las versiones y los triggers
+-- que la mantienen los crea la aplicación al arrancar (SCHEMA_SQL de core/db/postgres_db.py).
+CREATE TABLE items_tombstones (
+    id VARCHAR(15) PRIMARY KEY,
+    version BIGINT NOT NULL,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX items_tombstones_version_idx ON items_tombstones (version);
+
+-- Número de personas por puesto (GET /items/stats). Los triggers que la mantienen y el recuento
+-- inicial los crea también la aplicación al arrancar.
+CREATE TABLE items_stats (
+    puesto_trabajo VARCHAR(50) PRIMARY KEY,
+    total BIGINT NOT NULL DEFAULT 0
 );
 
 -- Insertar datos Iniciales
 INSERT INTO items (id, nombre, apellidos, numero_telefono, puesto_trabajo) VALUES 
-('12345678A', 'Ana', 'García Pérez', '600112233', 'desarrollador'),
-('98765432B', 'Carlos', 'López Martín', '611223344', 'administrativo'),
-('45678901C', 'Elena', 'Ruiz Gómez', '622334455', 'notario'),
-('01234567D', 'Javier', 'Sánchez Torres', '633445566', 'comercial');
\ No newline at end of file
+('12345678Z', 'Ana', 'García Pérez', '600112233', 'desarrollador'),
+('98765432M', 'Carlos', 'López Martín', '611223344', 'administrativo'),
+('45678901G', 'Elena', 'Ruiz Gómez', '622334455', 'notario'),
+('01234567L', 'Javier', 'Sánchez Torres', '633445566', 'comercial');
\ No newline at end of file
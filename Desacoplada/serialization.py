@@ -0,0 +1,46 @@
+"""
+Serialización del cuerpo de las respuestas con items.
+
+Los items se codifican con el codificador común de core/encoders.py ('pydantic' por defecto u
+'orjson', según JSON_BACKEND), el mismo que usa Acoplada, y se devuelven como texto en el
+'body' de la respuesta de la integración proxy.
+
+La compresión (gzip/deflate según Accept-Encoding) la hace API Gateway con el parámetro
+ApiMinimumCompressionSize de main.yaml: con la integración proxy, una Lambda que devolviera
+el cuerpo comprimido obligaría a tratar como binarias (base64) también las peticiones.
+
+El codificador se crea en el primer uso, para no cargar pydantic en el arranque en frío.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from encoders import get_encoder
+
+if TYPE_CHECKING:
+    from models.item import Item
+
+
+def item(item: Item) -> str:
+    """Cuerpo de GET/POST/PUT con un solo item."""
+    return get_encoder().item(item).decode()
+
+
+def page(items: list[Item], next_cursor: str | None) -> str:
+    """Cuerpo de GET /items."""
+    return get_encoder().page(items, next_cursor).decode()
+
+
+def search_page(items: list[Item], next_offset: int | None) -> str:
+    """Cuerpo de GET /items/search."""
+    return get_encoder().search_page(items, next_offset).decode()
+
+
+def lookup(items: list[Item], missing: list[str]) -> str:
+    """Cuerpo de POST /items/lookup."""
+    return get_encoder().lookup(items, missing).decode()
+
+
+def changes(changes: list[dict], next_since: int, has_more: bool) -> str:
+    """Cuerpo de GET /items/changes."""
+    return get_encoder().changes(changes, next_since, has_more).decode()
@@ -0,0 +1,97 @@
+"""
+Coste de validar una carga masiva (POST /items/bulk) de '--rows' items, comparando:
+- antes:   un Item(**fila) por fila desde Python, capturando el ValidationError de cada una;
+- después: validate_items() de models/item.py, que valida la lista entera con un solo
+           TypeAdapter(List[Item]) y deja los errores de cada fila en su posición.
+
+Una fracción '--invalid' de las filas lleva un DNI con la letra de control errónea, un
+teléfono con letras o un puesto que no existe, para medir también el coste de los errores.
+No usa la BD.
+Ejemplo:
+    python benchmarks/batch_validation.py --rows 100000 --invalid 0.01 --repeat 5
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from workloads import dni, person
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# Núcleo común (paquetes db y models) que usan ambas arquitecturas
+CORE_PATH = os.path.join(ROOT, 'core')
+
+INVALID_FIELDS = (
+    ('id', lambda row: row['id'][:8] + ('A' if row['id'][8] != 'A' else 'B')),
+    ('numero_telefono', lambda row: '600-ABC-123'),
+    ('puesto_trabajo', lambda row: 'astronauta'),
+)
+
+
+def payload(rows: int, invalid: float, rng: random.Random) -> list:
+    """Lista de items como la recibiría el endpoint (dicts ya decodificados del JSON)."""
+    data = []
+    for n in range(rows):
+        row = person(dni(70000000 + n), rng)
+        if rng.random() < invalid:
+            field, broken = rng.choice(INVALID_FIELDS)
+            row[field] = broken(row)
+        data.append(row)
+    return data
+
+
+def per_row(Item, ValidationError, data: list) -> tuple:
+    """Validación anterior de los endpoints: (items válidos, número de filas inválidas)."""
+    valid, invalid = [], 0
+    for raw in data:
+        try:
+            valid.append(Item(**raw))
+        except ValidationError as e:
+            e.errors(include_url=False, include_context=False)
+            invalid += 1
+    return valid, invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='items de la carga masiva')
+    parser.add_argument('--invalid', type=float, default=0.01, help='fracción de filas inválidas (0 a 1)')
+    parser.add_argument('--repeat', type=int, default=5, help='pasadas por variante (se toma la mediana)')
+    parser.add_argument('--json', dest='json_path', help='guarda el resultado en este fichero')
+    args = parser.parse_args()
+
+    sys.path.insert(0, CORE_PATH)
+    from pydantic import ValidationError
+    from models.item import Item, validate_items
+
+    data = payload(args.rows, args.invalid, random.Random(42))
+    variants = {
+        'antes (Item(**fila) por fila)': lambda: per_row(Item, ValidationError, data),
+        'después (validate_items)': lambda: tuple(map(len, validate_items(data))),
+    }
+
+    result = {'rows': args.rows, 'invalid': args.invalid, 'repeat': args.repeat, 'variants': {}}
+    print(f"{'variante':<34}{'total ms':>10}{'µs/fila':>10}{'válidas':>10}{'inválidas':>11}")
+    for name, run in variants.items():
+        outcome = run()  # Calentamiento (y recuento de válidas/inválidas)
+        valid, invalid = (len(outcome[0]), outcome[1]) if isinstance(outcome[0], list) else outcome
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        total = statistics.median(timings)
+        result['variants'][name] = {'total_ms': round(total * 1e3, 2), 'per_row_us': round(total / args.rows * 1e6, 3),
+                                    'valid': valid, 'invalid': invalid}
+        print(f"{name:<34}{total * 1e3:>10.1f}{total / args.rows * 1e6:>10.2f}{valid:>10}{invalid:>11}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
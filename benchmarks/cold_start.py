@@ -0,0 +1,122 @@
+"""
+Mide el arranque en frío de los handlers de Desacoplada en local.
+
+Cada medición se hace en un proceso Python nuevo (como un contenedor Lambda recién creado):
+- import_ms: importar el módulo del handler (fase INIT de Lambda).
+- first_ms: primera invocación (incluye la conexión y la verificación del esquema en modo lazy).
+- warm_ms: segunda invocación, ya con la conexión abierta.
+- pydantic: si pydantic está cargado tras el import y tras la primera invocación.
+
+Requiere las variables de entorno de la BD (DB_TYPE, DB_HOST, DB_NAME, DB_USER, DB_PASS).
+Ejemplo:
+    python benchmarks/cold_start.py --runs 10 --modes lazy eager --json resultados.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DESACOPLADA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Desacoplada')
+# Núcleo común (paquetes db y models): en la imagen de la Lambda se copia junto a los handlers
+CORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'core')
+
+HANDLERS = ('lambda_get', 'lambda_create', 'lambda_update', 'lambda_delete')
+
+# ID (DNI válido) de un item que solo usa el benchmark (se borra al terminar cada medición)
+BENCH_ID = '00000000T'
+
+# Evento representativo por handler: todos llegan a la base de datos
+EVENTS = {
+    'lambda_get': {'httpMethod': 'GET', 'resource': '/items/{id}', 'pathParameters': {'id': BENCH_ID}},
+    'lambda_create': {'httpMethod': 'POST', 'resource': '/items', 'body': json.dumps({
+        'id': BENCH_ID, 'nombre': 'Cold', 'apellidos': 'Start', 'puesto_trabajo': 'desarrollador',
+        'numero_telefono': '600000000'})},
+    'lambda_update': {'httpMethod': 'PUT', 'resource': '/items/{id}', 'pathParameters': {'id': BENCH_ID},
+                      'body': json.dumps({'nombre': 'Cold', 'apellidos': 'Start',
+                                          'puesto_trabajo': 'desarrollador'})},
+    'lambda_delete': {'httpMethod': 'DELETE', 'resource': '/items/{id}', 'pathParameters': {'id': BENCH_ID}},
+}
+
+# Código que se ejecuta en el proceso hijo; imprime el resultado como JSON en la última línea
+CHILD = """
+import json, sys, time
+event = json.loads(sys.argv[2])
+start = time.perf_counter()
+module = __import__(sys.argv[1])
+imported = time.perf_counter()
+pydantic_after_import = 'pydantic' in sys.modules
+first = module.handler(event, None)
+invoked = time.perf_counter()
+pydantic_after_first = 'pydantic' in sys.modules
+module.handler(event, None)
+warm = time.perf_counter()
+from db.factory import DatabaseFactory
+DatabaseFactory.get_instance().delete_item(%r)
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_ms': (invoked - imported) * 1000,
+    'warm_ms': (warm - invoked) * 1000,
+    'status': first['statusCode'],
+    'pydantic_after_import': pydantic_after_import,
+    'pydantic_after_first': pydantic_after_first,
+    'modules': len(sys.modules),
+}))
+""" % BENCH_ID
+
+
+def measure(handler: str, mode: str, schema_mode: str) -> dict:
+    """Lanza un proceso nuevo que importa e invoca el handler y devuelve sus tiempos."""
+    env = {**os.environ, 'DB_INIT_MODE': mode, 'DB_SCHEMA_MODE': schema_mode,
+           'PYTHONPATH': os.pathsep.join(filter(None, [CORE_DIR, os.environ.get('PYTHONPATH')]))}
+    proc = subprocess.run(
+        [sys.executable, '-c', CHILD, handler, json.dumps(EVENTS[handler])],
+        cwd=DESACOPLADA_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{handler} ({mode}) falló:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: list) -> dict:
+    """Mediana de los tiempos de varias ejecuciones (más estable que la media)."""
+    summary = {key: statistics.median(s[key] for s in samples)
+               for key in ('import_ms', 'first_ms', 'warm_ms')}
+    summary['cold_total_ms'] = summary['import_ms'] + summary['first_ms']
+    for key in ('status', 'pydantic_after_import', 'pydantic_after_first', 'modules'):
+        summary[key] = samples[-1][key]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='procesos nuevos por handler y modo')
+    parser.add_argument('--modes', nargs='+', default=['lazy', 'eager'], choices=['lazy', 'eager'],
+                        help='valores de DB_INIT_MODE a comparar')
+    parser.add_argument('--schema-mode', default='auto', choices=['auto', 'skip'],
+                        help='valor de DB_SCHEMA_MODE')
+    parser.add_argument('--handlers', nargs='+', default=list(HANDLERS), choices=HANDLERS)
+    parser.add_argument('--json', dest='json_path', help='guarda los resultados en este fichero')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'handler':<15}{'modo':<7}{'import':>9}{'1ª inv.':>9}{'total':>9}{'caliente':>10}"
+          f"{'status':>8}  pydantic (import/1ª)")
+    for handler in args.handlers:
+        for mode in args.modes:
+            summary = summarize([measure(handler, mode, args.schema_mode) for _ in range(args.runs)])
+            results.append({'handler': handler, 'mode': mode, 'schema_mode': args.schema_mode,
+                            'runs': args.runs, **summary})
+            print(f"{handler:<15}{mode:<7}{summary['import_ms']:>7.1f}ms{summary['first_ms']:>7.1f}ms"
+                  f"{summary['cold_total_ms']:>7.1f}ms{summary['warm_ms']:>8.1f}ms{summary['status']:>8}  "
+                  f"{summary['pydantic_after_import']}/{summary['pydantic_after_first']}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Resultados guardados en {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
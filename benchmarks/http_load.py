@@ -0,0 +1,108 @@
+"""
+Generador de carga HTTP sencillo para comparar modos de servidor de la aplicación Acoplada
+(servidor de desarrollo de Flask, gunicorn, uvicorn...) con la misma base de datos.
+
+Cada hilo mantiene su propia conexión keep-alive y lanza peticiones GET en bucle durante
+'--duration' segundos; al final se muestran peticiones por segundo y latencias p50/p95/p99.
+Ejemplo:
+    python benchmarks/http_load.py --url http://localhost:8080 --concurrency 16 --duration 20 \\
+        --path /items/12345678Z --path "/items?limit=50"
+"""
+import argparse
+import http.client
+import json
+import math
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(values: list, pct: float) -> float:
+    """Percentil por el método del rango más cercano (values ya ordenados)."""
+    if not values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+def worker(host: str, port: int, paths: list, deadline: float, latencies: list, errors: list, offset: int):
+    """Lanza peticiones por una conexión keep-alive hasta 'deadline', reconectando si se cierra."""
+    conn = None
+    turn = offset
+    while time.perf_counter() < deadline:
+        path = paths[turn % len(paths)]
+        turn += 1
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+            else:
+                latencies.append(time.perf_counter() - start)
+            if response.getheader('Connection', '').lower() == 'close':
+                conn.close()
+                conn = None
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            if conn is not None:
+                conn.close()
+            conn = None
+    if conn is not None:
+        conn.close()
+
+
+def run(url: str, paths: list, concurrency: int, duration: float) -> dict:
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    deadline = time.perf_counter() + duration
+    per_thread = [([], []) for _ in range(concurrency)]
+    threads = [
+        threading.Thread(target=worker, args=(host, port, paths, deadline, lat, err, index))
+        for index, (lat, err) in enumerate(per_thread)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(value for lat, _ in per_thread for value in lat)
+    errors = [value for _, err in per_thread for value in err]
+    return {
+        'url': url,
+        'paths': paths,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8080', help='URL base del servidor')
+    parser.add_argument('--path', action='append', dest='paths',
+                        help='ruta a pedir (se puede repetir; se reparten en turno rotatorio)')
+    parser.add_argument('--concurrency', type=int, default=16, help='hilos (conexiones) simultáneos')
+    parser.add_argument('--duration', type=float, default=20, help='segundos de carga')
+    parser.add_argument('--json', dest='json_path', help='guarda el resultado en este fichero')
+    args = parser.parse_args()
+
+    result = run(args.url, args.paths or ['/items?limit=50'], args.concurrency, args.duration)
+    print(json.dumps(result, indent=2))
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Prueba de paridad entre arquitecturas: ejecuta exactamente la misma secuencia de operaciones
+CRUD (altas, duplicados, datos inválidos, lecturas, listados, búsqueda, carga masiva,
+consulta múltiple, estadísticas, actualizaciones y borrados) sobre la aplicación Flask de Acoplada y sobre los handlers Lambda
+de Desacoplada (ver targets.py) y compara, paso a paso, el código de estado y, en las
+respuestas correctas, el cuerpo JSON. Sale con código 1 si alguna respuesta difiere.
+
+Cada target se ejecuta en un proceso propio contra la misma base de datos, uno detrás de otro.
+Después comprueba que una entrega repetida de un lote de escrituras diferidas (at-least-once de
+SQS o de la cola 'file') no vuelve a aplicar escrituras que ya tienen resultado guardado.
+Usa DNIs reservados (9xxxxxxx + letra de control) que se borran al empezar y al terminar.
+La conexión se configura como en suite.py. Ejemplo:
+    python benchmarks/parity.py --json paridad.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import uuid
+
+from targets import TARGETS
+import workloads
+from workloads import Request
+
+PARITY_ID_PATTERN = '^9[0-9]{7}[A-Z]$'
+
+
+def dni(n: int) -> str:
+    """DNI reservado para la prueba, con su letra de control."""
+    return workloads.dni(90000000 + n)
+
+
+def person(n: int, nombre: str = 'Paridad', apellidos: str = 'García Núñez',
+           puesto_trabajo: str = 'desarrollador', numero_telefono=None) -> dict:
+    return {'id': dni(n), 'nombre': nombre, 'apellidos': apellidos,
+            'puesto_trabajo': puesto_trabajo, 'numero_telefono': numero_telefono}
+
+
+def scenario() -> list:
+    """Pasos (nombre, petición) de la prueba, en orden; cada paso puede depender de los anteriores."""
+    a, missing = dni(1), dni(99)
+    return [
+        ('alta', Request('POST', '/items', body=person(1, numero_telefono='600 11-22-33'))),
+        ('alta duplicada', Request('POST', '/items', body=person(1))),
+        ('alta con DNI inválido', Request('POST', '/items', body={**person(2), 'id': '1234'})),
+        ('alta con letra de control errónea', Request('POST', '/items', body={**person(2), 'id': dni(2)[:8] + 'A'})),
+        ('alta con puesto inválido', Request('POST', '/items', body=person(2, puesto_trabajo='astronauta'))),
+        ('alta sin apellidos', Request('POST', '/items', body={'id': dni(2), 'nombre': 'Paridad',
+                                                                'puesto_trabajo': 'notario'})),
+        ('lectura', Request('GET', '/items/{id}', path_params={'id': a})),
+        ('lectura inexistente', Request('GET', '/items/{id}', path_params={'id': missing})),
+        ('actualización', Request('PUT', '/items/{id}', path_params={'id': a},
+                                  body={'nombre': 'Paridad', 'apellidos': 'García Núñez',
+                                        'puesto_trabajo': 'notario', 'numero_telefono': '+34 611 223 344'})),
+        ('actualización inexistente', Request('PUT', '/items/{id}', path_params={'id': missing},
+                                              body=person(99))),
+        ('actualización inválida', Request('PUT', '/items/{id}', path_params={'id': a},
+                                           body={'nombre': '', 'apellidos': 'X', 'puesto_trabajo': 'notario'})),
+        ('carga masiva', Request('POST', '/items/bulk', body=[
+            person(2, apellidos='López Martín'), person(3, nombre='Paridades', puesto_trabajo='comercial'),
+            person(1, puesto_trabajo='administrativo'), {**person(4), 'id': 'X'}, person(2),
+        ])),
+        ('carga masiva sin upsert', Request('POST', '/items/bulk', query={'upsert': 'false'},
+                                            body=[person(1), person(5)])),
+        ('consulta múltiple', Request('POST', '/items/lookup',
+                                      body={'ids': [dni(3), f" {dni(2).lower()} ", missing, dni(3)]})),
+        ('consulta múltiple inválida', Request('POST', '/items/lookup', body={'ids': 'X'})),
+        ('estadísticas', Request('GET', '/items/stats')),
+        ('cambios con token inválido', Request('GET', '/items/changes', query={'since': 'ayer'})),
+        ('listado por prefijo', Request('GET', '/items', query={'nombre': 'Paridad', 'limit': '2'})),
+        ('listado, página 2', Request('GET', '/items', query={'nombre': 'Paridad', 'limit': '2',
+                                                               'after': dni(2)})),
+        ('listado por puesto', Request('GET', '/items', query={'nombre': 'Paridad', 'puesto_trabajo': 'comercial'})),
+        ('listado con limit inválido', Request('GET', '/items', query={'limit': 'abc'})),
+        ('búsqueda', Request('GET', '/items/search', query={'q': 'paridad garcia'})),
+        ('búsqueda paginada', Request('GET', '/items/search', query={'q': 'parid', 'limit': '2', 'offset': '2'})),
+        ('búsqueda demasiado corta', Request('GET', '/items/search', query={'q': 'p'})),
+        ('borrado', Request('DELETE', '/items/{id}', path_params={'id': a})),
+        ('borrado repetido', Request('DELETE', '/items/{id}', path_params={'id': a})),
+        ('lectura tras borrado', Request('GET', '/items/{id}', path_params={'id': a})),
+    ]
+
+
+def run_target(name: str) -> list:
+    """Ejecuta el escenario sobre un target (en el proceso actual) y devuelve sus respuestas."""
+    target = TARGETS[name]()
+    target.execute("DELETE FROM items WHERE id ~ %s", (PARITY_ID_PATTERN,))
+    try:
+        responses = []
+        for step, request in scenario():
+            status, body = target.send(request)
+            try:
+                body = json.loads(body) if body else None
+            except ValueError:
+                pass
+            responses.append({'step': step, 'status': status, 'body': body})
+    finally:
+        target.execute("DELETE FROM items WHERE id ~ %s", (PARITY_ID_PATTERN,))
+    return responses
+
+
+def check_redelivery() -> list:
+    """
+    Aplica un lote de escrituras diferidas, lo modifica con escrituras síncronas y lo vuelve a
+    entregar (como tras un timeout de visibilidad). Devuelve (paso, correcto, detalle) de cada
+    comprobación: la entrega repetida no debe cambiar los datos y debe devolver el resultado guardado.
+    """
+    target = TARGETS['acoplada']()
+    import write_queue
+    created, updated = dni(11), dni(12)
+
+    def batch(op, n, nombre):
+        body = json.dumps({'tracking_id': str(uuid.uuid4()), 'op': op, 'item': person(n, nombre=nombre)})
+        return write_queue.decode_writes([body])
+
+    def read(item_id):
+        status, body = target.send(Request('GET', '/items/{id}', path_params={'id': item_id}))
+        return status, (json.loads(body).get('nombre') if status == 200 else None)
+
+    target.execute("DELETE FROM items WHERE id ~ %s", (PARITY_ID_PATTERN,))
+    checks = []
+    try:
+        # Alta diferida, borrado síncrono y entrega repetida: el item sigue borrado.
+        writes = batch('create', 11, 'Cola')
+        first = target.db.apply_write_batch(writes)
+        target.send(Request('DELETE', '/items/{id}', path_params={'id': created}))
+        again = target.db.apply_write_batch(writes)
+        checks.append(('alta repetida tras borrado', read(created)[0] == 404 and again == first,
+                       f"lectura={read(created)[0]} resultados={again}"))
+
+        # Actualización diferida, PUT síncrono y entrega repetida: se conserva el PUT.
+        target.send(Request('POST', '/items', body=person(12)))
+        writes = batch('update', 12, 'Cola')
+        first = target.db.apply_write_batch(writes)
+        target.send(Request('PUT', '/items/{id}', path_params={'id': updated},
+                            body={'nombre': 'Síncrona', 'apellidos': 'García Núñez', 'puesto_trabajo': 'notario'}))
+        again = target.db.apply_write_batch(writes)
+        checks.append(('actualización repetida tras PUT', read(updated)[1] == 'Síncrona' and again == first,
+                       f"nombre={read(updated)[1]} resultados={again}"))
+    finally:
+        target.execute("DELETE FROM items WHERE id ~ %s", (PARITY_ID_PATTERN,))
+    return checks
+
+
+def comparable(response: dict):
+    """
+    Parte de la respuesta que debe coincidir: el código siempre y el cuerpo de las respuestas
+    correctas (los mensajes de error de cada arquitectura tienen textos propios). En la carga
+    masiva se comparan el resumen y el estado de cada fila, sin el detalle de los errores.
+    """
+    body = response['body'] if 200 <= response['status'] < 300 else None
+    if isinstance(body, dict) and 'summary' in body:
+        body = {'summary': body['summary'],
+                'results': [(r['index'], r.get('id'), r['status']) for r in body['results']]}
+    return response['status'], body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--json', dest='json_path', help='guarda las respuestas de ambos targets en este fichero')
+    parser.add_argument('--run-target', help=argparse.SUPPRESS)  # Uso interno: proceso hijo
+    parser.add_argument('--run-redelivery', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_target:
+        json.dump(run_target(args.run_target), sys.stdout)
+        return
+    if args.run_redelivery:
+        json.dump(check_redelivery(), sys.stdout)
+        return
+
+    def child(*argv):
+        # Cada arquitectura en un proceso nuevo (sus módulos 'metrics'/'serialization' tienen el mismo nombre)
+        with tempfile.TemporaryFile(mode='w+') as out:
+            proc = subprocess.run([sys.executable, __file__, *argv], stdout=out)
+            if proc.returncode != 0:
+                sys.exit(f"La prueba {' '.join(argv)} falló (código {proc.returncode}).")
+            out.seek(0)
+            # Los handlers imprimen logs por stdout: el JSON es la última línea
+            return json.loads(out.read().strip().splitlines()[-1])
+
+    transcripts = {name: child('--run-target', name) for name in TARGETS}
+
+    acoplada, desacoplada = transcripts['acoplada'], transcripts['desacoplada']
+    differences = 0
+    for left, right in zip(acoplada, desacoplada):
+        same = comparable(left) == comparable(right)
+        differences += not same
+        line = f"{'OK   ' if same else 'DIFF '} {left['step']:<28} acoplada={left['status']} desacoplada={right['status']}"
+        print(line)
+        if not same:
+            print(f"      acoplada:    {json.dumps(comparable(left)[1], ensure_ascii=False)}")
+            print(f"      desacoplada: {json.dumps(comparable(right)[1], ensure_ascii=False)}")
+
+    redelivery = child('--run-redelivery')
+    for step, ok, detail in redelivery:
+        print(f"{'OK   ' if ok else 'FALLO'} {step:<28} {'' if ok else detail}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(transcripts, f, indent=2, ensure_ascii=False)
+    failed = sum(not ok for _, ok, _ in redelivery)
+    if differences or failed:
+        if differences:
+            print(f"ERROR: {differences} de {len(acoplada)} pasos difieren entre arquitecturas.")
+        if failed:
+            print(f"ERROR: {failed} comprobaciones de entrega repetida fallaron.")
+        sys.exit(1)
+    print(f"Las dos arquitecturas responden igual en los {len(acoplada)} pasos y la entrega repetida no reaplica escrituras.")
+
+
+if __name__ == '__main__':
+    main()
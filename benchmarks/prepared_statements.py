@@ -0,0 +1,144 @@
+"""
+Coste por consulta de las sentencias preparadas del CRUD (postgres_db.STATEMENTS) ejecutadas:
+- sin preparar: el texto SQL completo en cada llamada (PostgreSQL lo analiza y planifica
+  cada vez), como con DB_PREPARED_STATEMENTS=false;
+- preparadas: PREPARE una vez por conexión y EXECUTE en cada llamada.
+
+Se añade 'items_page' (una página de 100 items), que la API no prepara: el resultado de un
+EXECUTE se materializa en el servidor antes de enviarse y con muchas filas sale más caro.
+
+Las sentencias se ejecutan contra tablas temporales 'items' (con '--rows' filas) e
+'items_change_counter' que ocultan a las reales durante la sesión, así que no tocan los datos. Usa la conexión de la arquitectura (DATABASE_URL o DB_HOST, DB_NAME,
+DB_USER, DB_PASS). Ejemplo:
+    python benchmarks/prepared_statements.py --arch desacoplada --rows 100000 --calls 2000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+ARCH_PATHS = {
+    'acoplada': os.path.join(ROOT, 'Acoplada', 'app'),
+    'desacoplada': os.path.join(ROOT, 'Desacoplada'),
+}
+# Núcleo común (paquetes db y models) que usan ambas arquitecturas
+CORE_PATH = os.path.join(ROOT, 'core')
+
+# Misma forma que la tabla real (sin triggers: se mide el coste de la sentencia, no el de los triggers)
+FILL_SQL = """
+    CREATE TEMP TABLE items (
+        id VARCHAR(15) PRIMARY KEY,
+        nombre VARCHAR(100) NOT NULL,
+        apellidos VARCHAR(150) NOT NULL,
+        numero_telefono VARCHAR(20),
+        puesto_trabajo VARCHAR(50) NOT NULL,
+        version BIGINT NOT NULL DEFAULT 1
+    );
+    INSERT INTO items (id, nombre, apellidos, numero_telefono, puesto_trabajo)
+    SELECT lpad(n::text, 8, '0') || 'T',
+           'Nombre ' || n,
+           'Apellido Apellido ' || n,
+           '6' || lpad(n::text, 8, '0'),
+           (ARRAY['desarrollador', 'administrativo', 'notario', 'comercial'])[n %% 4 + 1]
+    FROM generate_series(1, %s) AS n;
+    ANALYZE items;
+    CREATE TEMP TABLE items_change_counter (value BIGINT NOT NULL);
+    INSERT INTO items_change_counter VALUES (0);
+"""
+
+ITEMS_PAGE_SQL = (
+    "SELECT id, nombre, apellidos, numero_telefono, puesto_trabajo FROM items WHERE id > $1 ORDER BY id LIMIT $2"
+)
+STATEMENT_ORDER = ('items_insert', 'items_get', 'items_version', 'items_update', 'items_delete', 'items_page')
+
+
+def params_for(name: str, n: int, rows: int) -> tuple:
+    """Parámetros de la llamada n-ésima de cada sentencia."""
+    existing = f"{random.randint(1, rows):08d}T"
+    new_id = f"{n:08d}N"
+    if name == 'items_insert':  # id, nombre, apellidos, numero_telefono, puesto_trabajo
+        return (new_id, 'Bench', 'Prepared', None, 'comercial')
+    if name == 'items_get':
+        return (existing,)
+    if name == 'items_version':
+        return ()
+    if name == 'items_page':
+        return (existing, 101)
+    if name == 'items_update':
+        return ('Bench', 'Prepared', None, 'notario', existing, None)
+    if name == 'items_delete':
+        return (new_id, None)
+    raise ValueError(name)
+
+
+def run(statements, cursor, rows: int, calls: int) -> dict:
+    """Ejecuta 'calls' veces cada sentencia (los INSERT crean las filas que borran los DELETE)."""
+    timings = {}
+    for name in STATEMENT_ORDER:
+        samples = []
+        for n in range(calls):
+            params = params_for(name, n, rows)
+            started = time.perf_counter()
+            statements.execute(cursor, name, params)
+            if cursor.description is not None:
+                cursor.fetchall()
+            samples.append(time.perf_counter() - started)
+        timings[name] = samples
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arch', choices=list(ARCH_PATHS), default='acoplada')
+    parser.add_argument('--rows', type=int, default=100000, help='filas de la tabla temporal')
+    parser.add_argument('--calls', type=int, default=2000, help='llamadas por sentencia y variante')
+    parser.add_argument('--json', dest='json_path', help='guarda el resultado en este fichero')
+    args = parser.parse_args()
+
+    sys.path[:0] = [ARCH_PATHS[args.arch], CORE_PATH]
+    from db.postgres_db import STATEMENTS, connect_from_env
+    from db.prepared import PreparedStatements
+
+    statements = dict(STATEMENTS.statements, items_page=ITEMS_PAGE_SQL)
+    variants = {
+        'sin preparar': PreparedStatements(statements, enabled=False),
+        'preparadas': PreparedStatements(statements, enabled=True),
+    }
+
+    conn = connect_from_env()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute(FILL_SQL, (args.rows,))
+
+    random.seed(0)
+    # Calentamiento: cachés del catálogo y de páginas de la tabla, y PREPARE de las sentencias
+    for statements in variants.values():
+        run(statements, cursor, args.rows, 50)
+
+    medians = {}
+    for variant, statements in variants.items():
+        timings = run(statements, cursor, args.rows, args.calls)
+        medians[variant] = {name: statistics.median(samples) * 1e6 for name, samples in timings.items()}
+    conn.close()
+
+    result = {'arch': args.arch, 'rows': args.rows, 'calls': args.calls, 'statements': {}}
+    print(f"{'sentencia':<15}{'sin preparar µs':>17}{'preparadas µs':>15}{'ahorro':>9}")
+    for name in medians['preparadas']:
+        plain, prepared = medians['sin preparar'][name], medians['preparadas'][name]
+        saving = (plain - prepared) / plain * 100
+        result['statements'][name] = {
+            'plain_us': round(plain, 2), 'prepared_us': round(prepared, 2), 'saving_pct': round(saving, 1),
+        }
+        print(f"{name:<15}{plain:>17.1f}{prepared:>15.1f}{saving:>8.1f}%")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Coste por fila de convertir los resultados de PostgreSQL en items (y de vuelta a dicts para
+el JSON de la respuesta), comparando:
+- antes:   cursor de diccionarios (RealDictCursor en Acoplada, DictCursor en Desacoplada)
+           + Item(**fila), que vuelve a ejecutar la validación de pydantic;
+- después: cursor de tuplas + Item.from_row() (model_construct, sin validación).
+
+Las filas se leen de una tabla temporal con '--rows' items, así que no toca la tabla 'items'.
+Usa la conexión de la arquitectura elegida (DATABASE_URL o DB_HOST, DB_NAME, DB_USER, DB_PASS).
+Ejemplo:
+    python benchmarks/row_decode.py --arch acoplada --rows 50000 --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+ARCH_PATHS = {
+    'acoplada': os.path.join(ROOT, 'Acoplada', 'app'),
+    'desacoplada': os.path.join(ROOT, 'Desacoplada'),
+}
+# Núcleo común (paquetes db y models) que usan ambas arquitecturas
+CORE_PATH = os.path.join(ROOT, 'core')
+
+FILL_SQL = """
+    CREATE TEMP TABLE bench_items AS
+    SELECT lpad(n::text, 8, '0') || substr('TRWAGMYFPDXBNJZSQVHLCKE', n %% 23 + 1, 1) AS id,
+           'Nombre ' || n AS nombre,
+           'Apellido Apellido ' || n AS apellidos,
+           '6' || lpad(n::text, 8, '0') AS numero_telefono,
+           (ARRAY['desarrollador', 'administrativo', 'notario', 'comercial'])[n %% 4 + 1] AS puesto_trabajo
+    FROM generate_series(1, %s) AS n
+"""
+SELECT_SQL = "SELECT id, nombre, apellidos, numero_telefono, puesto_trabajo FROM bench_items ORDER BY id"
+
+
+def timed(conn, cursor_factory, build, dump: bool) -> tuple:
+    """Devuelve (segundos de fetch, segundos de construcción (+ model_dump)) de una pasada."""
+    started = time.perf_counter()
+    with conn.cursor(cursor_factory=cursor_factory) as cursor:
+        cursor.execute(SELECT_SQL)
+        rows = cursor.fetchall()
+    fetched = time.perf_counter()
+    items = [build(row) for row in rows]
+    if dump:
+        [item.model_dump() for item in items]
+    return fetched - started, time.perf_counter() - fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arch', choices=list(ARCH_PATHS), default='acoplada')
+    parser.add_argument('--rows', type=int, default=50000, help='filas de la tabla temporal')
+    parser.add_argument('--repeat', type=int, default=5, help='pasadas por variante (se toma la mediana)')
+    parser.add_argument('--json', dest='json_path', help='guarda el resultado en este fichero')
+    args = parser.parse_args()
+
+    sys.path[:0] = [ARCH_PATHS[args.arch], CORE_PATH]
+    import psycopg2.extras
+    from db.postgres_db import connect_from_env
+    from models.item import Item
+
+    dict_cursor = psycopg2.extras.RealDictCursor if args.arch == 'acoplada' else psycopg2.extras.DictCursor
+    variants = {
+        'antes (dict + Item(**fila))': (dict_cursor, lambda row: Item(**row)),
+        'después (tupla + Item.from_row)': (None, Item.from_row),
+    }
+
+    conn = connect_from_env()
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(FILL_SQL, (args.rows,))
+
+    result = {'arch': args.arch, 'rows': args.rows, 'repeat': args.repeat, 'variants': {}}
+    print(f"{'variante':<34}{'fetch µs/fila':>15}{'item µs/fila':>14}{'+dump µs/fila':>15}")
+    for name, (cursor_factory, build) in variants.items():
+        timed(conn, cursor_factory, build, True)  # Calentamiento
+        fetch, build_only = zip(*(timed(conn, cursor_factory, build, False) for _ in range(args.repeat)))
+        _, build_dump = zip(*(timed(conn, cursor_factory, build, True) for _ in range(args.repeat)))
+        per_row = {
+            'fetch_us': statistics.median(fetch) / args.rows * 1e6,
+            'build_us': statistics.median(build_only) / args.rows * 1e6,
+            'build_dump_us': statistics.median(build_dump) / args.rows * 1e6,
+        }
+        result['variants'][name] = {key: round(value, 3) for key, value in per_row.items()}
+        print(f"{name:<34}{per_row['fetch_us']:>15.2f}{per_row['build_us']:>14.2f}{per_row['build_dump_us']:>15.2f}")
+    conn.close()
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
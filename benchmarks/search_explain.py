@@ -0,0 +1,129 @@
+"""
+Comprueba con EXPLAIN que la búsqueda por nombre y apellidos (GET /items/search) usa el
+índice GIN items_search_idx en lugar de recorrer la tabla entera.
+
+Aplica el esquema de la arquitectura elegida (initialize()) y crea una tabla temporal 'items'
+con '--rows' personas y los mismos índices (con sus nombres) que la real, a la que oculta durante
+la sesión (no toca los datos). Después obtiene el plan de las consultas que genera search_sql()
+para varias búsquedas y sale con código 1 si alguna no usa el índice. Usa la conexión de la
+arquitectura (DATABASE_URL o DB_HOST, DB_NAME, DB_USER, DB_PASS). Ejemplo:
+    python benchmarks/search_explain.py --arch desacoplada --rows 50000 --analyze
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+ARCH_PATHS = {
+    'acoplada': os.path.join(ROOT, 'Acoplada', 'app'),
+    'desacoplada': os.path.join(ROOT, 'Desacoplada'),
+}
+# Núcleo común (paquetes db y models) que usan ambas arquitecturas
+CORE_PATH = os.path.join(ROOT, 'core')
+
+INDEX_NAME = 'items_search_idx'
+
+FILL_SQL = """
+    INSERT INTO items (id, nombre, apellidos, numero_telefono, puesto_trabajo)
+    SELECT lpad(n::text, 8, '0') || 'T',
+           (ARRAY['Ana', 'Carlos', 'Elena', 'Javier', 'Lucía', 'Mario', 'Nuria', 'Óscar', 'Paula',
+                  'Raúl', 'Sara', 'Tomás', 'Irene', 'Diego', 'Marta', 'Pablo', 'Laura', 'Hugo',
+                  'Julia', 'Adrián'])[n %% 20 + 1],
+           (ARRAY['García', 'López', 'Martín', 'Sánchez', 'Pérez', 'Gómez', 'Ruiz', 'Díaz', 'Torres',
+                  'Navarro', 'Ramos', 'Gil', 'Serrano', 'Molina', 'Blanco', 'Suárez', 'Castro', 'Ortiz',
+                  'Rubio', 'Marín', 'Núñez', 'Iglesias', 'Medina', 'Garrido', 'Cortés', 'Lozano',
+                  'Cano', 'Prieto', 'Méndez', 'Vidal'])[n / 20 %% 30 + 1]
+               || ' ' || (ARRAY['Herrera', 'Peña', 'León', 'Vega', 'Campos', 'Fuentes', 'Carrasco',
+                                'Diez', 'Caballero', 'Nieto', 'Aguilar', 'Pascual'])[n %% 12 + 1],
+           '6' || lpad(n::text, 8, '0'),
+           (ARRAY['desarrollador', 'administrativo', 'notario', 'comercial'])[n %% 4 + 1]
+    FROM generate_series(1, %s) AS n
+"""
+
+# (descripción, texto buscado, puesto_trabajo)
+CASES = [
+    ('nombre y apellido', 'Ana García', None),
+    ('prefijos de palabra', 'jav san', None),
+    ('sin acentos ni mayúsculas', 'OSCAR nunez', None),
+    ('con filtro de puesto', 'lucia gomez', 'desarrollador'),
+]
+
+
+def connect():
+    """Conexión en autocommit con el esquema (tabla, función de normalización e índices) aplicado."""
+    from db.postgres_db import SCHEMA_SQL, connect_from_env
+    conn = connect_from_env()
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(SCHEMA_SQL)
+    return conn
+
+
+def plan_nodes(node: dict):
+    """Recorre el árbol del plan de EXPLAIN (FORMAT JSON)."""
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arch', choices=list(ARCH_PATHS), default='acoplada')
+    parser.add_argument('--rows', type=int, default=50000, help='filas de la tabla temporal')
+    parser.add_argument('--analyze', action='store_true', help='ejecuta las consultas (EXPLAIN ANALYZE) y muestra su tiempo')
+    parser.add_argument('--json', dest='json_path', help='guarda el resultado en este fichero')
+    args = parser.parse_args()
+
+    sys.path[:0] = [ARCH_PATHS[args.arch], CORE_PATH]
+    from db.postgres_db import search_query, search_sql
+
+    conn = connect()
+    with conn.cursor() as cursor:
+        # Los índices se recrean a partir de su definición en la tabla real (mismos nombres y expresiones)
+        cursor.execute("SELECT indexdef FROM pg_indexes WHERE schemaname = 'public' AND tablename = 'items'")
+        index_definitions = [row[0] for row in cursor.fetchall()]
+        cursor.execute("CREATE TEMP TABLE items (LIKE public.items INCLUDING DEFAULTS)")
+        for definition in index_definitions:
+            cursor.execute(definition.replace(' ON public.items ', ' ON pg_temp.items '))
+        cursor.execute(FILL_SQL, (args.rows,))
+        # VACUUM vuelca la lista de entradas pendientes del índice GIN, como haría autovacuum en la tabla real
+        cursor.execute("VACUUM ANALYZE items")
+
+    explain = 'EXPLAIN (ANALYZE, FORMAT JSON) ' if args.analyze else 'EXPLAIN (FORMAT JSON) '
+    result = {'arch': args.arch, 'rows': args.rows, 'cases': []}
+    failed = False
+    for description, text, puesto_trabajo in CASES:
+        sql, params = search_sql(search_query(text), 100, 0, puesto_trabajo)
+        with conn.cursor() as cursor:
+            cursor.execute(explain + sql, params)
+            explained = cursor.fetchone()[0][0]
+        nodes = list(plan_nodes(explained['Plan']))
+        indexes = sorted({node['Index Name'] for node in nodes if 'Index Name' in node})
+        seq_scans = [node['Relation Name'] for node in nodes if node['Node Type'] == 'Seq Scan']
+        uses_index = INDEX_NAME in indexes and 'items' not in seq_scans
+        failed |= not uses_index
+
+        case = {'case': description, 'q': text, 'puesto_trabajo': puesto_trabajo,
+                'indexes': indexes, 'seq_scans': seq_scans, 'ok': uses_index}
+        line = f"{'OK   ' if uses_index else 'FALLO'} {description:<28} q={text!r:<16} índices={indexes}"
+        if seq_scans:
+            line += f" seq_scan={seq_scans}"
+        if args.analyze:
+            case['execution_ms'] = explained['Execution Time']
+            case['rows'] = explained['Plan']['Actual Rows']
+            line += f" filas={case['rows']} {case['execution_ms']:.2f} ms"
+        result['cases'].append(case)
+        print(line)
+    conn.close()
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(result, f, indent=2)
+    if failed:
+        print(f"ERROR: alguna búsqueda no usa el índice {INDEX_NAME}.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""
+Benchmark de ambas arquitecturas contra una PostgreSQL local.
+
+Ejecuta las cargas de workloads.py (single_get, list, create, update, delete, mixed) sobre
+la aplicación Flask de Acoplada y los handlers Lambda de Desacoplada (ver targets.py) y mide
+throughput, latencias p50/p95/p99 y memoria asignada por petición (tracemalloc). Cada target
+se ejecuta en un proceso propio. Los resultados se guardan en JSON y se pueden comparar con
+una ejecución anterior para detectar regresiones.
+
+La conexión a la DB se configura como en cada arquitectura (DATABASE_URL o DB_HOST, DB_NAME,
+DB_USER, DB_PASS; DB_TYPE=postgres para Desacoplada). Ejemplo:
+    python benchmarks/suite.py --ops 2000 --output resultados.json
+    python benchmarks/suite.py --ops 2000 --baseline resultados.json --fail-on-regression
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from http_load import percentile
+from targets import TARGETS
+from workloads import BENCH_ID_PATTERN, CREATE_PREFIX, WORKLOADS, Delete, person, seed_id
+
+
+# --- Ejecución de una carga ---
+def run_requests(target, workload, count: int, concurrency: int) -> tuple:
+    """Lanza 'count' peticiones repartidas entre 'concurrency' hilos. Devuelve (latencias, errores)."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    remaining = [count]
+
+    def worker():
+        local_latencies, local_errors = [], []
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            request = workload.next_request()
+            start = time.perf_counter()
+            try:
+                status = target.call(request)
+            except Exception as e:  # Un fallo no debe parar la medición: se cuenta como error
+                status = type(e).__name__
+            local_latencies.append(time.perf_counter() - start)
+            if status not in request.expected:
+                local_errors.append(status)
+        with lock:
+            latencies.extend(local_latencies)
+            errors.extend(local_errors)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def measure_allocations(target, workload, count: int) -> dict:
+    """Memoria asignada por petición con tracemalloc (pico y retenida), en una pasada aparte."""
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(count):
+            request = workload.next_request()
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            target.call(request)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        'alloc_peak_kib_mean': round(sum(peaks) / len(peaks) / 1024, 2) if peaks else 0.0,
+        'alloc_retained_kib_mean': round(sum(retained) / len(retained) / 1024, 2) if retained else 0.0,
+    }
+
+
+def run_workload(target, name: str, args) -> dict:
+    # Cada carga empieza sin las filas creadas por las anteriores (evita 409 por DNIs repetidos).
+    target.execute("DELETE FROM items WHERE id LIKE %s", (CREATE_PREFIX + '%',))
+    workload = WORKLOADS[name](args.seed_rows)
+    warmup = min(args.warmup, args.ops)
+
+    if isinstance(workload, Delete):
+        # Las filas a borrar se crean antes y no cuentan en la medición.
+        run_setup = workload.setup_requests(warmup + args.ops + args.alloc_ops)
+        for request in run_setup:
+            target.call(request)
+
+    run_requests(target, workload, warmup, 1)
+    started = time.perf_counter()
+    latencies, errors = run_requests(target, workload, args.ops, args.concurrency)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    result = {
+        'workload': name,
+        'ops': args.ops,
+        'concurrency': args.concurrency,
+        'errors': len(errors),
+        'error_samples': sorted({str(e) for e in errors})[:5],
+        'duration_s': round(elapsed, 3),
+        'throughput_ops': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+    if args.alloc_ops:
+        result.update(measure_allocations(target, workload, args.alloc_ops))
+    return result
+
+
+def run_target(name: str, args) -> dict:
+    """Ejecuta todas las cargas sobre un target (en el proceso actual)."""
+    target = TARGETS[name]()
+    target.execute("DELETE FROM items WHERE id ~ %s", (BENCH_ID_PATTERN,))
+    rng = random.Random(7)
+    target.seed([person(seed_id(n), rng) for n in range(args.seed_rows)])
+    try:
+        results = []
+        for workload in args.workloads:
+            result = run_workload(target, workload, args)
+            print(f"  {name:<12}{workload:<11}{result['throughput_ops']:>9.1f} ops/s"
+                  f"  p50 {result['p50_ms']:>7.2f} ms  p95 {result['p95_ms']:>7.2f} ms"
+                  f"  p99 {result['p99_ms']:>7.2f} ms  alloc {result.get('alloc_peak_kib_mean', 0):>7.1f} KiB"
+                  f"  errores {result['errors']}", file=sys.stderr)
+            results.append(result)
+    finally:
+        target.execute("DELETE FROM items WHERE id ~ %s", (BENCH_ID_PATTERN,))
+    return {'target': name, 'results': results}
+
+
+# --- Comparación con una ejecución anterior ---
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Imprime la variación de throughput y p99 por (target, carga) y devuelve las regresiones."""
+    if current['settings'] != baseline.get('settings'):
+        print("Aviso: la referencia se ejecutó con otros parámetros; la comparación puede no ser válida.",
+              file=sys.stderr)
+    old = {(t['target'], r['workload']): r for t in baseline['targets'] for r in t['results']}
+    regressions = []
+    print(f"\n{'target':<13}{'carga':<12}{'throughput':>12}{'p99':>10}")
+    for target in current['targets']:
+        for result in target['results']:
+            key = (target['target'], result['workload'])
+            if key not in old or not old[key]['throughput_ops'] or not old[key]['p99_ms']:
+                continue
+            d_tput = (result['throughput_ops'] / old[key]['throughput_ops'] - 1) * 100
+            d_p99 = (result['p99_ms'] / old[key]['p99_ms'] - 1) * 100
+            regressed = d_tput < -threshold or d_p99 > threshold
+            if regressed:
+                regressions.append(key)
+            print(f"{key[0]:<13}{key[1]:<12}{d_tput:>+11.1f}%{d_p99:>+9.1f}%"
+                  f"{'  REGRESIÓN' if regressed else ''}")
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', nargs='+', default=list(TARGETS), choices=list(TARGETS))
+    parser.add_argument('--workloads', nargs='+', default=list(WORKLOADS), choices=list(WORKLOADS))
+    parser.add_argument('--ops', type=int, default=2000, help='peticiones medidas por carga')
+    parser.add_argument('--warmup', type=int, default=100, help='peticiones de calentamiento (no se miden)')
+    parser.add_argument('--concurrency', type=int, default=1, help='hilos simultáneos')
+    parser.add_argument('--seed-rows', type=int, default=2000, help='filas precargadas en la tabla')
+    parser.add_argument('--alloc-ops', type=int, default=200,
+                        help='peticiones de la pasada con tracemalloc (0 = no medir memoria)')
+    parser.add_argument('--output', help='fichero JSON donde guardar los resultados')
+    parser.add_argument('--baseline', help='JSON de una ejecución anterior con el que comparar')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='porcentaje de empeoramiento de throughput/p99 considerado regresión')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='termina con código 1 si hay alguna regresión')
+    parser.add_argument('--run-target', help=argparse.SUPPRESS)  # Uso interno: proceso hijo
+    args = parser.parse_args()
+
+    if args.run_target:
+        json.dump(run_target(args.run_target, args), sys.stdout)
+        return
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {key: getattr(args, key) for key in
+                     ('ops', 'warmup', 'concurrency', 'seed_rows', 'alloc_ops', 'workloads')},
+        'env': {key: os.environ.get(key) for key in ('CACHE_BACKEND', 'DB_POOL_MAX', 'DB_TYPE')},
+        'targets': [],
+    }
+    base_cmd = [sys.executable, os.path.abspath(__file__)] + [
+        arg for arg in sys.argv[1:] if arg not in ('--fail-on-regression',)
+    ]
+    for name in args.targets:
+        print(f"Ejecutando {name}...", file=sys.stderr)
+        # Cada arquitectura en un proceso nuevo (sus módulos 'metrics'/'serialization' tienen el mismo nombre)
+        with tempfile.TemporaryFile(mode='w+') as out:
+            proc = subprocess.run(base_cmd + ['--run-target', name], stdout=out)
+            if proc.returncode != 0:
+                sys.exit(f"El benchmark de {name} falló (código {proc.returncode}).")
+            out.seek(0)
+            # Los handlers imprimen logs por stdout: el JSON es la última línea
+            report['targets'].append(json.loads(out.read().strip().splitlines()[-1]))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados guardados en {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Adaptadores que ejecutan las peticiones de workloads.py dentro del propio proceso:
+- acoplada: la aplicación Flask (Acoplada/app/main.py) con su cliente de pruebas (sin red).
+- desacoplada: los handlers de las cuatro Lambdas, invocados con eventos sintéticos de
+  API Gateway (integración proxy), igual que los recibirían en AWS.
+
+Ambas arquitecturas usan el núcleo común de core/ (paquetes 'db' y 'models'), pero cada una
+tiene sus propios módulos 'metrics' y 'serialization' con el mismo nombre, así que cada
+target se carga en un proceso distinto (ver suite.py y parity.py).
+"""
+import importlib
+import json
+import os
+import sys
+import threading
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+ACOPLADA_APP = os.path.join(ROOT, 'Acoplada', 'app')
+DESACOPLADA_DIR = os.path.join(ROOT, 'Desacoplada')
+CORE_DIR = os.path.join(ROOT, 'core')
+
+
+class FlaskTarget:
+    """Acoplada: Flask + pool de conexiones (+ caché de lectura según CACHE_BACKEND)."""
+
+    name = 'acoplada'
+
+    def __init__(self):
+        sys.path[:0] = [ACOPLADA_APP, CORE_DIR]
+        import main  # Crea la DB con DatabaseFactory y la inicializa al importarse
+        from models.item import Item
+        from db.postgres_db import connect_from_env
+
+        self.app = main.app
+        self.db = main.db
+        self._item = Item
+        self._connect = connect_from_env
+        self._local = threading.local()
+
+    def _client(self):
+        # El cliente de pruebas guarda estado (cookies): uno por hilo.
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client
+
+    def send(self, request) -> tuple:
+        """Ejecuta la petición y devuelve (código de estado, cuerpo)."""
+        path = request.resource.replace('{id}', request.path_params.get('id', ''))
+        response = self._client().open(path, method=request.method, query_string=request.query,
+                                       json=request.body)
+        # Consume el cuerpo (incluido el streaming) como haría un cliente real
+        return response.status_code, response.get_data(as_text=True)
+
+    def call(self, request) -> int:
+        return self.send(request)[0]
+
+    def seed(self, rows: list):
+        self.db.bulk_upsert_items([self._item(**row) for row in rows])
+
+    def execute(self, sql: str, params=()):
+        conn = self._connect()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+        finally:
+            conn.close()
+
+
+class LambdaTarget:
+    """Desacoplada: handlers de lambda_get/create/update/delete con eventos de API Gateway."""
+
+    name = 'desacoplada'
+
+    def __init__(self):
+        sys.path[:0] = [DESACOPLADA_DIR, CORE_DIR]
+        import lambda_router
+        from db.factory import DatabaseFactory
+        from db.postgres_db import connect_from_env
+        from models.item import Item
+
+        # Mismo enrutado que API Gateway: (método, recurso) -> handler de la Lambda
+        self.handlers = {route: importlib.import_module(module).handler
+                         for route, module in lambda_router.ROUTES.items()}
+        self.db = DatabaseFactory.get_instance()
+        self._item = Item
+        self._connect = connect_from_env
+
+    def event(self, request) -> dict:
+        """Evento sintético de la integración proxy de API Gateway (REST)."""
+        path = request.resource.replace('{id}', request.path_params.get('id', ''))
+        return {
+            'resource': request.resource,
+            'path': path,
+            'httpMethod': request.method,
+            'headers': {'Content-Type': 'application/json', 'Accept': 'application/json'},
+            'queryStringParameters': request.query or None,
+            'pathParameters': request.path_params or None,
+            'requestContext': {'resourcePath': request.resource, 'httpMethod': request.method,
+                               'path': '/prod' + path, 'stage': 'prod'},
+            'body': json.dumps(request.body) if request.body is not None else None,
+            'isBase64Encoded': False,
+        }
+
+    def send(self, request) -> tuple:
+        """Ejecuta la petición y devuelve (código de estado, cuerpo)."""
+        handler = self.handlers[(request.method, request.resource)]
+        response = handler(self.event(request), None)
+        return response['statusCode'], response.get('body') or ''
+
+    def call(self, request) -> int:
+        return self.send(request)[0]
+
+    def seed(self, rows: list):
+        self.db.bulk_upsert_items([self._item(**row) for row in rows])
+
+    def execute(self, sql: str, params=()):
+        conn = self._connect()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+        finally:
+            conn.close()
+
+
+TARGETS = {cls.name: cls for cls in (FlaskTarget, LambdaTarget)}
@@ -0,0 +1,172 @@
+"""
+Cargas de trabajo del benchmark. Cada carga genera peticiones independientes de la
+arquitectura (método, recurso de API Gateway, parámetros de ruta, query y cuerpo); los
+adaptadores de targets.py las convierten en llamadas a Flask o a los handlers Lambda.
+"""
+import itertools
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+PUESTOS = ('desarrollador', 'administrativo', 'notario', 'comercial')
+
+# Rangos de DNIs reservados para el benchmark (no se mezclan con datos reales):
+# 7xxxxxxx -> filas precargadas; 8xxxxxxx -> filas creadas durante la prueba (más la letra de control).
+# Todas se borran al empezar y al terminar (ver BENCH_ID_PATTERN).
+SEED_PREFIX = '7'
+CREATE_PREFIX = '8'
+BENCH_ID_PATTERN = '^[78][0-9]{7}[A-Z]$'
+DNI_LETTERS = 'TRWAGMYFPDXBNJZSQVHLCKE'
+
+
+@dataclass
+class Request:
+    method: str
+    resource: str
+    path_params: dict = field(default_factory=dict)
+    query: dict = field(default_factory=dict)
+    body: Optional[object] = None
+    # Códigos que se consideran correctos para esta petición
+    expected: tuple = (200,)
+
+
+def dni(number: int) -> str:
+    """DNI de 8 dígitos con su letra de control."""
+    return f"{number:08d}{DNI_LETTERS[number % 23]}"
+
+
+def seed_id(n: int) -> str:
+    return dni(int(SEED_PREFIX) * 10**7 + n)
+
+
+def person(item_id: str, rng: random.Random) -> dict:
+    """Item válido en ambas arquitecturas (DNI de 8 dígitos y letra, puesto permitido)."""
+    return {
+        'id': item_id,
+        'nombre': rng.choice(('Ana', 'Carlos', 'Elena', 'Javier', 'Lucía', 'Marta')),
+        'apellidos': rng.choice(('García Pérez', 'López Martín', 'Ruiz Gómez', 'Sánchez Torres')),
+        'puesto_trabajo': rng.choice(PUESTOS),
+        'numero_telefono': f"6{rng.randrange(10**8):08d}",
+    }
+
+
+class Workload:
+    """Base de las cargas: next_request() genera la siguiente petición y debe ser segura entre hilos."""
+
+    name = ''
+
+    def __init__(self, seed_rows: int, rng_seed: int = 42):
+        self.seed_rows = seed_rows
+        self._rng = random.Random(rng_seed)
+        self._lock = threading.Lock()
+
+    def rng(self) -> random.Random:
+        # random.Random no es seguro entre hilos: se deriva una semilla bajo el lock.
+        with self._lock:
+            return random.Random(self._rng.random())
+
+    def next_request(self) -> Request:
+        raise NotImplementedError
+
+
+class SingleGet(Workload):
+    name = 'single_get'
+
+    def next_request(self) -> Request:
+        return Request('GET', '/items/{id}', {'id': seed_id(self.rng().randrange(self.seed_rows))})
+
+
+class ListPage(Workload):
+    name = 'list'
+    PAGE_SIZE = 50
+
+    def next_request(self) -> Request:
+        # Páginas a partir de un cursor aleatorio para no leer siempre la primera.
+        start = self.rng().randrange(self.seed_rows)
+        return Request('GET', '/items', query={'limit': str(self.PAGE_SIZE), 'after': seed_id(start)})
+
+
+class Lookup(Workload):
+    """Consulta múltiple de DNIs al azar (compárese con BATCH peticiones de single_get)."""
+
+    name = 'lookup'
+    BATCH = 100
+
+    def next_request(self) -> Request:
+        rng = self.rng()
+        ids = [seed_id(rng.randrange(self.seed_rows)) for _ in range(self.BATCH)]
+        return Request('POST', '/items/lookup', body={'ids': ids})
+
+
+class Create(Workload):
+    name = 'create'
+
+    def __init__(self, seed_rows: int, rng_seed: int = 42):
+        super().__init__(seed_rows, rng_seed)
+        self._counter = itertools.count()
+
+    def new_id(self) -> str:
+        with self._lock:
+            return dni(int(CREATE_PREFIX) * 10**7 + next(self._counter))
+
+    def next_request(self) -> Request:
+        return Request('POST', '/items', body=person(self.new_id(), self.rng()), expected=(201,))
+
+
+class Update(Workload):
+    name = 'update'
+
+    def next_request(self) -> Request:
+        rng = self.rng()
+        item_id = seed_id(rng.randrange(self.seed_rows))
+        body = person(item_id, rng)
+        del body['id']
+        return Request('PUT', '/items/{id}', {'id': item_id}, body=body)
+
+
+class Delete(Workload):
+    """Borra filas creadas justo antes (cada petición de la carga es un POST + DELETE emparejado)."""
+
+    name = 'delete'
+
+    def __init__(self, seed_rows: int, rng_seed: int = 42):
+        super().__init__(seed_rows, rng_seed)
+        self._create = Create(seed_rows, rng_seed)
+        self._pending = []
+
+    def setup_requests(self, count: int) -> list:
+        """Peticiones de creación de las filas que se borrarán (no se miden)."""
+        requests = [self._create.next_request() for _ in range(count)]
+        self._pending = [request.body['id'] for request in requests]
+        return requests
+
+    def next_request(self) -> Request:
+        with self._lock:
+            item_id = self._pending.pop() if self._pending else self._create.new_id()
+        return Request('DELETE', '/items/{id}', {'id': item_id}, expected=(204,))
+
+
+class Mixed(Workload):
+    """Mezcla típica de lectura intensiva: 70% get, 15% listado, 10% update, 5% create."""
+
+    name = 'mixed'
+    WEIGHTS = (('single_get', 70), ('list', 15), ('update', 10), ('create', 5))
+
+    def __init__(self, seed_rows: int, rng_seed: int = 42):
+        super().__init__(seed_rows, rng_seed)
+        self._parts = {
+            'single_get': SingleGet(seed_rows, rng_seed + 1),
+            'list': ListPage(seed_rows, rng_seed + 2),
+            'update': Update(seed_rows, rng_seed + 3),
+            'create': Create(seed_rows, rng_seed + 4),
+        }
+        self._names = [name for name, _ in self.WEIGHTS]
+        self._weights = [weight for _, weight in self.WEIGHTS]
+
+    def next_request(self) -> Request:
+        name = self.rng().choices(self._names, self._weights)[0]
+        return self._parts[name].next_request()
+
+
+WORKLOADS = {cls.name: cls for cls in (SingleGet, ListPage, Lookup, Create, Update, Delete, Mixed)}
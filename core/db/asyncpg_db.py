@@ -0,0 +1,356 @@
+import asyncio
+import os
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import asyncpg
+
+from .db import AsyncDatabase, VersionMismatchError, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .postgres_db import (CHANGES_TOKEN_SQL, SCHEMA_SQL, SCHEMA_VERSION, SEARCH_VECTOR, STATS_SQL, _like_prefix,
+                          schema_mode, search_query)
+from models.item import Item
+
+# Errores de asyncpg agrupados como los trata la API (equivalentes a los de psycopg2):
+# - CONNECTION_ERRORS -> 503 (DB caída, sin conexiones libres en el pool, timeout...)
+# - INTEGRITY_ERRORS  -> 409 (clave duplicada, CHECK...)
+# - DATABASE_ERRORS   -> 500 (cualquier otro error de la DB)
+CONNECTION_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.TooManyConnectionsError,
+    asyncpg.InterfaceError,
+)
+INTEGRITY_ERRORS = (asyncpg.IntegrityConstraintViolationError,)
+DATABASE_ERRORS = (asyncpg.PostgresError,)
+
+# Columnas de las lecturas, en el orden que espera Item.from_row() (models.item.ROW_FIELDS).
+ITEM_COLUMNS = "id, nombre, apellidos, numero_telefono, puesto_trabajo"
+
+
+class AsyncpgDatabase(AsyncDatabase):
+    """
+    Implementación asíncrona de la interfaz para PostgreSQL con asyncpg,
+    gestionando la tabla 'items' (personas) con el mismo esquema que PostgresDatabase.
+    El pool se configura con las mismas variables DB_POOL_* que el pool síncrono.
+    """
+
+    def __init__(self):
+        self._pool: Optional[asyncpg.Pool] = None
+        self.min_size = int(os.getenv('DB_POOL_MIN', '1'))
+        self.max_size = int(os.getenv('DB_POOL_MAX', '10'))
+        self.checkout_timeout = float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', '5'))
+        self.idle_timeout = float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))
+
+    async def _create_pool(self) -> asyncpg.Pool:
+        """Crea el pool a partir de DATABASE_URL o de DB_HOST, DB_USER, etc."""
+        options = dict(
+            min_size=self.min_size,
+            max_size=self.max_size,
+            max_inactive_connection_lifetime=self.idle_timeout,
+        )
+        dsn = os.getenv('DATABASE_URL')
+        if dsn:
+            return await asyncpg.create_pool(dsn, **options)
+        host = os.getenv('DB_HOST')
+        user = os.getenv('DB_USER')
+        password = os.getenv('DB_PASS')
+        database = os.getenv('DB_NAME')
+        if not all([host, user, password, database]):
+            raise ValueError("Faltan variables de entorno de PostgreSQL (DB_HOST, etc.)")
+        return await asyncpg.create_pool(
+            host=host, user=user, password=password, database=database, **options
+        )
+
+    def _acquire(self):
+        """Presta una conexión del pool; si no hay ninguna libre a tiempo lanza asyncio.TimeoutError (503)."""
+        return self._pool.acquire(timeout=self.checkout_timeout)
+
+    def pool_stats(self) -> dict:
+        """Retorna el estado del pool (mismas claves básicas que el pool síncrono)."""
+        if self._pool is None:
+            return {'min_size': self.min_size, 'max_size': self.max_size, 'size': 0, 'idle': 0, 'in_use': 0}
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        return {'min_size': self.min_size, 'max_size': self.max_size,
+                'size': size, 'idle': idle, 'in_use': size - idle}
+
+    async def initialize(self):
+        """
+        Crea el pool y aplica el esquema si la marca de versión está desactualizada
+        (salvo DB_SCHEMA_MODE=skip), igual que PostgresDatabase.initialize().
+        """
+        try:
+            if self._pool is None:
+                self._pool = await self._create_pool()
+            if schema_mode() == 'skip':
+                return
+            async with self._acquire() as conn:
+                try:
+                    applied = await conn.fetchval("SELECT version FROM items_schema_version") or 0
+                except asyncpg.UndefinedTableError:
+                    applied = 0
+                if applied >= SCHEMA_VERSION:
+                    print(f"Esquema de la base de datos al día (versión {SCHEMA_VERSION}).")
+                    return
+                # Sin parámetros, asyncpg envía el script completo en una sola query
+                # (transacción implícita, serializada con el advisory lock del esquema).
+                await conn.execute(SCHEMA_SQL)
+            print("Tabla 'items' verificada/creada exitosamente (asyncpg).")
+        except (asyncpg.PostgresError, OSError) as e:
+            print(f"Error al inicializar la base de datos: {e}")
+            raise
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    # --- Operaciones CRUD ---
+    async def create_item(self, item: Item) -> Item:
+        """4. Inserta un nuevo item (persona) en la tabla 'items'."""
+        async with self._acquire() as conn:
+            await conn.execute(
+                f"INSERT INTO items ({ITEM_COLUMNS}) VALUES ($1, $2, $3, $4, $5)",
+                item.id, item.nombre, item.apellidos, item.numero_telefono, item.puesto_trabajo,
+            )
+        return item
+
+    async def bulk_upsert_items(self, items: List[Item], upsert: bool = True) -> List[Dict]:
+        """
+        4. Inserta/actualiza varios items en una sola sentencia (unnest de arrays).
+        Si la sentencia conjunta falla por un dato concreto, se reintenta fila a fila.
+        """
+        if not items:
+            return []
+
+        sql = f"""
+            INSERT INTO items ({ITEM_COLUMNS})
+            SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::text[], $5::text[])
+        """
+        if upsert:
+            # xmax = 0 solo en las filas recién insertadas; permite distinguir creadas y actualizadas.
+            sql += """
+            ON CONFLICT (id) DO UPDATE SET
+                nombre = EXCLUDED.nombre,
+                apellidos = EXCLUDED.apellidos,
+                numero_telefono = EXCLUDED.numero_telefono,
+                puesto_trabajo = EXCLUDED.puesto_trabajo
+            RETURNING id, (xmax = 0) AS inserted
+            """
+        else:
+            sql += " ON CONFLICT (id) DO NOTHING RETURNING id, TRUE AS inserted"
+
+        columns = [
+            [item.id for item in items],
+            [item.nombre for item in items],
+            [item.apellidos for item in items],
+            [item.numero_telefono for item in items],
+            [item.puesto_trabajo for item in items],
+        ]
+
+        async with self._acquire() as conn:
+            try:
+                inserted = {row['id']: row['inserted'] for row in await conn.fetch(sql, *columns)}
+                errors = {}
+            except (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError):
+                # Cada fila va en su propia sentencia (autocommit) y los errores no se propagan.
+                inserted, errors = {}, {}
+                for index, item in enumerate(items):
+                    try:
+                        rows = await conn.fetch(sql, *[[column[index]] for column in columns])
+                        inserted.update({row['id']: row['inserted'] for row in rows})
+                    except (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError) as e:
+                        errors[item.id] = str(e).strip()
+
+        results = []
+        for item in items:
+            if item.id in errors:
+                results.append({'id': item.id, 'status': 'error', 'details': errors[item.id]})
+            elif item.id not in inserted:
+                results.append({'id': item.id, 'status': 'conflict'})
+            else:
+                results.append({'id': item.id, 'status': 'created' if inserted[item.id] else 'updated'})
+        return results
+
+    async def get_item(self, item_id: str) -> Optional[Item]:
+        """4. Obtiene un item (persona) por su ID (DNI)."""
+        item, _ = await self.get_item_with_version(item_id)
+        return item
+
+    async def get_item_with_version(self, item_id: str, known_versions: Tuple[int, ...] = ()) -> Tuple[Optional[Item], Optional[int]]:
+        """4. Obtiene un item (persona) y su versión; no construye el Item si el cliente ya tiene esa versión."""
+        async with self._acquire() as conn:
+            record = await conn.fetchrow(f"SELECT version, {ITEM_COLUMNS} FROM items WHERE id = $1", item_id)
+        if record is None:
+            return None, None
+        version = record['version']
+        if version in known_versions:
+            return None, version
+        return Item.from_row(record[1:]), version
+
+    async def get_items_version(self) -> int:
+        """4. Obtiene el contador de cambios de la tabla 'items'."""
+        async with self._acquire() as conn:
+            return await conn.fetchval("SELECT value FROM items_change_counter")
+
+    async def get_all_items(self) -> List[Item]:
+        """4. Obtiene una lista de todos los items (personas)."""
+        async with self._acquire() as conn:
+            records = await conn.fetch(f"SELECT {ITEM_COLUMNS} FROM items")
+        return [Item.from_row(record) for record in records]
+
+    async def iter_items(self, chunk_size: int = 2000) -> AsyncIterator[Item]:
+        """
+        4. Recorre todos los items (personas) con un cursor de servidor,
+        trayendo 'chunk_size' filas por viaje para mantener la memoria constante.
+        """
+        async with self._acquire() as conn:
+            # Los cursores de asyncpg necesitan una transacción abierta.
+            async with conn.transaction():
+                cursor = conn.cursor(f"SELECT {ITEM_COLUMNS} FROM items ORDER BY id", prefetch=chunk_size)
+                async for record in cursor:
+                    yield Item.from_row(record)
+
+    async def get_items_page(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                             puesto_trabajo: Optional[str] = None,
+                             nombre_prefix: Optional[str] = None) -> Tuple[List[Item], Optional[str]]:
+        """4. Obtiene una página de items (personas) ordenada por ID, con filtros opcionales."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        conditions = []
+        params = []
+        if after:
+            params.append(after.upper())
+            conditions.append(f"id > ${len(params)}")
+        if puesto_trabajo:
+            params.append(puesto_trabajo)
+            conditions.append(f"puesto_trabajo = ${len(params)}")
+        if nombre_prefix:
+            params.append(_like_prefix(nombre_prefix))
+            conditions.append(f"nombre ILIKE ${len(params)}")
+
+        sql = f"SELECT {ITEM_COLUMNS} FROM items"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        # Se pide una fila de más para saber si existe una página siguiente.
+        params.append(limit + 1)
+        sql += f" ORDER BY id LIMIT ${len(params)}"
+
+        async with self._acquire() as conn:
+            records = await conn.fetch(sql, *params)
+
+        items = [Item.from_row(record) for record in records[:limit]]
+        next_cursor = items[-1].id if len(records) > limit else None
+        return items, next_cursor
+
+    async def get_items_by_ids(self, item_ids: List[str]) -> List[Item]:
+        """4. Obtiene los items de una lista de IDs en una sola consulta."""
+        if not item_ids:
+            return []
+        async with self._acquire() as conn:
+            records = await conn.fetch(f"SELECT {ITEM_COLUMNS} FROM items WHERE id = ANY($1::varchar[])",
+                                       list(item_ids))
+        found = {record[0]: Item.from_row(record) for record in records}
+        return [found[item_id] for item_id in item_ids if item_id in found]
+
+    async def get_changes(self, since: Optional[int], limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict], int, bool]:
+        """4. Cambios con versión posterior a 'since' (altas/modificaciones y tombstones), en orden."""
+        async with self._acquire() as conn:
+            if since is None:
+                return [], await conn.fetchval(CHANGES_TOKEN_SQL), False
+            limit = max(1, min(limit, MAX_PAGE_SIZE))
+            records = await conn.fetch(f"""
+                (SELECT version, 'upsert' AS op, updated_at AS changed_at, {ITEM_COLUMNS} FROM items
+                 WHERE version > $1 ORDER BY version LIMIT $2)
+                UNION ALL
+                (SELECT version, 'delete', deleted_at, id, NULL, NULL, NULL, NULL FROM items_tombstones
+                 WHERE version > $1 ORDER BY version LIMIT $2)
+                ORDER BY 1 LIMIT $2
+            """, since, limit + 1)
+        changes = [
+            {'op': record['op'], 'id': record['id'], 'version': record['version'],
+             'changed_at': record['changed_at'].isoformat(),
+             'item': Item.from_row(tuple(record)[3:]) if record['op'] == 'upsert' else None}
+            for record in records[:limit]
+        ]
+        next_since = changes[-1]['version'] if changes else since
+        return changes, next_since, len(records) > limit
+
+    async def get_item_stats(self) -> Tuple[Dict[str, int], int]:
+        """4. Número de items (personas) por puesto, de la tabla 'items_stats', y el contador de cambios."""
+        async with self._acquire() as conn:
+            records = await conn.fetch(STATS_SQL)
+        return {puesto: total for puesto, total, _ in records if puesto is not None}, records[0][2]
+
+    async def search_items(self, text: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0,
+                           puesto_trabajo: Optional[str] = None) -> Tuple[List[Item], Optional[int]]:
+        """4. Busca items (personas) por nombre y apellidos, ordenados por relevancia."""
+        query = search_query(text)
+        if query is None:
+            return [], None
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        tsquery = "to_tsquery('simple', items_search_normalize($1))"
+        params = [query]
+        sql = f"SELECT {ITEM_COLUMNS} FROM items WHERE {SEARCH_VECTOR} @@ {tsquery}"
+        if puesto_trabajo:
+            params.append(puesto_trabajo)
+            sql += f" AND puesto_trabajo = ${len(params)}"
+        # Se pide una fila de más para saber si existe una página siguiente.
+        params.extend([limit + 1, offset])
+        sql += f" ORDER BY ts_rank({SEARCH_VECTOR}, {tsquery}) DESC, id LIMIT ${len(params) - 1} OFFSET ${len(params)}"
+
+        async with self._acquire() as conn:
+            records = await conn.fetch(sql, *params)
+
+        items = [Item.from_row(record) for record in records[:limit]]
+        next_offset = offset + limit if len(records) > limit else None
+        return items, next_offset
+
+    async def update_item(self, item_id: str, item: Item, expected_version: Optional[int] = None) -> Optional[Item]:
+        """4. Actualiza un item (persona) existente por su ID (DNI), opcionalmente solo si tiene la versión esperada."""
+        sql = """
+            UPDATE items
+            SET nombre=$1, apellidos=$2, numero_telefono=$3, puesto_trabajo=$4
+            WHERE id=$5
+        """
+        params = [item.nombre, item.apellidos, item.numero_telefono, item.puesto_trabajo, item_id]
+        if expected_version is not None:
+            sql += " AND version=$6"
+            params.append(expected_version)
+
+        async with self._acquire() as conn:
+            status = await conn.execute(sql, *params)
+            if _rowcount(status) > 0:
+                # El ID original no se cambia en la actualización.
+                item.id = item_id
+                return item
+            if expected_version is not None:
+                await self._check_version_conflict(conn, item_id)
+            return None
+
+    async def delete_item(self, item_id: str, expected_version: Optional[int] = None) -> bool:
+        """4. Elimina un item (persona) por su ID (DNI), opcionalmente solo si tiene la versión esperada."""
+        sql = "DELETE FROM items WHERE id = $1"
+        params = [item_id]
+        if expected_version is not None:
+            sql += " AND version = $2"
+            params.append(expected_version)
+
+        async with self._acquire() as conn:
+            status = await conn.execute(sql, *params)
+            if _rowcount(status) > 0:
+                return True
+            if expected_version is not None:
+                await self._check_version_conflict(conn, item_id)
+            return False
+
+    async def _check_version_conflict(self, conn, item_id: str):
+        """Tras una escritura condicionada sin filas afectadas, distingue 'no existe' de 'otra versión'."""
+        if await conn.fetchval("SELECT 1 FROM items WHERE id = $1", item_id):
+            raise VersionMismatchError(f"El item {item_id} ha sido modificado por otro cliente.")
+
+
+def _rowcount(status: str) -> int:
+    """Extrae el número de filas afectadas de la etiqueta de estado de asyncpg (p. ej. 'UPDATE 1')."""
+    return int(status.rsplit(' ', 1)[-1])
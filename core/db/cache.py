@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from .db import Database, DEFAULT_PAGE_SIZE
+
+if TYPE_CHECKING:
+    from models.item import Item
+
+
+class LRUCache:
+    """
+    Caché en memoria del proceso con política LRU, tamaño máximo y TTL por entrada.
+    Segura entre hilos. Los valores se guardan como texto (JSON), igual que en Redis.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 30.0):
+        if max_size < 1:
+            raise ValueError("El tamaño máximo de la caché debe ser al menos 1.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # clave -> (expira_en, valor)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'invalidations': 0,
+                       'evictions': 0, 'expirations': 0}
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            self._stats['sets'] += 1
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+            self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'backend': 'memory', 'size': len(self._data), 'max_size': self.max_size,
+                    'ttl': self.ttl, **self._stats}
+
+
+class RedisCache:
+    """
+    Caché compartida en Redis (o cualquier servidor compatible).
+    'client' permite inyectar un cliente propio (p. ej. un sustituto local en pruebas)
+    que implemente get(key), set(key, value, ex=ttl) y delete(key).
+    """
+
+    def __init__(self, url: Optional[str] = None, ttl: float = 30.0, prefix: str = 'items:', client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ValueError("CACHE_BACKEND=redis requiere el paquete 'redis' (pip install redis).") from e
+            if not url:
+                raise ValueError("CACHE_BACKEND=redis requiere la variable de entorno CACHE_URL.")
+            client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'invalidations': 0, 'errors': 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        # Un fallo de la caché nunca debe tumbar la petición: se trata como un fallo de lectura.
+        try:
+            value = self._client.get(self.prefix + key)
+        except Exception:
+            self._count('errors')
+            value = None
+        self._count('hits' if value is not None else 'misses')
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    def set(self, key: str, value: str):
+        try:
+            self._client.set(self.prefix + key, value, ex=max(1, int(self.ttl)))
+            self._count('sets')
+        except Exception:
+            self._count('errors')
+
+    def delete(self, key: str):
+        try:
+            self._client.delete(self.prefix + key)
+            self._count('invalidations')
+        except Exception:
+            self._count('errors')
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'backend': 'redis', 'ttl': self.ttl, **self._stats}
+
+
+def cache_from_env():
+    """
+    Crea la caché indicada por CACHE_BACKEND ('memory' por defecto, 'redis' o 'none').
+    Tamaño y TTL se configuran con CACHE_MAX_SIZE y CACHE_TTL; Redis con CACHE_URL.
+
+    Las Lambdas de Desacoplada la desactivan (CACHE_BACKEND=none en main.yaml): cada función
+    tiene su propio proceso, así que una caché en memoria de lambda_get no se entera de las
+    escrituras de lambda_update/lambda_delete (solo el TTL acotaría el dato obsoleto).
+    """
+    backend = os.getenv('CACHE_BACKEND', 'memory').lower()
+    ttl = float(os.getenv('CACHE_TTL', '30'))
+    if backend == 'none':
+        return None
+    if backend == 'memory':
+        return LRUCache(max_size=int(os.getenv('CACHE_MAX_SIZE', '10000')), ttl=ttl)
+    if backend == 'redis':
+        return RedisCache(url=os.getenv('CACHE_URL'), ttl=ttl)
+    raise ValueError(f"CACHE_BACKEND '{backend}' no es compatible (memory, redis o none).")
+
+
+# Entrada que deja una escritura en lugar de borrar la clave cuando hay réplicas (ver _invalidate).
+_INVALIDATED = json.dumps({'invalidated': True})
+
+
+class CachedDatabase(Database):
+    """
+    Decorador de una Database que añade una caché de lectura (read-through) para get_item.
+    Cada entrada guarda el item junto a su versión (ETag). Las escrituras invalidan las
+    claves afectadas; el TTL acota la posible desactualización entre varias instancias
+    con caché en memoria.
+
+    Con réplicas de lectura, una escritura no borra la clave sino que la marca como invalidada:
+    la lectura que la encuentra así rellena la caché desde el primario. Si la rellenara una
+    réplica con retraso, guardaría la fila anterior (y su ETag) durante todo el TTL.
+    """
+
+    def __init__(self, db: Database, cache):
+        self._db = db
+        self._cache = cache
+        self._primary = db.primary_database()
+
+    def __getattr__(self, name):
+        # Delega el resto de métodos (p. ej. pool_stats) en la Database original.
+        return getattr(self._db, name)
+
+    def cache_stats(self) -> dict:
+        """Retorna los contadores de la caché (aciertos, fallos, desalojos...)."""
+        return self._cache.stats()
+
+    def initialize(self):
+        self._db.initialize()
+
+    def primary_database(self) -> Database:
+        return self._primary
+
+    def _invalidate(self, item_id: str):
+        if self._primary is self._db:
+            self._cache.delete(item_id)
+        else:
+            self._cache.set(item_id, _INVALIDATED)
+
+    def create_item(self, item: Item) -> Item:
+        created = self._db.create_item(item)
+        # No se conoce la versión asignada por la DB: se invalida y la siguiente lectura la carga.
+        self._invalidate(created.id)
+        return created
+
+    def bulk_upsert_items(self, items: List[Item], upsert: bool = True) -> List[Dict]:
+        results = self._db.bulk_upsert_items(items, upsert=upsert)
+        for result in results:
+            if result['status'] in ('created', 'updated'):
+                self._invalidate(result['id'])
+        return results
+
+    def get_item(self, item_id: str) -> Optional[Item]:
+        item, _ = self.get_item_with_version(item_id)
+        return item
+
+    def get_item_with_version(self, item_id: str, known_versions: Tuple[int, ...] = ()) -> Tuple[Optional[Item], Optional[int]]:
+        cached = self._cache.get(item_id)
+        source = self._db
+        if cached is not None:
+            entry = json.loads(cached)
+            if 'item' not in entry:
+                # Escrita hace poco: se relee del primario, no de una réplica que puede ir por detrás.
+                source = self._primary
+            elif entry['version'] in known_versions:
+                return None, entry['version']
+            else:
+                # Los datos de la caché ya se validaron al escribirse: no se vuelven a validar.
+                from models.item import Item
+                return Item.model_construct(**entry['item']), entry['version']
+        item, version = source.get_item_with_version(item_id, known_versions)
+        if item is not None:
+            self._cache.set(item_id, json.dumps({'version': version, 'item': item.model_dump()}))
+        return item, version
+
+    def get_items_version(self) -> int:
+        return self._db.get_items_version()
+
+    def get_all_items(self) -> List[Item]:
+        return self._db.get_all_items()
+
+    def iter_items(self, chunk_size: int = 2000) -> Iterator[Item]:
+        return self._db.iter_items(chunk_size=chunk_size)
+
+    def get_items_page(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                       puesto_trabajo: Optional[str] = None,
+                       nombre_prefix: Optional[str] = None) -> Tuple[List[Item], Optional[str]]:
+        return self._db.get_items_page(limit=limit, after=after, puesto_trabajo=puesto_trabajo,
+                                       nombre_prefix=nombre_prefix)
+
+    def search_items(self, text: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0,
+                     puesto_trabajo: Optional[str] = None) -> Tuple[List[Item], Optional[int]]:
+        return self._db.search_items(text, limit=limit, offset=offset, puesto_trabajo=puesto_trabajo)
+
+    def get_items_by_ids(self, item_ids: List[str]) -> List[Item]:
+        # Una sola consulta para todo el lote: no compensa mirar la caché DNI a DNI.
+        return self._db.get_items_by_ids(item_ids)
+
+    def get_changes(self, since: Optional[int], limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict], int, bool]:
+        return self._db.get_changes(since, limit=limit)
+
+    def get_item_stats(self) -> Tuple[Dict[str, int], int]:
+        return self._db.get_item_stats()
+
+    def claim_idempotency_key(self, key: str, fingerprint: str, ttl: float,
+                              lock_timeout: float) -> Optional[Tuple[str, Optional[str]]]:
+        return self._db.claim_idempotency_key(key, fingerprint, ttl=ttl, lock_timeout=lock_timeout)
+
+    def save_idempotent_response(self, key: str, fingerprint: str, response: str, ttl: float):
+        self._db.save_idempotent_response(key, fingerprint, response, ttl=ttl)
+
+    def release_idempotency_key(self, key: str):
+        self._db.release_idempotency_key(key)
+
+    def update_item(self, item_id: str, item: Item, expected_version: Optional[int] = None) -> Optional[Item]:
+        try:
+            return self._db.update_item(item_id, item, expected_version=expected_version)
+        finally:
+            self._invalidate(item_id)
+
+    def delete_item(self, item_id: str, expected_version: Optional[int] = None) -> bool:
+        try:
+            return self._db.delete_item(item_id, expected_version=expected_version)
+        finally:
+            self._invalidate(item_id)
+
+    def apply_write_batch(self, writes: List[Dict]) -> List[Dict]:
+        results = self._db.apply_write_batch(writes)
+        for result in results:
+            if result['status'] in ('created', 'updated'):
+                self._invalidate(result['id'])
+        return results
+
+    def get_write_result(self, tracking_id: str) -> Optional[Dict]:
+        return self._db.get_write_result(tracking_id)
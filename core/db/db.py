@@ -0,0 +1,313 @@
+"""
+Contrato de la capa de persistencia común a ambas arquitecturas: la aplicación Flask/ASGI de
+Acoplada y los handlers Lambda de Desacoplada usan las mismas implementaciones (paquete 'db' de
+core/), con el mismo esquema y el mismo modelo Item.
+"""
+from __future__ import annotations
+
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    # El modelo (y con él pydantic) no se importa aquí: las Lambdas que no construyen items
+    # (p. ej. DELETE) no lo cargan en el arranque en frío.
+    from models.item import Item
+
+# Tamaño de página por defecto y máximo para el listado paginado de items.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Longitud mínima (letras y números) del texto de una búsqueda por nombre/apellidos.
+MIN_SEARCH_LENGTH = 2
+
+# Máximo de items aceptados en una sola petición de carga masiva.
+MAX_BULK_SIZE = 10000
+
+# Máximo de DNIs de una consulta múltiple (POST /items/lookup).
+MAX_LOOKUP_SIZE = int(os.getenv('MAX_LOOKUP_SIZE', '1000'))
+
+_SEARCH_WORD = re.compile(r'[^\W_]+')
+
+def search_terms(text: str) -> List[str]:
+    """Palabras (solo letras y números) del texto de una búsqueda."""
+    return _SEARCH_WORD.findall(text or '')
+
+
+def normalize_ids(values) -> List[str]:
+    """
+    DNIs de una consulta múltiple sin espacios, en mayúsculas y sin repetir, en el orden recibido.
+    Lanza ValueError si 'values' no es una lista de cadenas.
+    """
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError("'ids' debe ser una lista de DNIs.")
+    return list(dict.fromkeys(value.strip().upper() for value in values))
+
+def parse_since(value: Optional[str]) -> Optional[int]:
+    """
+    Token 'since' del feed de cambios (GET /items/changes): la versión del último cambio
+    aplicado por el cliente. None si no se indica. Lanza ValueError si no es un entero >= 0.
+    """
+    if value is None or value == '':
+        return None
+    if not value.isdigit():
+        raise ValueError("'since' debe ser un token devuelto por el feed de cambios (un entero >= 0).")
+    return int(value)
+
+class VersionMismatchError(Exception):
+    """La versión del item no coincide con la esperada (If-Match): otro cliente lo modificó antes."""
+    pass
+
+class Database(ABC):
+    """
+    Clase abstracta que define el contrato de la capa de persistencia (CRUD) 
+    para el recurso 'Item' (que representa a una persona en la DB PostgreSQL).
+    """
+    
+    @abstractmethod
+    def initialize(self):
+        """Inicializa la conexión y/o la estructura de la base de datos (ej. crea tablas)."""
+        pass
+
+    def primary_database(self) -> 'Database':
+        """
+        Base de datos que recibe las escrituras: sus lecturas nunca van con retraso.
+        Es ella misma salvo con réplicas de lectura (ver replicas.py).
+        """
+        return self
+    
+    # --- Operaciones CRUD para el recurso 'Item' ---
+    @abstractmethod
+    def create_item(self, item: Item) -> Item:
+        """Crea y persiste un nuevo item en la base de datos."""
+        pass
+    
+    @abstractmethod
+    def bulk_upsert_items(self, items: List[Item], upsert: bool = True) -> List[Dict]:
+        """
+        Inserta (o actualiza, si 'upsert' es True) una lista de items en un único viaje a la DB.
+        Retorna, en el mismo orden, un dict por item con 'id' y 'status'
+        ('created', 'updated', 'conflict' o 'error' junto a 'details').
+        """
+        pass
+    
+    @abstractmethod
+    def get_item(self, item_id: str) -> Optional[Item]:
+        """Obtiene un solo item usando su ID (DNI)."""
+        pass
+    
+    @abstractmethod
+    def get_item_with_version(self, item_id: str, known_versions: Tuple[int, ...] = ()) -> Tuple[Optional[Item], Optional[int]]:
+        """
+        Obtiene un item junto a su versión (usada como ETag).
+        Retorna (None, None) si no existe y (None, versión) si la versión está en 'known_versions'
+        (el cliente ya lo tiene: no hace falta construir el Item).
+        """
+        pass
+    
+    @abstractmethod
+    def get_items_version(self) -> int:
+        """Retorna el contador de cambios de la tabla (cambia con cada escritura; usado como ETag del listado)."""
+        pass
+    
+    @abstractmethod
+    def get_all_items(self) -> List[Item]:
+        """Obtiene una lista de todos los items."""
+        pass
+    
+    @abstractmethod
+    def iter_items(self, chunk_size: int = 2000) -> Iterator[Item]:
+        """
+        Recorre todos los items sin cargarlos a la vez en memoria
+        (se leen de la DB en bloques de 'chunk_size' filas).
+        """
+        pass
+    
+    @abstractmethod
+    def get_items_page(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                       puesto_trabajo: Optional[str] = None,
+                       nombre_prefix: Optional[str] = None) -> Tuple[List[Item], Optional[str]]:
+        """
+        Obtiene una página de items ordenados por ID (paginación por clave/keyset).
+        Retorna los items y el cursor (último ID) para pedir la siguiente página, o None si no hay más.
+        """
+        pass
+    
+    @abstractmethod
+    def search_items(self, text: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0,
+                     puesto_trabajo: Optional[str] = None) -> Tuple[List[Item], Optional[int]]:
+        """
+        Busca items por nombre y apellidos (cada palabra de 'text' como prefijo, sin distinguir
+        mayúsculas ni acentos), ordenados por relevancia.
+        Retorna los items y el offset de la siguiente página, o None si no hay más.
+        """
+        pass
+    
+    @abstractmethod
+    def get_items_by_ids(self, item_ids: List[str]) -> List[Item]:
+        """
+        Obtiene de una vez los items de una lista de IDs (ya normalizados, ver normalize_ids).
+        Retorna los que existen, en el orden de 'item_ids'.
+        """
+        pass
+    
+    @abstractmethod
+    def get_changes(self, since: Optional[int], limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict], int, bool]:
+        """
+        Feed de cambios: hasta 'limit' cambios con versión posterior a 'since', en orden. Cada
+        cambio es un dict con 'op' ('upsert' o 'delete'), 'id', 'version', 'changed_at' e 'item'
+        (None en los borrados). Retorna los cambios, el token para la siguiente llamada y si
+        quedan más. Con since=None no retorna cambios, solo el token actual.
+        """
+        pass
+    
+    @abstractmethod
+    def get_item_stats(self) -> Tuple[Dict[str, int], int]:
+        """
+        Número de items por puesto de trabajo (todos los puestos, también los que no tienen
+        ninguno), sin recorrer la tabla. Retorna el recuento y el contador de cambios (ETag).
+        """
+        pass
+    
+    @abstractmethod
+    def claim_idempotency_key(self, key: str, fingerprint: str, ttl: float,
+                              lock_timeout: float) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Reserva una Idempotency-Key (ver idempotency.py). Retorna None si se ha reservado, o la
+        huella y la respuesta guardadas (None mientras otra petición la procesa).
+        """
+        pass
+    
+    @abstractmethod
+    def save_idempotent_response(self, key: str, fingerprint: str, response: str, ttl: float):
+        """Guarda la respuesta (JSON) de una Idempotency-Key reservada y borra las caducadas."""
+        pass
+    
+    @abstractmethod
+    def release_idempotency_key(self, key: str):
+        """Libera una Idempotency-Key que no llegó a tener respuesta."""
+        pass
+    
+    @abstractmethod
+    def update_item(self, item_id: str, item: Item, expected_version: Optional[int] = None) -> Optional[Item]:
+        """
+        Actualiza un item existente. Retorna el item actualizado o None si no se encuentra.
+        Si se indica 'expected_version' y no coincide, lanza VersionMismatchError.
+        """
+        pass
+    
+    @abstractmethod
+    def delete_item(self, item_id: str, expected_version: Optional[int] = None) -> bool:
+        """
+        Elimina un item usando su ID. Retorna True si fue exitoso, False en caso contrario.
+        Si se indica 'expected_version' y no coincide, lanza VersionMismatchError.
+        """
+        pass
+
+    # --- Escrituras diferidas (ver write_queue.py) ---
+    @abstractmethod
+    def apply_write_batch(self, writes: List[Dict]) -> List[Dict]:
+        """
+        Aplica, en orden y en una sola transacción, un lote de escrituras encoladas
+        ({'tracking_id', 'op': 'create' o 'update', 'item'}) y guarda el resultado de cada una.
+        Retorna, en el mismo orden, un dict por escritura con 'tracking_id', 'id' y 'status'
+        ('created', 'updated', 'conflict', 'not_found' o 'error' junto a 'details').
+        """
+        pass
+
+    @abstractmethod
+    def get_write_result(self, tracking_id: str) -> Optional[Dict]:
+        """Resultado de una escritura encolada, o None si aún no se ha procesado (o no existe)."""
+        pass
+
+
+class AsyncDatabase(ABC):
+    """
+    Versión asíncrona del contrato Database (mismos métodos y semántica, pero corrutinas),
+    usada por la aplicación ASGI (asgi.py) para no bloquear el bucle de eventos con la DB.
+    """
+    
+    @abstractmethod
+    async def initialize(self):
+        """Crea el pool de conexiones y la estructura de la base de datos (ej. crea tablas)."""
+        pass
+    
+    @abstractmethod
+    async def close(self):
+        """Cierra el pool de conexiones (al apagar el servidor)."""
+        pass
+    
+    # --- Operaciones CRUD para el recurso 'Item' ---
+    @abstractmethod
+    async def create_item(self, item: Item) -> Item:
+        """Crea y persiste un nuevo item en la base de datos."""
+        pass
+    
+    @abstractmethod
+    async def bulk_upsert_items(self, items: List[Item], upsert: bool = True) -> List[Dict]:
+        """Inserta (o actualiza) una lista de items en un único viaje a la DB (ver Database)."""
+        pass
+    
+    @abstractmethod
+    async def get_item(self, item_id: str) -> Optional[Item]:
+        """Obtiene un solo item usando su ID (DNI)."""
+        pass
+    
+    @abstractmethod
+    async def get_item_with_version(self, item_id: str, known_versions: Tuple[int, ...] = ()) -> Tuple[Optional[Item], Optional[int]]:
+        """Obtiene un item junto a su versión (usada como ETag) (ver Database)."""
+        pass
+    
+    @abstractmethod
+    async def get_items_version(self) -> int:
+        """Retorna el contador de cambios de la tabla (ETag del listado)."""
+        pass
+    
+    @abstractmethod
+    async def get_all_items(self) -> List[Item]:
+        """Obtiene una lista de todos los items."""
+        pass
+    
+    @abstractmethod
+    def iter_items(self, chunk_size: int = 2000) -> AsyncIterator[Item]:
+        """Recorre todos los items en bloques de 'chunk_size' filas (generador asíncrono)."""
+        pass
+    
+    @abstractmethod
+    async def get_items_page(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                             puesto_trabajo: Optional[str] = None,
+                             nombre_prefix: Optional[str] = None) -> Tuple[List[Item], Optional[str]]:
+        """Obtiene una página de items ordenados por ID y el cursor de la siguiente (ver Database)."""
+        pass
+    
+    @abstractmethod
+    async def search_items(self, text: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0,
+                           puesto_trabajo: Optional[str] = None) -> Tuple[List[Item], Optional[int]]:
+        """Busca items por nombre y apellidos, ordenados por relevancia (ver Database)."""
+        pass
+    
+    @abstractmethod
+    async def get_items_by_ids(self, item_ids: List[str]) -> List[Item]:
+        """Obtiene de una vez los items de una lista de IDs, en su orden (ver Database)."""
+        pass
+    
+    @abstractmethod
+    async def get_changes(self, since: Optional[int], limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict], int, bool]:
+        """Feed de cambios posteriores a 'since' y el token siguiente (ver Database)."""
+        pass
+    
+    @abstractmethod
+    async def get_item_stats(self) -> Tuple[Dict[str, int], int]:
+        """Número de items por puesto y el contador de cambios (ver Database)."""
+        pass
+    
+    @abstractmethod
+    async def update_item(self, item_id: str, item: Item, expected_version: Optional[int] = None) -> Optional[Item]:
+        """Actualiza un item existente (VersionMismatchError si 'expected_version' no coincide)."""
+        pass
+    
+    @abstractmethod
+    async def delete_item(self, item_id: str, expected_version: Optional[int] = None) -> bool:
+        """Elimina un item usando su ID (VersionMismatchError si 'expected_version' no coincide)."""
+        pass
@@ -0,0 +1,106 @@
+import os
+from typing import Dict, List, Type
+from .cache import CachedDatabase, cache_from_env
+from .db import AsyncDatabase, Database
+from .pool import ConnectionPool
+from .postgres_db import PostgresDatabase, connect_dsn, connect_from_env
+from .replicas import ReplicatedDatabase, replica_dsns_from_env
+
+
+class DatabaseFactory:
+    """
+    Factoría para crear instancias de la clase Database.
+    Se ha simplificado para solo soportar PostgreSQL, dado el requisito del proyecto.
+
+    - Acoplada (Flask) crea su instancia con create() al arrancar cada worker.
+    - Desacoplada (Lambdas) usa get_instance(): una instancia compartida por todas las
+      invocaciones del mismo contenedor, creada en el primer uso (o al importar, ver preload()).
+    """
+
+    _databases: Dict[str, Type[Database]] = {
+        'postgres': PostgresDatabase,
+    }
+
+    # Instancia compartida por todas las invocaciones del mismo contenedor Lambda
+    _instance = None
+
+    @classmethod
+    def create(cls, db_type: str = None, primary_dsn: str = None,
+               replica_dsns: List[str] = None) -> Database:
+        """
+        Crea y retorna una instancia de PostgresDatabase con su pool de conexiones
+        (configurado con las variables de entorno DB_POOL_*), envuelta en una caché
+        de lectura si CACHE_BACKEND no es 'none'.
+        Si no se indica db_type se lee DB_TYPE ('postgres' por defecto), que solo puede ser 'postgres'.
+
+        El primario es 'primary_dsn' o, si no se indica, DATABASE_URL/DB_HOST. Con réplicas
+        ('replica_dsns' o DATABASE_REPLICA_URLS/DB_REPLICA_HOSTS) las lecturas se reparten entre
+        ellas (ver replicas.py).
+        """
+        db_type = db_type or os.getenv('DB_TYPE', 'postgres')
+        if db_type.lower() not in cls._databases:
+            raise ValueError(
+                f"DB_TYPE '{db_type}' no es compatible. Esta factoría solo soporta 'postgres'."
+            )
+
+        connect = connect_dsn(primary_dsn) if primary_dsn else connect_from_env
+        db = cls._databases[db_type.lower()](pool=ConnectionPool.from_env(connect))
+
+        if replica_dsns is None:
+            replica_dsns = replica_dsns_from_env()
+        if replica_dsns:
+            db = ReplicatedDatabase.from_env(db, replica_dsns)
+
+        cache = cache_from_env()
+        if cache is not None:
+            db = CachedDatabase(db, cache)
+        return db
+
+    @classmethod
+    def create_async(cls, db_type: str = None) -> AsyncDatabase:
+        """
+        Crea la implementación asíncrona (asyncpg) para la aplicación ASGI (asgi.py).
+        El pool se crea en initialize(), ya dentro del bucle de eventos del servidor.
+        asyncpg solo se importa aquí, así la aplicación Flask y las Lambdas no dependen de él.
+        """
+        db_type = db_type or os.getenv('DB_TYPE', 'postgres')
+        if db_type.lower() not in cls._databases:
+            raise ValueError(
+                f"DB_TYPE '{db_type}' no es compatible. Esta factoría solo soporta 'postgres'."
+            )
+
+        from .asyncpg_db import AsyncpgDatabase
+        return AsyncpgDatabase()
+
+    @classmethod
+    def get_instance(cls) -> Database:
+        """
+        Devuelve la instancia del proceso, creándola (pool + verificación del esquema)
+        en el primer uso. Si falla, se reintenta en la siguiente invocación en lugar de
+        dejar la Lambda inservible hasta el próximo arranque en frío.
+        """
+        if cls._instance is None:
+            db = cls.create()
+            db.initialize()
+            cls._instance = db
+        return cls._instance
+
+    @classmethod
+    def preload(cls):
+        """
+        Con DB_INIT_MODE=eager crea la instancia al importar el handler (útil con concurrencia
+        aprovisionada, donde la fase de init no la paga el usuario). Con DB_INIT_MODE=lazy
+        (por defecto) no hace nada y la conexión se abre en la primera invocación.
+        """
+        mode = os.getenv('DB_INIT_MODE', 'lazy').lower()
+        if mode != 'eager':
+            return
+        try:
+            cls.get_instance()
+        except Exception as e:
+            print(f"ERROR: No se pudo inicializar la conexión a la BD: {e}")
+
+    @classmethod
+    def get_available_databases(cls) -> list:
+        """Retorna una lista con los nombres de las bases de datos disponibles."""
+        return list(cls._databases.keys())
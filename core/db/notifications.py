@@ -0,0 +1,120 @@
+"""
+Avisos de cambios de PostgreSQL (LISTEN/NOTIFY) para el stream SSE de Acoplada (GET /items/stream).
+
+El esquema (ver SCHEMA_SQL) hace NOTIFY items_changes al confirmar cada escritura en 'items'.
+ChangeNotifier mantiene, en un hilo propio, una conexión dedicada con LISTEN (fuera del pool:
+queda ocupada esperando avisos y una réplica no admite LISTEN) y despierta a los clientes del
+stream, que leen entonces el feed de cambios con su propio token. El aviso no lleva datos: si
+llegan varios seguidos, los clientes leen una sola vez todo lo pendiente.
+
+Si se pierde la conexión, se vuelve a abrir con espera exponencial y se despierta a todos los
+clientes al recuperarla, por si hubo cambios mientras no se escuchaba.
+"""
+import os
+import select
+import threading
+from typing import Callable, Optional
+
+import psycopg2
+
+from .resilience import backoff_delays
+
+CHANNEL = 'items_changes'
+
+# Reintentos con espera exponencial creciente; agotados, se reintenta cada 30 s indefinidamente.
+RECONNECT_ATTEMPTS = 8
+
+
+class ChangeNotifier:
+    """
+    Escucha NOTIFY items_changes y cuenta los avisos recibidos ('generación').
+    Los clientes guardan la generación que han visto y esperan con wait() a que cambie.
+    """
+
+    def __init__(self, connect: Callable, poll_interval: float = 5.0):
+        self._connect = connect
+        self.poll_interval = poll_interval
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._stopping = threading.Event()
+        self._thread = None
+        self._conn = None
+        self._stats = {'notifications': 0, 'reconnects': 0}
+
+    @property
+    def generation(self) -> int:
+        with self._condition:
+            return self._generation
+
+    def start(self):
+        """Arranca el hilo de escucha (una sola vez)."""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='change-notifier', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Detiene la escucha, cierra la conexión y despierta a los clientes en espera."""
+        self._stopping.set()
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait(self, seen: int, timeout: float) -> Optional[int]:
+        """
+        Espera (como mucho 'timeout' segundos) a que la generación sea distinta de 'seen'.
+        Retorna la nueva generación, o None si se agotó el tiempo sin avisos.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._generation != seen or self._stopping.is_set(), timeout)
+            return self._generation if self._generation != seen else None
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {'generation': self._generation, **self._stats}
+
+    def _wake(self, count: int = 1):
+        with self._condition:
+            self._generation += 1
+            self._stats['notifications'] += count
+            self._condition.notify_all()
+
+    def _listen(self):
+        conn = self._connect()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    def _run(self):
+        delays = backoff_delays(RECONNECT_ATTEMPTS, base=0.5, cap=30.0)
+        while not self._stopping.is_set():
+            try:
+                self._conn = self._listen()
+                delays = backoff_delays(RECONNECT_ATTEMPTS, base=0.5, cap=30.0)
+                # Lo ocurrido mientras no se escuchaba no se avisó: los clientes vuelven a leer.
+                self._wake(0)
+                while not self._stopping.is_set():
+                    if select.select([self._conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    self._conn.poll()
+                    if self._conn.notifies:
+                        count = len(self._conn.notifies)
+                        self._conn.notifies.clear()
+                        self._wake(count)
+            except (psycopg2.Error, OSError) as e:
+                if self._stopping.is_set():
+                    break
+                print(f"AVISO: Se perdió la conexión de LISTEN {CHANNEL}, se reabre: {e}")
+                self._stats['reconnects'] += 1
+                self._stopping.wait(next(delays, 30.0))
+            finally:
+                if self._conn is not None and not self._conn.closed:
+                    self._conn.close()
+                self._conn = None
+
+
+def notifier_from_env(connect: Callable) -> ChangeNotifier:
+    """Crea el ChangeNotifier con CHANGES_NOTIFY_POLL (segundos entre comprobaciones de parada)."""
+    return ChangeNotifier(connect, poll_interval=float(os.getenv('CHANGES_NOTIFY_POLL', '5')))
@@ -0,0 +1,360 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable
+
+import psycopg2
+import psycopg2.extensions
+
+import metrics
+from .resilience import CircuitBreaker, DatabaseUnavailable, backoff_delays, get_breaker
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """
+    Se lanza cuando no hay conexiones libres en el pool tras esperar 'checkout_timeout'.
+    Hereda de OperationalError para que los endpoints lo traten como un 503.
+    """
+
+
+class _PooledConnection:
+    """Envoltorio interno con los metadatos de una conexión del pool."""
+
+    __slots__ = ('conn', 'created_at', 'last_used', 'generation')
+
+    def __init__(self, conn, generation: int):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+        self.generation = generation
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones psycopg2 seguro entre hilos.
+
+    - Mantiene entre 'min_size' y 'max_size' conexiones abiertas.
+    - Comprueba la conexión (SELECT 1) al sacarla del pool si lleva más de
+      'check_after' segundos sin usarse.
+    - Cierra las conexiones ociosas más de 'idle_timeout' segundos (respetando 'min_size')
+      y las que superan 'max_lifetime' segundos de vida.
+    - Las conexiones que fallan con OperationalError/InterfaceError se descartan
+      y 'reset()' permite reciclar todo el pool de una vez.
+    - Al abrir una conexión reintenta 'connect_retries' veces con espera exponencial y jitter
+      y, si se le pasa un 'breaker', deja de intentarlo mientras el cortocircuito esté abierto
+      (ver resilience.py); si no consigue conectar lanza DatabaseUnavailable.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], 'psycopg2.extensions.connection'],
+        min_size: int = 1,
+        max_size: int = 10,
+        checkout_timeout: float = 5.0,
+        idle_timeout: float = 300.0,
+        max_lifetime: float = 1800.0,
+        check_after: float = 10.0,
+        connect_retries: int = 2,
+        backoff_base: float = 0.1,
+        backoff_max: float = 2.0,
+        breaker: CircuitBreaker = None,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Tamaño de pool inválido (min={min_size}, max={max_size}).")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self.connect_retries = connect_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._breaker = breaker
+
+        self._idle = deque()  # LIFO: se reutilizan primero las conexiones más "calientes"
+        self._in_use = {}     # id(conn) -> _PooledConnection prestadas
+        self._size = 0        # Conexiones abiertas (ociosas + en uso)
+        self._generation = 0  # Se incrementa en reset() para invalidar las conexiones en uso
+        self._cond = threading.Condition(threading.Lock())
+        self._stats = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'evicted_idle': 0,
+            'evicted_lifetime': 0,
+            'discarded_broken': 0,
+            'resets': 0,
+            'connect_retries': 0,
+            'connect_failures': 0,
+        }
+
+    @classmethod
+    def from_env(cls, connect: Callable[[], 'psycopg2.extensions.connection'],
+                 name: str = 'primary') -> 'ConnectionPool':
+        """
+        Crea el pool leyendo su configuración de las variables de entorno DB_POOL_* y DB_CONNECT_*,
+        con el cortocircuito del proceso para el destino 'name' (DB_BREAKER_*).
+        """
+        return cls(
+            connect,
+            min_size=int(os.getenv('DB_POOL_MIN', '1')),
+            max_size=int(os.getenv('DB_POOL_MAX', '10')),
+            checkout_timeout=float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', '5')),
+            idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+            max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+            check_after=float(os.getenv('DB_POOL_CHECK_AFTER', '10')),
+            connect_retries=int(os.getenv('DB_CONNECT_RETRIES', '2')),
+            backoff_base=float(os.getenv('DB_CONNECT_BACKOFF', '0.1')),
+            backoff_max=float(os.getenv('DB_CONNECT_BACKOFF_MAX', '2')),
+            breaker=get_breaker(name),
+        )
+
+    # --- Ciclo de vida ---
+    def open(self):
+        """Abre conexiones hasta alcanzar 'min_size' (precalentamiento del pool)."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            pooled = self._new_connection()
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def reset(self):
+        """
+        Cierra todas las conexiones ociosas y marca las que están en uso para que
+        se cierren al devolverse. Útil tras un fallo de la BD o un failover.
+        """
+        with self._cond:
+            self._generation += 1
+            self._stats['resets'] += 1
+            stale = list(self._idle)
+            self._idle.clear()
+            self._size -= len(stale)
+            self._cond.notify_all()
+        for pooled in stale:
+            self._close(pooled)
+
+    def close(self):
+        """Alias de reset() para el apagado del proceso."""
+        self.reset()
+
+    # --- Checkout / devolución ---
+    def getconn(self):
+        """Obtiene una conexión sana del pool, creando una nueva si hay hueco."""
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            pooled = None
+            create = False
+            with self._cond:
+                expired = self._evict_locked()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f"No hay conexiones libres en el pool tras {self.checkout_timeout}s "
+                            f"(max_size={self.max_size})."
+                        )
+                    self._stats['waits'] += 1
+                    self._cond.wait(remaining)
+                    expired.extend(self._evict_locked())
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+                self._stats['checkouts'] += 1
+
+            for old in expired:
+                self._close(old)
+
+            if create:
+                return self._lend(self._new_connection())
+
+            if self._is_healthy(pooled):
+                return self._lend(pooled)
+
+            # Conexión rota: se descarta y se vuelve a intentar.
+            self._stats['health_check_failures'] += 1
+            self._discard(pooled)
+
+    def putconn(self, conn, broken: bool = False):
+        """Devuelve una conexión al pool (o la cierra si está rota o caducada)."""
+        with self._cond:
+            pooled = self._in_use.pop(id(conn), None)
+        if pooled is None:
+            conn.close()
+            return
+
+        now = time.monotonic()
+        keep = (
+            not broken
+            and conn.closed == 0
+            and pooled.generation == self._generation
+            and now - pooled.created_at < self.max_lifetime
+            and conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+        if not keep:
+            if broken:
+                self._stats['discarded_broken'] += 1
+            elif now - pooled.created_at >= self.max_lifetime:
+                self._stats['evicted_lifetime'] += 1
+            self._discard(pooled)
+            return
+
+        pooled.last_used = now
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager que presta una conexión y la devuelve al terminar.
+        Si la operación falla con un error de conexión, la conexión se descarta.
+        """
+        with metrics.phase('checkout'):
+            conn = self.getconn()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        except BaseException:
+            # Incluye GeneratorExit: un generador (p. ej. una exportación en streaming)
+            # que se cierra antes de tiempo también debe devolver su conexión.
+            if not conn.closed and not conn.autocommit:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            raise
+        finally:
+            self.putconn(conn, broken=broken)
+
+    # --- Estadísticas ---
+    def stats(self) -> dict:
+        """Retorna el estado actual del pool y los contadores acumulados."""
+        with self._cond:
+            idle = len(self._idle)
+            stats = {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                **self._stats,
+            }
+        if self._breaker is not None:
+            stats.update(self._breaker.stats())
+        return stats
+
+    # --- Helpers internos ---
+    def _new_connection(self) -> _PooledConnection:
+        try:
+            conn = self._open_connection()
+            conn.autocommit = True
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        pooled = _PooledConnection(conn, self._generation)
+        self._stats['connections_created'] += 1
+        return pooled
+
+    def _open_connection(self):
+        """Abre una conexión, reintentando los errores de conexión con espera exponencial y jitter."""
+        if self._breaker is not None:
+            self._breaker.before_call()  # CircuitOpenError sin esperar si la BD sigue caída
+        delays = backoff_delays(self.connect_retries, self.backoff_base, self.backoff_max)
+        while True:
+            try:
+                conn = self._connect()
+            except psycopg2.OperationalError as e:
+                delay = next(delays, None)
+                if delay is not None:
+                    self._stats['connect_retries'] += 1
+                    print(f"AVISO: Error al conectar a la BD, reintento en {delay:.2f}s: {str(e).strip()}")
+                    time.sleep(delay)
+                    continue
+                self._stats['connect_failures'] += 1
+                if self._breaker is not None:
+                    self._breaker.record_failure()
+                raise DatabaseUnavailable(
+                    f"No se pudo conectar a la BD tras {self.connect_retries + 1} intentos: {e}"
+                ) from e
+            except Exception:
+                # Errores de configuración (p. ej. faltan variables de entorno): sin reintentos,
+                # pero cuentan como fallo para liberar la prueba del cortocircuito en 'half_open'.
+                if self._breaker is not None:
+                    self._breaker.record_failure()
+                raise
+            if self._breaker is not None:
+                self._breaker.record_success()
+            return conn
+
+    def _lend(self, pooled: _PooledConnection):
+        with self._cond:
+            self._in_use[id(pooled.conn)] = pooled
+        return pooled.conn
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        conn = pooled.conn
+        if conn.closed != 0:
+            return False
+        if time.monotonic() - pooled.last_used < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _evict_locked(self) -> list:
+        """Saca del pool (sin cerrarlas) las conexiones ociosas o caducadas. Requiere el lock."""
+        now = time.monotonic()
+        expired = []
+        kept = deque()
+        for pooled in self._idle:
+            if now - pooled.created_at >= self.max_lifetime:
+                self._stats['evicted_lifetime'] += 1
+                expired.append(pooled)
+            elif (now - pooled.last_used >= self.idle_timeout
+                  and self._size - len(expired) > self.min_size):
+                self._stats['evicted_idle'] += 1
+                expired.append(pooled)
+            else:
+                kept.append(pooled)
+        if expired:
+            self._idle = kept
+            self._size -= len(expired)
+            self._cond.notify_all()
+        return expired
+
+    def _discard(self, pooled: _PooledConnection):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+        self._close(pooled)
+
+    def _close(self, pooled: _PooledConnection):
+        try:
+            pooled.conn.close()
+        except psycopg2.Error:
+            pass
+        self._stats['connections_closed'] += 1
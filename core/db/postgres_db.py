@@ -0,0 +1,955 @@
+from __future__ import annotations
+
+import functools
+import itertools
+import os
+import psycopg2
+import psycopg2.errors
+import psycopg2.extras
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+from .db import Database, VersionMismatchError, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, search_terms
+from .pool import ConnectionPool, PoolTimeout
+from .resilience import DatabaseUnavailable
+from .prepared import PreparedStatements
+import metrics  # Lo aporta cada arquitectura (histogramas en Acoplada, EMF en Desacoplada)
+
+if TYPE_CHECKING:
+    # El modelo (y con él pydantic) se importa dentro de los métodos que construyen items,
+    # para no cargarlo en el arranque en frío de las Lambdas que no lo necesitan (p. ej. DELETE).
+    from models.item import Item
+
+DB_URL = os.getenv('DATABASE_URL')
+
+# Segundos máximos para abrir una conexión. Sin límite, con la BD inalcanzable psycopg2 espera lo
+# que tarde el sistema en dar por perdida la conexión TCP (minutos), más que el timeout de la Lambda.
+CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '5'))
+
+# Reintentos de las lecturas que fallan por un error de conexión (ver idempotent()).
+READ_RETRIES = int(os.getenv('DB_READ_RETRIES', '1'))
+
+# Segundos que se conservan los resultados de las escrituras diferidas (un día por defecto).
+WRITE_RESULTS_TTL = int(os.getenv('WRITE_RESULTS_TTL', '86400'))
+
+# Columnas de las lecturas, en el orden que espera Item.from_row() (models.item.ROW_FIELDS).
+ITEM_COLUMNS = "id, nombre, apellidos, numero_telefono, puesto_trabajo"
+
+# Sentencias del camino caliente del CRUD, preparadas una vez por conexión (ver prepared.py).
+# - items_version: contador de cambios, leído en cada GET /items para su ETag.
+#   Los listados no se preparan: el resultado de un EXECUTE se materializa en el servidor antes
+#   de enviarse y, con cientos de filas, cuesta más de lo que ahorra (ver benchmarks/prepared_statements.py).
+# - items_update/items_delete: con $6/$2 a NULL no se comprueba la versión (sin If-Match).
+STATEMENTS = PreparedStatements({
+    'items_insert': f"INSERT INTO items ({ITEM_COLUMNS}) VALUES ($1, $2, $3, $4, $5)",
+    'items_get': f"SELECT version, {ITEM_COLUMNS} FROM items WHERE id = $1",
+    'items_version': "SELECT value FROM items_change_counter",
+    'items_update': """
+        UPDATE items
+        SET nombre = $1, apellidos = $2, numero_telefono = $3, puesto_trabajo = $4
+        WHERE id = $5 AND ($6::bigint IS NULL OR version = $6)
+    """,
+    'items_delete': "DELETE FROM items WHERE id = $1 AND ($2::bigint IS NULL OR version = $2)",
+})
+
+def connect_from_env():
+    """Abre una nueva conexión a la DB a partir de DATABASE_URL o de DB_HOST, DB_USER, etc."""
+    if not DB_URL:
+        # En Fargate, esta URL se debe construir a partir de HOST, USER, PASS, etc.
+        # o pasarse completa como variable de entorno.
+        host = os.getenv('DB_HOST')
+        user = os.getenv('DB_USER')
+        password = os.getenv('DB_PASS')
+        database = os.getenv('DB_NAME')
+        if not all([host, user, password, database]):
+             raise ValueError("Faltan variables de entorno de PostgreSQL (DB_HOST, etc.)")
+        return psycopg2.connect(
+            host=host, user=user, password=password, database=database,
+            connect_timeout=CONNECT_TIMEOUT,
+        )
+    else:
+        return psycopg2.connect(DB_URL, connect_timeout=CONNECT_TIMEOUT)
+
+def connect_dsn(dsn: str):
+    """Función de conexión para un DSN concreto (p. ej. una réplica de lectura, ver replicas.py)."""
+    def connect():
+        return psycopg2.connect(dsn, connect_timeout=CONNECT_TIMEOUT)
+    return connect
+
+# Versión del esquema que aplica SCHEMA_SQL. Se guarda en la tabla 'items_schema_version'
+# para que los arranques (en frío en las Lambdas, de cada worker en Fargate) solo comprueben
+# la marca en lugar de repetir el DDL. Hay que incrementarla cada vez que cambie SCHEMA_SQL.
+SCHEMA_VERSION = 7
+
+# Esquema de la DB, el mismo en ambas arquitecturas. Además de la tabla 'items' mantiene:
+# - items.version: versión de cada fila (ETag de GET /items/<id>), tomada de una secuencia
+#   al insertar y renovada por un trigger en cada UPDATE, que también actualiza 'updated_at'.
+# - items_change_counter: contador de cambios de la tabla (ETag de GET /items). Se incrementa
+#   dentro de la misma transacción que la escritura, así que nunca adelanta a los datos visibles.
+#   Se incrementa ANTES de tocar las filas: el bloqueo de su única fila serializa las
+#   escrituras hasta su COMMIT, así que las versiones se reparten en el orden en que se
+#   confirman y sirven de token para el feed de cambios (GET /items/changes?since=<versión>).
+# - items_tombstones: DNIs borrados, con la versión del borrado, para que el feed de cambios
+#   informe también de los borrados. Un alta con el mismo DNI quita su tombstone.
+# - NOTIFY items_changes: se avisa al confirmar cada escritura (stream SSE de Acoplada).
+# - items_stats: número de personas por puesto (GET /items/stats), mantenido por triggers de
+#   sentencia con las filas afectadas, así que la consulta lee una fila por puesto y no 'items'.
+#   Las escrituras ya están serializadas por items_change_counter, así que actualizar estas
+#   pocas filas no añade esperas. Se recalcula entero cada vez que se aplica el esquema.
+# - items_write_results: resultado de las escrituras diferidas (ver write_queue.py).
+# - items_idempotency_keys: respuestas de las peticiones con Idempotency-Key (ver idempotency.py).
+# - items_schema_version: marca con la versión del esquema aplicada (ver SCHEMA_VERSION).
+SCHEMA_SQL = f"""
+    SELECT pg_advisory_xact_lock(72873001);
+
+    CREATE TABLE IF NOT EXISTS items (
+        id VARCHAR(15) PRIMARY KEY, -- DNI como clave primaria
+        nombre VARCHAR(100) NOT NULL,
+        apellidos VARCHAR(150) NOT NULL,
+        numero_telefono VARCHAR(20),
+        puesto_trabajo VARCHAR(50) NOT NULL 
+            CHECK (puesto_trabajo IN ('desarrollador', 'administrativo', 'notario', 'comercial'))
+    );
+
+    -- Tablas creadas por las versiones anteriores de Desacoplada (VARCHAR(255) y sin CHECK):
+    -- se igualan al esquema común. Falla si alguna fila no cabe en los nuevos tipos o tiene un
+    -- puesto no permitido; hay que corregirla antes de desplegar.
+    DO $$
+    BEGIN
+        IF (SELECT character_maximum_length FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'items' AND column_name = 'id') = 255 THEN
+            ALTER TABLE items
+                ALTER COLUMN id TYPE VARCHAR(15),
+                ALTER COLUMN nombre TYPE VARCHAR(100),
+                ALTER COLUMN apellidos TYPE VARCHAR(150),
+                ALTER COLUMN puesto_trabajo TYPE VARCHAR(50),
+                ADD CONSTRAINT items_puesto_trabajo_check
+                    CHECK (puesto_trabajo IN ('desarrollador', 'administrativo', 'notario', 'comercial'));
+        END IF;
+    END
+    $$;
+
+    CREATE SEQUENCE IF NOT EXISTS items_version_seq;
+    ALTER TABLE items ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('items_version_seq');
+    ALTER TABLE items ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+    -- Feed de cambios (version > since); con este índice los UPDATE ya no pueden ser HOT.
+    CREATE INDEX IF NOT EXISTS items_version_idx ON items (version);
+
+    CREATE TABLE IF NOT EXISTS items_tombstones (
+        id VARCHAR(15) PRIMARY KEY,
+        version BIGINT NOT NULL,
+        deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    CREATE INDEX IF NOT EXISTS items_tombstones_version_idx ON items_tombstones (version);
+
+    CREATE TABLE IF NOT EXISTS items_change_counter (
+        singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+        value BIGINT NOT NULL DEFAULT 0
+    );
+    INSERT INTO items_change_counter (singleton, value) VALUES (TRUE, 0) ON CONFLICT DO NOTHING;
+
+    CREATE OR REPLACE FUNCTION items_bump_version() RETURNS trigger AS $$
+    BEGIN
+        NEW.version := nextval('items_version_seq');
+        NEW.updated_at := now();
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION items_bump_change_counter() RETURNS trigger AS $$
+    BEGIN
+        UPDATE items_change_counter SET value = value + 1;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS items_version_trg ON items;
+    CREATE TRIGGER items_version_trg BEFORE UPDATE ON items
+        FOR EACH ROW EXECUTE FUNCTION items_bump_version();
+
+    CREATE OR REPLACE FUNCTION items_record_tombstones() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO items_tombstones (id, version)
+        SELECT id, nextval('items_version_seq') FROM deleted_items
+        ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version, deleted_at = now();
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION items_clear_tombstones() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM items_tombstones t USING inserted_items i WHERE t.id = i.id;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION items_notify_changes() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('items_changes', '');
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    -- BEFORE: el contador se bloquea antes de repartir versiones (ver el comentario de SCHEMA_SQL).
+    DROP TRIGGER IF EXISTS items_change_counter_trg ON items;
+    CREATE TRIGGER items_change_counter_trg BEFORE INSERT OR UPDATE OR DELETE OR TRUNCATE ON items
+        FOR EACH STATEMENT EXECUTE FUNCTION items_bump_change_counter();
+
+    DROP TRIGGER IF EXISTS items_tombstones_trg ON items;
+    CREATE TRIGGER items_tombstones_trg AFTER DELETE ON items
+        REFERENCING OLD TABLE AS deleted_items
+        FOR EACH STATEMENT EXECUTE FUNCTION items_record_tombstones();
+
+    DROP TRIGGER IF EXISTS items_clear_tombstones_trg ON items;
+    CREATE TRIGGER items_clear_tombstones_trg AFTER INSERT ON items
+        REFERENCING NEW TABLE AS inserted_items
+        FOR EACH STATEMENT EXECUTE FUNCTION items_clear_tombstones();
+
+    DROP TRIGGER IF EXISTS items_notify_trg ON items;
+    CREATE TRIGGER items_notify_trg AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON items
+        FOR EACH STATEMENT EXECUTE FUNCTION items_notify_changes();
+
+    -- Recuento por puesto (GET /items/stats): cada sentencia suma sus altas y resta sus bajas.
+    CREATE TABLE IF NOT EXISTS items_stats (
+        puesto_trabajo VARCHAR(50) PRIMARY KEY,
+        total BIGINT NOT NULL DEFAULT 0
+    );
+
+    CREATE OR REPLACE FUNCTION items_stats_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            UPDATE items_stats SET total = 0;
+        ELSIF TG_OP = 'INSERT' THEN
+            INSERT INTO items_stats AS s (puesto_trabajo, total)
+            SELECT puesto_trabajo, count(*) FROM new_items GROUP BY puesto_trabajo
+            ON CONFLICT (puesto_trabajo) DO UPDATE SET total = s.total + EXCLUDED.total;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE items_stats s SET total = s.total - d.total
+            FROM (SELECT puesto_trabajo, count(*) AS total FROM old_items GROUP BY puesto_trabajo) d
+            WHERE s.puesto_trabajo = d.puesto_trabajo;
+        ELSE
+            -- UPDATE: solo cuentan las filas que cambian de puesto.
+            INSERT INTO items_stats AS s (puesto_trabajo, total)
+            SELECT puesto_trabajo, sum(delta) FROM (
+                SELECT puesto_trabajo, 1 AS delta FROM new_items
+                UNION ALL
+                SELECT puesto_trabajo, -1 FROM old_items
+            ) d
+            GROUP BY puesto_trabajo HAVING sum(delta) <> 0
+            ON CONFLICT (puesto_trabajo) DO UPDATE SET total = s.total + EXCLUDED.total;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS items_stats_insert_trg ON items;
+    CREATE TRIGGER items_stats_insert_trg AFTER INSERT ON items
+        REFERENCING NEW TABLE AS new_items
+        FOR EACH STATEMENT EXECUTE FUNCTION items_stats_apply();
+
+    DROP TRIGGER IF EXISTS items_stats_update_trg ON items;
+    CREATE TRIGGER items_stats_update_trg AFTER UPDATE ON items
+        REFERENCING OLD TABLE AS old_items NEW TABLE AS new_items
+        FOR EACH STATEMENT EXECUTE FUNCTION items_stats_apply();
+
+    DROP TRIGGER IF EXISTS items_stats_delete_trg ON items;
+    CREATE TRIGGER items_stats_delete_trg AFTER DELETE ON items
+        REFERENCING OLD TABLE AS old_items
+        FOR EACH STATEMENT EXECUTE FUNCTION items_stats_apply();
+
+    DROP TRIGGER IF EXISTS items_stats_truncate_trg ON items;
+    CREATE TRIGGER items_stats_truncate_trg AFTER TRUNCATE ON items
+        FOR EACH STATEMENT EXECUTE FUNCTION items_stats_apply();
+
+    -- Recuento inicial, con todos los puestos (también los que no tienen personas). El bloqueo
+    -- impide escrituras hasta el COMMIT del esquema, así que no se pierde ni se duplica ninguna.
+    LOCK TABLE items IN SHARE ROW EXCLUSIVE MODE;
+    INSERT INTO items_stats (puesto_trabajo, total)
+    SELECT p.puesto_trabajo, count(i.id)
+    FROM unnest(ARRAY['desarrollador', 'administrativo', 'notario', 'comercial']) AS p (puesto_trabajo)
+    LEFT JOIN items i ON i.puesto_trabajo = p.puesto_trabajo
+    GROUP BY p.puesto_trabajo
+    ON CONFLICT (puesto_trabajo) DO UPDATE SET total = EXCLUDED.total;
+
+    -- Búsqueda por nombre y apellidos (GET /items/search): tsvector en minúsculas y sin acentos,
+    -- con el nombre con peso A y los apellidos con peso B para el ranking.
+    CREATE OR REPLACE FUNCTION items_search_normalize(value TEXT) RETURNS TEXT AS $$
+        SELECT translate(lower(value), 'áàâäéèêëíìîïóòôöúùûüñç', 'aaaaeeeeiiiioooouuuunc')
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+    CREATE INDEX IF NOT EXISTS items_search_idx ON items USING GIN ((
+        setweight(to_tsvector('simple', items_search_normalize(nombre)), 'A') ||
+        setweight(to_tsvector('simple', items_search_normalize(apellidos)), 'B')
+    ));
+
+    -- Filtro por puesto de trabajo del listado y de la búsqueda (con el ID, que ordena el listado).
+    CREATE INDEX IF NOT EXISTS items_puesto_trabajo_idx ON items (puesto_trabajo, id);
+
+    -- Resultado de cada escritura diferida, consultado con GET /items/writes/<tracking_id>.
+    CREATE TABLE IF NOT EXISTS items_write_results (
+        tracking_id UUID PRIMARY KEY,
+        op VARCHAR(10) NOT NULL,
+        item_id VARCHAR(15) NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        details TEXT,
+        processed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    CREATE INDEX IF NOT EXISTS items_write_results_processed_idx ON items_write_results (processed_at);
+
+    -- Respuesta guardada de cada Idempotency-Key; 'response' es NULL mientras se procesa la petición.
+    CREATE TABLE IF NOT EXISTS items_idempotency_keys (
+        idempotency_key VARCHAR(255) PRIMARY KEY,
+        fingerprint CHAR(64) NOT NULL,
+        response TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    CREATE INDEX IF NOT EXISTS items_idempotency_keys_created_idx ON items_idempotency_keys (created_at);
+
+    CREATE TABLE IF NOT EXISTS items_schema_version (
+        singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+        version INTEGER NOT NULL
+    );
+    INSERT INTO items_schema_version (singleton, version) VALUES (TRUE, {SCHEMA_VERSION})
+    ON CONFLICT (singleton) DO UPDATE SET version = EXCLUDED.version;
+"""
+
+# Feed de cambios (GET /items/changes): filas con versión posterior al token y tombstones.
+CHANGES_SQL = f"""
+    (SELECT version, 'upsert', updated_at, {ITEM_COLUMNS} FROM items
+     WHERE version > %(since)s ORDER BY version LIMIT %(limit)s)
+    UNION ALL
+    (SELECT version, 'delete', deleted_at, id, NULL, NULL, NULL, NULL FROM items_tombstones
+     WHERE version > %(since)s ORDER BY version LIMIT %(limit)s)
+    ORDER BY 1 LIMIT %(limit)s
+"""
+
+# Reserva de una Idempotency-Key: inserta la clave o, si ya existía, la vuelve a reservar solo si
+# ha caducado o si la petición que la reservó no terminó en 'lock_timeout' segundos.
+IDEMPOTENCY_CLAIM_SQL = """
+    INSERT INTO items_idempotency_keys AS k (idempotency_key, fingerprint)
+    VALUES (%(key)s, %(fingerprint)s)
+    ON CONFLICT (idempotency_key) DO UPDATE
+        SET fingerprint = EXCLUDED.fingerprint, response = NULL, created_at = now()
+        WHERE k.created_at < now() - make_interval(secs => %(ttl)s)
+           OR (k.response IS NULL AND k.created_at < now() - make_interval(secs => %(lock_timeout)s))
+    RETURNING 1
+"""
+
+# Recuento por puesto (GET /items/stats) y contador de cambios (su ETag), en la misma instantánea.
+STATS_SQL = """
+    SELECT s.puesto_trabajo, s.total, c.value
+    FROM items_change_counter c LEFT JOIN items_stats s ON TRUE
+    ORDER BY s.puesto_trabajo
+"""
+
+# Token actual (versión del último cambio confirmado), para empezar a seguir el feed sin descargarlo.
+CHANGES_TOKEN_SQL = """
+    SELECT GREATEST((SELECT max(version) FROM items), (SELECT max(version) FROM items_tombstones), 0)
+"""
+
+def idempotent(method):
+    """
+    Reintenta (READ_RETRIES veces) una lectura que falla por un error de conexión, p. ej. porque
+    el RDS Proxy o la BD cerraron la conexión ociosa entre dos invocaciones de la Lambda:
+    pool.connection() ya ha descartado la conexión rota y el reintento usa otra.
+    No se reintentan los errores que ya agotaron sus propios reintentos o esperas (DatabaseUnavailable,
+    PoolTimeout) ni las consultas canceladas (statement_timeout), y nunca las escrituras: si se
+    perdió la respuesta de un UPDATE o DELETE no se sabe si se aplicó.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        for attempt in range(READ_RETRIES + 1):
+            try:
+                return method(*args, **kwargs)
+            except (DatabaseUnavailable, PoolTimeout, psycopg2.errors.QueryCanceled):
+                raise
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                if attempt == READ_RETRIES:
+                    raise
+                print(f"AVISO: {method.__name__} falló por un error de conexión, se reintenta: {str(e).strip()}")
+    return wrapper
+
+
+def schema_mode() -> str:
+    """
+    Lee DB_SCHEMA_MODE: 'auto' (por defecto, initialize() aplica el esquema si la marca de
+    'items_schema_version' es anterior a SCHEMA_VERSION) o 'skip' (no se comprueba nada: el
+    esquema se aplica fuera de initialize(), p. ej. en el maestro de gunicorn o con migrate.py).
+    """
+    mode = os.getenv('DB_SCHEMA_MODE', 'auto').lower()
+    if mode not in ('auto', 'skip'):
+        raise ValueError(f"DB_SCHEMA_MODE '{mode}' no es válido (auto o skip).")
+    return mode
+
+def _like_prefix(prefix: str) -> str:
+    """Escapa los comodines de LIKE y construye el patrón 'prefijo%'."""
+    return prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+# Expresión del índice items_search_idx: las consultas deben repetirla tal cual para usarlo.
+SEARCH_VECTOR = """(
+    setweight(to_tsvector('simple', items_search_normalize(nombre)), 'A') ||
+    setweight(to_tsvector('simple', items_search_normalize(apellidos)), 'B')
+)"""
+
+def search_query(text: str) -> Optional[str]:
+    """
+    Convierte el texto buscado en una tsquery con cada palabra como prefijo ('ana:* & gar:*').
+    Solo se conservan letras y números, así que el resultado nunca contiene operadores del usuario.
+    Retorna None si el texto no tiene ninguna palabra.
+    """
+    return ' & '.join(f"{word}:*" for word in search_terms(text)) or None
+
+def search_sql(query: str, limit: int, offset: int, puesto_trabajo: Optional[str] = None) -> Tuple[str, dict]:
+    """
+    SQL y parámetros de una página de la búsqueda (usa el índice items_search_idx).
+    'query' es la tsquery de search_query(); se pide una fila de más para saber si hay otra página.
+    """
+    sql = f"""
+        SELECT {ITEM_COLUMNS} FROM items
+        WHERE {SEARCH_VECTOR} @@ to_tsquery('simple', items_search_normalize(%(query)s))
+    """
+    if puesto_trabajo:
+        sql += " AND puesto_trabajo = %(puesto_trabajo)s"
+    sql += f"""
+        ORDER BY ts_rank({SEARCH_VECTOR}, to_tsquery('simple', items_search_normalize(%(query)s))) DESC, id
+        LIMIT %(limit)s OFFSET %(offset)s
+    """
+    return sql, {'query': query, 'puesto_trabajo': puesto_trabajo, 'limit': limit + 1, 'offset': offset}
+
+
+class PostgresDatabase(Database):
+    """
+    Implementación de la interfaz Database para PostgreSQL,
+    gestionando la tabla 'items' (personas).
+
+    La usan ambas arquitecturas: en Fargate el pool lo comparten los hilos de cada worker;
+    en una Lambda (una invocación a la vez por contenedor) el pool mantiene una sola conexión
+    caliente entre invocaciones y la comprueba antes de reutilizarla tras un rato inactiva.
+    """
+
+    def __init__(self, pool: Optional[ConnectionPool] = None):
+        # El pool se crea normalmente desde DatabaseFactory.create(); si no se
+        # proporciona, se construye uno con la configuración de las variables DB_POOL_*.
+        self._pool = pool or ConnectionPool.from_env(connect_from_env)
+
+    def pool_stats(self) -> dict:
+        """Retorna las estadísticas del pool de conexiones."""
+        return self._pool.stats()
+
+    def initialize(self):
+        """
+        Inicializa la DB, aplicando el esquema si la marca de versión está desactualizada, y precalienta el pool.
+        Con DB_SCHEMA_MODE=skip solo se precalienta el pool: el esquema ya lo aplicó otro proceso
+        (p. ej. el proceso maestro de gunicorn antes de crear los workers, ver gunicorn.conf.py,
+        o migrate.py antes de desplegar las Lambdas).
+        """
+        try:
+            if schema_mode() == 'auto':
+                self.initialize_schema()
+            self.open()
+        except psycopg2.Error as e:
+            print(f"Error al inicializar la base de datos: {e}")
+            raise
+
+    def open(self):
+        """Precalienta el pool sin tocar el esquema (las réplicas de lectura no admiten DDL)."""
+        self._pool.open()
+
+    def initialize_schema(self, force: bool = False):
+        """
+        Crea la tabla 'items' y sus objetos auxiliares si la versión aplicada es anterior a
+        SCHEMA_VERSION (o siempre, con force=True).
+        """
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor:
+                if not force and self._schema_version(cursor) >= SCHEMA_VERSION:
+                    print(f"Esquema de la base de datos al día (versión {SCHEMA_VERSION}).")
+                    return
+                # Todas las sentencias van en una sola query: PostgreSQL las ejecuta en una
+                # transacción implícita, serializada con un advisory lock entre instancias.
+                cursor.execute(SCHEMA_SQL)
+        print("Tabla 'items' verificada/creada exitosamente.")
+
+    @staticmethod
+    def _schema_version(cursor) -> int:
+        """
+        Lee la versión del esquema aplicada (0 si la tabla de la marca aún no existe).
+        Es una consulta trivial, mucho más barata que repetir el DDL en cada arranque.
+        """
+        try:
+            cursor.execute("SELECT version FROM items_schema_version")
+            row = cursor.fetchone()
+        except psycopg2.errors.UndefinedTable:
+            return 0
+        return row[0] if row else 0
+
+    def close(self):
+        """Cierra las conexiones del pool (al apagar el proceso o el worker)."""
+        self._pool.close()
+
+    # --- Operaciones CRUD ---
+    # Las conexiones del pool trabajan en modo autocommit; los errores de conexión
+    # (OperationalError) descartan la conexión afectada dentro de pool.connection() y las
+    # lecturas marcadas con @idempotent se reintentan con otra conexión.
+    def create_item(self, item: Item) -> Item:
+        """4. Inserta un nuevo item (persona) en la tabla 'items'."""
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor:
+                with metrics.phase('sql'):
+                    STATEMENTS.execute(cursor, 'items_insert', (
+                        item.id, 
+                        item.nombre, 
+                        item.apellidos, 
+                        item.numero_telefono, 
+                        item.puesto_trabajo,
+                    ))
+            return item
+    
+    def bulk_upsert_items(self, items: List[Item], upsert: bool = True) -> List[Dict]:
+        """
+        4. Inserta/actualiza varios items en una sola sentencia (execute_values).
+        Si la sentencia conjunta falla por un dato concreto, se reintenta fila a fila
+        para que un único registro erróneo no aborte todo el lote.
+        """
+        if not items:
+            return []
+
+        # xmax = 0 solo en las filas recién insertadas; permite distinguir creadas y actualizadas.
+        sql = """
+            INSERT INTO items (id, nombre, apellidos, numero_telefono, puesto_trabajo)
+            VALUES %s
+        """
+        if upsert:
+            sql += """
+            ON CONFLICT (id) DO UPDATE SET
+                nombre = EXCLUDED.nombre,
+                apellidos = EXCLUDED.apellidos,
+                numero_telefono = EXCLUDED.numero_telefono,
+                puesto_trabajo = EXCLUDED.puesto_trabajo
+            RETURNING id, (xmax = 0) AS inserted
+            """
+        else:
+            sql += " ON CONFLICT (id) DO NOTHING RETURNING id, TRUE AS inserted"
+
+        rows = [
+            (item.id, item.nombre, item.apellidos, item.numero_telefono, item.puesto_trabajo)
+            for item in items
+        ]
+
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor, metrics.phase('sql'):
+                try:
+                    returned = psycopg2.extras.execute_values(
+                        cursor, sql, rows, page_size=len(rows), fetch=True
+                    )
+                    inserted = dict(returned)
+                    errors = {}
+                except (psycopg2.DataError, psycopg2.IntegrityError):
+                    # Modo autocommit: cada fila va en su propia sentencia y los errores no se propagan.
+                    inserted, errors = {}, {}
+                    for row in rows:
+                        try:
+                            result = psycopg2.extras.execute_values(cursor, sql, [row], fetch=True)
+                            inserted.update(dict(result))
+                        except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+                            errors[row[0]] = str(e).strip()
+
+        results = []
+        for item in items:
+            if item.id in errors:
+                results.append({'id': item.id, 'status': 'error', 'details': errors[item.id]})
+            elif item.id not in inserted:
+                results.append({'id': item.id, 'status': 'conflict'})
+            else:
+                results.append({'id': item.id, 'status': 'created' if inserted[item.id] else 'updated'})
+        return results
+    
+    def get_item(self, item_id: str) -> Optional[Item]:
+        """4. Obtiene un item (persona) por su ID (DNI)."""
+        item, _ = self.get_item_with_version(item_id)
+        return item
+    
+    @idempotent
+    def get_item_with_version(self, item_id: str, known_versions: Tuple[int, ...] = ()) -> Tuple[Optional[Item], Optional[int]]:
+        """4. Obtiene un item (persona) y su versión; no construye el Item si el cliente ya tiene esa versión."""
+        with self._pool.connection() as conn:
+            # Cursor de tuplas: las filas ya se validaron al escribirlas y se convierten
+            # directamente con Item.from_row(), sin diccionarios intermedios ni validadores.
+            with conn.cursor() as cursor:
+                with metrics.phase('sql'):
+                    STATEMENTS.execute(cursor, 'items_get', (item_id,))
+                    record = cursor.fetchone()
+                
+                if not record:
+                    return None, None
+                version = record[0]
+                if version in known_versions:
+                    return None, version
+                from models.item import Item
+                with metrics.phase('model'):
+                    item = Item.from_row(record[1:])
+                return item, version
+    
+    @idempotent
+    def get_items_version(self) -> int:
+        """4. Obtiene el contador de cambios de la tabla 'items'."""
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor, metrics.phase('sql'):
+                STATEMENTS.execute(cursor, 'items_version')
+                return cursor.fetchone()[0]
+    
+    @idempotent
+    def get_items_by_ids(self, item_ids: List[str]) -> List[Item]:
+        """
+        4. Obtiene los items de una lista de IDs en una sola consulta (id = ANY(...), resuelta
+        con el índice de la clave primaria). No se prepara, como los listados.
+        """
+        if not item_ids:
+            return []
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor, metrics.phase('sql'):
+                cursor.execute(f"SELECT {ITEM_COLUMNS} FROM items WHERE id = ANY(%s)", (list(item_ids),))
+                records = cursor.fetchall()
+        from models.item import Item
+        with metrics.phase('model'):
+            found = {record[0]: Item.from_row(record) for record in records}
+        return [found[item_id] for item_id in item_ids if item_id in found]
+
+    @idempotent
+    def get_changes(self, since: Optional[int], limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict], int, bool]:
+        """
+        4. Cambios (altas/modificaciones y borrados) con versión mayor que 'since', en orden de
+        versión: cada rama del UNION recorre su índice de versión y solo lee 'limit' + 1 filas.
+        """
+        from models.item import Item
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor, metrics.phase('sql'):
+                if since is None:
+                    cursor.execute(CHANGES_TOKEN_SQL)
+                    return [], cursor.fetchone()[0], False
+                limit = max(1, min(limit, MAX_PAGE_SIZE))
+                cursor.execute(CHANGES_SQL, {'since': since, 'limit': limit + 1})
+                records = cursor.fetchall()
+
+        with metrics.phase('model'):
+            changes = [
+                {'op': op, 'id': record[0], 'version': version, 'changed_at': changed_at.isoformat(),
+                 'item': Item.from_row(record) if op == 'upsert' else None}
+                for version, op, changed_at, *record in records[:limit]
+            ]
+        next_since = changes[-1]['version'] if changes else since
+        return changes, next_since, len(records) > limit
+
+    @idempotent
+    def get_item_stats(self) -> Tuple[Dict[str, int], int]:
+        """4. Número de items (personas) por puesto, de la tabla 'items_stats', y el contador de cambios."""
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor, metrics.phase('sql'):
+                cursor.execute(STATS_SQL)
+                records = cursor.fetchall()
+        return {puesto: total for puesto, total, _ in records if puesto is not None}, records[0][2]
+
+    @idempotent
+    def get_all_items(self) -> List[Item]:
+        """4. Obtiene una lista de todos los items (personas)."""
+        from models.item import Item
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor:
+                sql = f"SELECT {ITEM_COLUMNS} FROM items"
+                cursor.execute(sql)
+                records = cursor.fetchall()
+                
+                return [Item.from_row(row) for row in records]
+    
+    def iter_items(self, chunk_size: int = 2000) -> Iterator[Item]:
+        """
+        4. Recorre todos los items (personas) con un cursor de servidor (named cursor),
+        trayendo 'chunk_size' filas por viaje para mantener la memoria constante.
+        """
+        from models.item import Item
+        with self._pool.connection() as conn:
+            # Los cursores con nombre necesitan una transacción: se desactiva el
+            # autocommit mientras dura el recorrido y se restaura al terminar.
+            conn.autocommit = False
+            try:
+                with conn.cursor('items_export') as cursor:
+                    cursor.itersize = chunk_size
+                    cursor.execute(f"SELECT {ITEM_COLUMNS} FROM items ORDER BY id")
+                    for row in cursor:
+                        yield Item.from_row(row)
+                conn.commit()
+            finally:
+                if not conn.closed:
+                    if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                    conn.autocommit = True
+    
+    @idempotent
+    def get_items_page(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                       puesto_trabajo: Optional[str] = None,
+                       nombre_prefix: Optional[str] = None) -> Tuple[List[Item], Optional[str]]:
+        """4. Obtiene una página de items (personas) ordenada por ID, con filtros opcionales."""
+        from models.item import Item
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        conditions = []
+        params = []
+        if after:
+            conditions.append("id > %s")
+            params.append(after.upper())
+        if puesto_trabajo:
+            conditions.append("puesto_trabajo = %s")
+            params.append(puesto_trabajo)
+        if nombre_prefix:
+            conditions.append("nombre ILIKE %s")
+            params.append(_like_prefix(nombre_prefix))
+
+        sql = f"SELECT {ITEM_COLUMNS} FROM items"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        # Se pide una fila de más para saber si existe una página siguiente.
+        sql += " ORDER BY id LIMIT %s"
+        params.append(limit + 1)
+
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor, metrics.phase('sql'):
+                cursor.execute(sql, params)
+                records = cursor.fetchall()
+
+        with metrics.phase('model'):
+            items = [Item.from_row(row) for row in records[:limit]]
+        next_cursor = items[-1].id if len(records) > limit else None
+        return items, next_cursor
+    
+    @idempotent
+    def search_items(self, text: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0,
+                     puesto_trabajo: Optional[str] = None) -> Tuple[List[Item], Optional[int]]:
+        """4. Busca items (personas) por nombre y apellidos con el índice items_search_idx, ordenados por relevancia."""
+        from models.item import Item
+        query = search_query(text)
+        if query is None:
+            return [], None
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        sql, params = search_sql(query, limit, offset, puesto_trabajo)
+
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor, metrics.phase('sql'):
+                cursor.execute(sql, params)
+                records = cursor.fetchall()
+
+        with metrics.phase('model'):
+            items = [Item.from_row(row) for row in records[:limit]]
+        next_offset = offset + limit if len(records) > limit else None
+        return items, next_offset
+    
+    def update_item(self, item_id: str, item: Item, expected_version: Optional[int] = None) -> Optional[Item]:
+        """4. Actualiza un item (persona) existente por su ID (DNI), opcionalmente solo si tiene la versión esperada."""
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor:
+                params = (
+                    item.nombre, 
+                    item.apellidos, 
+                    item.numero_telefono, 
+                    item.puesto_trabajo,
+                    item_id, # Se usa el ID de la URL
+                    expected_version,
+                )
+                with metrics.phase('sql'):
+                    STATEMENTS.execute(cursor, 'items_update', params)
+                
+                if cursor.rowcount > 0:
+                    # El ID original no se cambia en la actualización.
+                    item.id = item_id 
+                    return item
+                if expected_version is not None:
+                    self._check_version_conflict(cursor, item_id)
+                return None
+    
+    def delete_item(self, item_id: str, expected_version: Optional[int] = None) -> bool:
+        """4. Elimina un item (persona) por su ID (DNI), opcionalmente solo si tiene la versión esperada."""
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor:
+                with metrics.phase('sql'):
+                    STATEMENTS.execute(cursor, 'items_delete', (item_id, expected_version))
+                if cursor.rowcount > 0:
+                    return True
+                if expected_version is not None:
+                    self._check_version_conflict(cursor, item_id)
+                return False
+
+    # --- Escrituras diferidas (ver write_queue.py) ---
+    def apply_write_batch(self, writes: List[Dict]) -> List[Dict]:
+        """
+        4. Aplica un lote de escrituras encoladas en una sola transacción. Cada tramo de altas
+        seguidas es un INSERT de varias filas y cada tramo de actualizaciones un UPDATE ... FROM
+        (VALUES ...); si un dato concreto hace fallar el tramo, se repite fila a fila. Los
+        resultados se guardan en items_write_results dentro de la misma transacción: si la cola
+        entrega el lote otra vez, las escrituras que ya tienen resultado no se repiten (los datos
+        no cambian aunque se hayan modificado después) y se devuelve el resultado guardado.
+        """
+        if not writes:
+            return []
+        with self._pool.connection() as conn:
+            # Transacción explícita mientras dura el lote; se restaura el autocommit al terminar.
+            conn.autocommit = False
+            try:
+                with conn.cursor() as cursor, metrics.phase('sql'):
+                    # Escrituras aplicadas por una entrega anterior: FOR UPDATE espera a que termine
+                    # otra transacción que esté guardando su resultado.
+                    cursor.execute("""
+                        SELECT tracking_id::text, status, details FROM items_write_results
+                        WHERE tracking_id = ANY(%s::uuid[]) FOR UPDATE
+                    """, ([write['tracking_id'] for write in writes],))
+                    statuses = {tracking_id: (status, details) for tracking_id, status, details in cursor.fetchall()}
+                    pending, seen = [], set(statuses)
+                    for write in writes:
+                        # El mismo mensaje dos veces en el lote se aplica una sola vez.
+                        if write['tracking_id'] not in seen:
+                            seen.add(write['tracking_id'])
+                            pending.append(write)
+                    for op, run in itertools.groupby(pending, key=lambda write: write['op']):
+                        run = list(run)
+                        for write, status in zip(run, self._apply_write_run(cursor, op, run)):
+                            statuses[write['tracking_id']] = status
+                    results = []
+                    for write in writes:
+                        status, details = statuses[write['tracking_id']]
+                        results.append({'tracking_id': write['tracking_id'], 'id': write['item'].id,
+                                        'status': status, **({'details': details} if details else {})})
+                    if pending:
+                        psycopg2.extras.execute_values(cursor, """
+                            INSERT INTO items_write_results (tracking_id, op, item_id, status, details)
+                            VALUES %s ON CONFLICT (tracking_id) DO NOTHING
+                        """, [(w['tracking_id'], w['op'], w['item'].id) + statuses[w['tracking_id']]
+                              for w in pending], page_size=len(pending))
+                    cursor.execute(
+                        "DELETE FROM items_write_results WHERE processed_at < now() - make_interval(secs => %s)",
+                        (WRITE_RESULTS_TTL,),
+                    )
+                conn.commit()
+            finally:
+                if not conn.closed:
+                    if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                    conn.autocommit = True
+        return results
+
+    def _apply_write_run(self, cursor, op: str, run: List[Dict]) -> List[Tuple[str, Optional[str]]]:
+        """Aplica un tramo de escrituras de la misma operación; retorna (estado, detalle) de cada una."""
+        apply = self._apply_creates if op == 'create' else self._apply_updates
+        cursor.execute("SAVEPOINT write_run")
+        try:
+            statuses = apply(cursor, run)
+            cursor.execute("RELEASE SAVEPOINT write_run")
+            return statuses
+        except (psycopg2.DataError, psycopg2.IntegrityError):
+            cursor.execute("ROLLBACK TO SAVEPOINT write_run")
+        statuses = []
+        for write in run:
+            cursor.execute("SAVEPOINT write_row")
+            try:
+                statuses.extend(apply(cursor, [write]))
+                cursor.execute("RELEASE SAVEPOINT write_row")
+            except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT write_row")
+                statuses.append(('error', str(e).strip().splitlines()[0]))
+        return statuses
+
+    @staticmethod
+    def _apply_creates(cursor, run: List[Dict]) -> List[Tuple[str, Optional[str]]]:
+        rows = [(w['item'].id, w['item'].nombre, w['item'].apellidos, w['item'].numero_telefono,
+                 w['item'].puesto_trabajo) for w in run]
+        returned = psycopg2.extras.execute_values(cursor, f"""
+            INSERT INTO items ({ITEM_COLUMNS}) VALUES %s
+            ON CONFLICT (id) DO NOTHING RETURNING id
+        """, rows, page_size=len(rows), fetch=True)
+        inserted = {row[0] for row in returned}
+        statuses = []
+        for write in run:
+            # Con el mismo DNI dos veces en el tramo, solo la primera alta lo crea.
+            if write['item'].id in inserted:
+                inserted.discard(write['item'].id)
+                statuses.append(('created', None))
+            else:
+                statuses.append(('conflict', 'Ya existe un item con ese DNI.'))
+        return statuses
+
+    @staticmethod
+    def _apply_updates(cursor, run: List[Dict]) -> List[Tuple[str, Optional[str]]]:
+        # Si un DNI se actualiza varias veces en el tramo, el resultado final es el de la última.
+        latest = {write['item'].id: write['item'] for write in run}
+        rows = [(item.id, item.nombre, item.apellidos, item.numero_telefono, item.puesto_trabajo)
+                for item in latest.values()]
+        returned = psycopg2.extras.execute_values(cursor, """
+            UPDATE items
+            SET nombre = v.nombre, apellidos = v.apellidos,
+                numero_telefono = v.numero_telefono, puesto_trabajo = v.puesto_trabajo
+            FROM (VALUES %s) AS v (id, nombre, apellidos, numero_telefono, puesto_trabajo)
+            WHERE items.id = v.id
+            RETURNING items.id
+        """, rows, template="(%s, %s, %s, %s::varchar, %s)", page_size=len(rows), fetch=True)
+        updated = {row[0] for row in returned}
+        return [('updated', None) if write['item'].id in updated else ('not_found', 'Item no encontrado')
+                for write in run]
+
+    @idempotent
+    def get_write_result(self, tracking_id: str) -> Optional[Dict]:
+        """4. Obtiene el resultado de una escritura diferida por su tracking_id."""
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor, metrics.phase('sql'):
+                cursor.execute("""
+                    SELECT op, item_id, status, details, processed_at
+                    FROM items_write_results WHERE tracking_id = %s
+                """, (tracking_id,))
+                row = cursor.fetchone()
+        if row is None:
+            return None
+        op, item_id, status, details, processed_at = row
+        return {'tracking_id': tracking_id, 'op': op, 'id': item_id, 'status': status,
+                'details': details, 'processed_at': processed_at.isoformat()}
+
+    # --- Claves de idempotencia (ver idempotency.py) ---
+    def claim_idempotency_key(self, key: str, fingerprint: str, ttl: float,
+                              lock_timeout: float) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        4. Reserva una Idempotency-Key para la petición con esta huella. Retorna None si la ha
+        reservado, o la huella y la respuesta (JSON) guardadas con la clave; la respuesta es None
+        mientras otra petición la procesa. No se reintenta: la reserva no es repetible.
+        """
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor, metrics.phase('sql'):
+                cursor.execute(IDEMPOTENCY_CLAIM_SQL, {'key': key, 'fingerprint': fingerprint,
+                                                       'ttl': ttl, 'lock_timeout': lock_timeout})
+                if cursor.fetchone() is not None:
+                    return None
+                cursor.execute(
+                    "SELECT fingerprint, response FROM items_idempotency_keys WHERE idempotency_key = %s", (key,)
+                )
+                row = cursor.fetchone()
+        # Borrada entre las dos sentencias (liberada o caducada): se trata como en curso.
+        return tuple(row) if row is not None else (fingerprint, None)
+
+    def save_idempotent_response(self, key: str, fingerprint: str, response: str, ttl: float):
+        """4. Guarda la respuesta de una Idempotency-Key reservada y borra las claves caducadas."""
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor, metrics.phase('sql'):
+                cursor.execute("""
+                    UPDATE items_idempotency_keys SET response = %s
+                    WHERE idempotency_key = %s AND fingerprint = %s AND response IS NULL
+                """, (response, key, fingerprint))
+                cursor.execute(
+                    "DELETE FROM items_idempotency_keys WHERE created_at < now() - make_interval(secs => %s)",
+                    (ttl,),
+                )
+
+    def release_idempotency_key(self, key: str):
+        """4. Libera una Idempotency-Key sin respuesta (la petición falló) para que se pueda reintentar."""
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor, metrics.phase('sql'):
+                cursor.execute(
+                    "DELETE FROM items_idempotency_keys WHERE idempotency_key = %s AND response IS NULL", (key,)
+                )
+
+    def _check_version_conflict(self, cursor, item_id: str):
+        """Tras una escritura condicionada sin filas afectadas, distingue 'no existe' de 'otra versión'."""
+        cursor.execute("SELECT 1 FROM items WHERE id = %s", (item_id,))
+        if cursor.fetchone():
+            raise VersionMismatchError(f"El item {item_id} ha sido modificado por otro cliente.")
@@ -0,0 +1,89 @@
+"""
+Sentencias preparadas (PREPARE/EXECUTE) de las operaciones CRUD más frecuentes.
+
+Cada sentencia se prepara una sola vez por conexión, la primera vez que se usa en ella, y las
+siguientes ejecuciones solo envían 'EXECUTE nombre(parámetros)': PostgreSQL no vuelve a analizar
+ni planificar la consulta (tras cinco ejecuciones pasa a reutilizar un plan genérico).
+
+- Las sentencias preparadas viven en la sesión de PostgreSQL: una conexión nueva (reconexión,
+  reciclado del pool) empieza sin ninguna y se preparan de nuevo en su primer uso.
+- Si la sesión las pierde sin que cambie la conexión (DISCARD ALL, un proxy que cambia la
+  conexión de BD de una sesión no fijada) o un cambio de esquema invalida su plan, se vuelven
+  a preparar y la sentencia se reintenta una vez (solo en modo autocommit, donde el error no
+  deja ninguna transacción abortada).
+- Un PREPARE fija (pinning) la conexión del cliente a su conexión de BD en un RDS Proxy y no
+  funciona con poolers en modo transacción (PgBouncer): con DB_PREPARED_STATEMENTS=false las
+  mismas sentencias se ejecutan como consultas normales.
+"""
+import os
+import re
+import threading
+import weakref
+from typing import Dict, Sequence
+
+import psycopg2
+import psycopg2.errors
+
+ENABLED = os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() in ('1', 'true', 'yes', 'on')
+
+_PARAM = re.compile(r'\$(\d+)')
+
+
+class PreparedStatements:
+    """
+    Conjunto de sentencias con nombre (SQL con parámetros $1, $2...) que se preparan
+    de forma perezosa en cada conexión en la que se ejecutan.
+    """
+
+    def __init__(self, statements: Dict[str, str], enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.statements = statements
+        self._execute_sql = {}
+        self._plain_sql = {}
+        for name, sql in statements.items():
+            arity = max((int(n) for n in _PARAM.findall(sql)), default=0)
+            args = ', '.join(['%s'] * arity)
+            self._execute_sql[name] = f"EXECUTE {name}({args})" if arity else f"EXECUTE {name}"
+            # Texto equivalente con parámetros de psycopg2 para DB_PREPARED_STATEMENTS=false
+            self._plain_sql[name] = _PARAM.sub(r'%(\1)s', sql)
+        # Nombres ya preparados en cada conexión; se olvidan solos cuando la conexión desaparece
+        self._prepared = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def execute(self, cursor, name: str, params: Sequence = ()):
+        """Ejecuta la sentencia 'name' en el cursor, preparándola antes si la conexión aún no la tiene."""
+        if not self.enabled:
+            cursor.execute(self._plain_sql[name], {str(i): value for i, value in enumerate(params, 1)})
+            return
+
+        conn = cursor.connection
+        with self._lock:
+            prepared = self._prepared.setdefault(conn, set())
+        if name not in prepared:
+            self._prepare(cursor, name, prepared)
+        try:
+            cursor.execute(self._execute_sql[name], params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # La sesión ya no tiene la sentencia: se olvidan todas las de la conexión
+            if not conn.autocommit:
+                raise
+            prepared.clear()
+            self._prepare(cursor, name, prepared)
+            cursor.execute(self._execute_sql[name], params)
+        except psycopg2.errors.FeatureNotSupported as e:
+            # "cached plan must not change result type": el esquema cambió tras el PREPARE
+            if not conn.autocommit or 'cached plan' not in str(e):
+                raise
+            cursor.execute(f"DEALLOCATE {name}")
+            prepared.discard(name)
+            self._prepare(cursor, name, prepared)
+            cursor.execute(self._execute_sql[name], params)
+
+    def _prepare(self, cursor, name: str, prepared: set):
+        try:
+            cursor.execute(f"PREPARE {name} AS {self.statements[name]}")
+        except psycopg2.errors.DuplicatePreparedStatement:
+            # Ya existía en la sesión (p. ej. otra instancia con las mismas sentencias la preparó)
+            if not cursor.connection.autocommit:
+                raise
+        prepared.add(name)
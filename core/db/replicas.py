@@ -0,0 +1,248 @@
+"""
+Réplicas de lectura: reparte las lecturas entre una o varias réplicas de PostgreSQL y envía
+las escrituras al primario.
+
+Se activa con DATABASE_REPLICA_URLS (DSNs separados por comas) o DB_REPLICA_HOSTS (hosts
+'host[:puerto]' separados por comas, con el mismo DB_USER, DB_PASS y DB_NAME que el primario),
+o pasando 'replica_dsns' a DatabaseFactory.create(). Cada réplica tiene su propio pool y su
+propio cortocircuito; si una réplica no está disponible, la lectura se hace en el primario.
+
+Read-your-writes: las réplicas van con retraso respecto al primario, así que durante
+DB_READ_YOUR_WRITES segundos (5 por defecto, 0 lo desactiva) después de una escritura las
+lecturas del mismo contexto van al primario. El contexto es una ContextVar: en Flask se reinicia
+al empezar cada petición (start_request()), en la variante asíncrona cada petición es una tarea
+distinta y en una Lambda es el contenedor, que atiende una invocación detrás de otra.
+"""
+from __future__ import annotations
+
+import contextvars
+import itertools
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extensions
+
+from .db import Database, DEFAULT_PAGE_SIZE
+from .pool import ConnectionPool
+from .postgres_db import PostgresDatabase, connect_dsn
+from .resilience import CircuitOpenError, DatabaseUnavailable
+
+if TYPE_CHECKING:
+    from models.item import Item
+
+REPLICA_POLICIES = ('round_robin', 'least_connections')
+
+# Instante (time.monotonic) de la última escritura del contexto actual.
+_last_write = contextvars.ContextVar('db_last_write', default=None)
+
+
+def start_request():
+    """Empieza un contexto sin escrituras (al inicio de cada petición); devuelve el token para end_request()."""
+    return _last_write.set(None)
+
+
+def end_request(token):
+    """Restaura el contexto anterior a start_request()."""
+    _last_write.reset(token)
+
+
+def replica_dsns_from_env() -> List[str]:
+    """DSNs de las réplicas según DATABASE_REPLICA_URLS o DB_REPLICA_HOSTS (lista vacía si no hay)."""
+    urls = os.getenv('DATABASE_REPLICA_URLS')
+    if urls:
+        return [url.strip() for url in urls.split(',') if url.strip()]
+    hosts = os.getenv('DB_REPLICA_HOSTS')
+    if not hosts:
+        return []
+    dsns = []
+    for entry in hosts.split(','):
+        host, _, port = entry.strip().partition(':')
+        if host:
+            dsns.append(psycopg2.extensions.make_dsn(
+                host=host, port=port or None, user=os.getenv('DB_USER'),
+                password=os.getenv('DB_PASS'), dbname=os.getenv('DB_NAME'),
+            ))
+    return dsns
+
+
+def replicas_from_dsns(dsns: List[str]) -> List[PostgresDatabase]:
+    """Crea una PostgresDatabase (con su pool DB_POOL_* y su cortocircuito) por réplica."""
+    return [
+        PostgresDatabase(pool=ConnectionPool.from_env(connect_dsn(dsn), name=f"replica-{index}"))
+        for index, dsn in enumerate(dsns)
+    ]
+
+
+class ReplicatedDatabase(Database):
+    """
+    Decorador de una Database que envía las escrituras y el esquema al primario y las lecturas
+    a las réplicas, elegidas por turnos ('round_robin') o por la que tenga menos conexiones en
+    uso ('least_connections', con empate resuelto por turnos).
+    """
+
+    def __init__(self, primary: PostgresDatabase, replicas: List[PostgresDatabase],
+                 policy: str = 'round_robin', read_your_writes: float = 5.0):
+        if not replicas:
+            raise ValueError("ReplicatedDatabase necesita al menos una réplica.")
+        if policy not in REPLICA_POLICIES:
+            raise ValueError(f"DB_REPLICA_POLICY '{policy}' no es compatible (round_robin o least_connections).")
+        self._primary = primary
+        self._replicas = replicas
+        self.policy = policy
+        self.read_your_writes = read_your_writes
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = {'replica_reads': 0, 'primary_reads': 0, 'fallbacks': 0}
+
+    @classmethod
+    def from_env(cls, primary: PostgresDatabase, replica_dsns: List[str]) -> 'ReplicatedDatabase':
+        """Crea el enrutado con DB_REPLICA_POLICY y DB_READ_YOUR_WRITES."""
+        return cls(
+            primary,
+            replicas_from_dsns(replica_dsns),
+            policy=os.getenv('DB_REPLICA_POLICY', 'round_robin').lower(),
+            read_your_writes=float(os.getenv('DB_READ_YOUR_WRITES', '5')),
+        )
+
+    def __getattr__(self, name):
+        # Delega el resto de métodos (p. ej. initialize_schema) en el primario.
+        return getattr(self._primary, name)
+
+    def initialize(self):
+        """Inicializa el primario (esquema incluido) y precalienta las réplicas que respondan."""
+        self._primary.initialize()
+        for index, replica in enumerate(self._replicas):
+            try:
+                replica.open()
+            except psycopg2.Error as e:
+                # No impide arrancar: sus lecturas irán al primario mientras no responda.
+                print(f"AVISO: La réplica {index} no está disponible: {e}")
+
+    def primary_database(self) -> PostgresDatabase:
+        return self._primary
+
+    def close(self):
+        self._primary.close()
+        for replica in self._replicas:
+            replica.close()
+
+    def pool_stats(self) -> dict:
+        """Estadísticas del pool del primario, de cada réplica y del reparto de lecturas."""
+        with self._lock:
+            routing = {'policy': self.policy, **self._stats}
+        return {
+            **self._primary.pool_stats(),
+            'replicas': [replica.pool_stats() for replica in self._replicas],
+            'routing': routing,
+        }
+
+    # --- Enrutado ---
+    def _pick_replica(self) -> PostgresDatabase:
+        start = next(self._turn) % len(self._replicas)
+        candidates = self._replicas[start:] + self._replicas[:start]
+        if self.policy == 'least_connections':
+            return min(candidates, key=lambda replica: replica.pool_stats()['in_use'])
+        return candidates[0]
+
+    def _wrote_recently(self) -> bool:
+        last_write = _last_write.get()
+        return last_write is not None and time.monotonic() - last_write < self.read_your_writes
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _read(self, method: str, *args, **kwargs):
+        if self._wrote_recently():
+            self._count('primary_reads')
+            return getattr(self._primary, method)(*args, **kwargs)
+        try:
+            result = getattr(self._pick_replica(), method)(*args, **kwargs)
+            self._count('replica_reads')
+            return result
+        except DatabaseUnavailable as e:
+            if not isinstance(e, CircuitOpenError):  # Con el cortocircuito abierto ya se avisó al abrirlo
+                print(f"AVISO: Réplica no disponible, se lee del primario: {e}")
+            self._count('fallbacks')
+            return getattr(self._primary, method)(*args, **kwargs)
+
+    def _write(self, method: str, *args, **kwargs):
+        try:
+            return getattr(self._primary, method)(*args, **kwargs)
+        finally:
+            # También si falla: puede haberse aplicado aunque se perdiera la respuesta.
+            _last_write.set(time.monotonic())
+
+    # --- Operaciones CRUD ---
+    def create_item(self, item: Item) -> Item:
+        return self._write('create_item', item)
+
+    def bulk_upsert_items(self, items: List[Item], upsert: bool = True) -> List[Dict]:
+        return self._write('bulk_upsert_items', items, upsert=upsert)
+
+    def get_item(self, item_id: str) -> Optional[Item]:
+        item, _ = self.get_item_with_version(item_id)
+        return item
+
+    def get_item_with_version(self, item_id: str, known_versions: Tuple[int, ...] = ()) -> Tuple[Optional[Item], Optional[int]]:
+        return self._read('get_item_with_version', item_id, known_versions)
+
+    def get_items_version(self) -> int:
+        return self._read('get_items_version')
+
+    def get_all_items(self) -> List[Item]:
+        return self._read('get_all_items')
+
+    def iter_items(self, chunk_size: int = 2000) -> Iterator[Item]:
+        # Generador: la conexión se pide al recorrerlo, así que no hay vuelta atrás al primario.
+        target = self._primary if self._wrote_recently() else self._pick_replica()
+        return target.iter_items(chunk_size=chunk_size)
+
+    def get_items_page(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                       puesto_trabajo: Optional[str] = None,
+                       nombre_prefix: Optional[str] = None) -> Tuple[List[Item], Optional[str]]:
+        return self._read('get_items_page', limit=limit, after=after, puesto_trabajo=puesto_trabajo,
+                          nombre_prefix=nombre_prefix)
+
+    def search_items(self, text: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0,
+                     puesto_trabajo: Optional[str] = None) -> Tuple[List[Item], Optional[int]]:
+        return self._read('search_items', text, limit=limit, offset=offset, puesto_trabajo=puesto_trabajo)
+
+    def get_items_by_ids(self, item_ids: List[str]) -> List[Item]:
+        return self._read('get_items_by_ids', item_ids)
+
+    def get_changes(self, since: Optional[int], limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict], int, bool]:
+        # Una réplica aplica los commits en orden: su feed es un prefijo del del primario.
+        return self._read('get_changes', since, limit=limit)
+
+    def get_item_stats(self) -> Tuple[Dict[str, int], int]:
+        # La réplica aplica también las filas de items_stats que escriben los triggers.
+        return self._read('get_item_stats')
+
+    def update_item(self, item_id: str, item: Item, expected_version: Optional[int] = None) -> Optional[Item]:
+        return self._write('update_item', item_id, item, expected_version=expected_version)
+
+    def delete_item(self, item_id: str, expected_version: Optional[int] = None) -> bool:
+        return self._write('delete_item', item_id, expected_version=expected_version)
+
+    def apply_write_batch(self, writes: List[Dict]) -> List[Dict]:
+        return self._write('apply_write_batch', writes)
+
+    # Las claves de idempotencia van siempre al primario, sin contar como escritura propia
+    # (read-your-writes): no cambian los items.
+    def claim_idempotency_key(self, key: str, fingerprint: str, ttl: float,
+                              lock_timeout: float) -> Optional[Tuple[str, Optional[str]]]:
+        return self._primary.claim_idempotency_key(key, fingerprint, ttl=ttl, lock_timeout=lock_timeout)
+
+    def save_idempotent_response(self, key: str, fingerprint: str, response: str, ttl: float):
+        self._primary.save_idempotent_response(key, fingerprint, response, ttl=ttl)
+
+    def release_idempotency_key(self, key: str):
+        self._primary.release_idempotency_key(key)
+
+    def get_write_result(self, tracking_id: str) -> Optional[Dict]:
+        # Del primario: quien consulta el estado suele hacerlo justo después de que se aplique.
+        return self._primary.get_write_result(tracking_id)
@@ -0,0 +1,135 @@
+"""
+Tolerancia a fallos de la conexión con PostgreSQL: reintentos con espera exponencial y
+jitter, y un cortocircuito (circuit breaker) que hace fallar rápido mientras la base de
+datos no responde.
+
+Lo usa ConnectionPool al abrir conexiones nuevas. Sin el cortocircuito, con la base de datos
+caída cada petición (o invocación de Lambda) esperaría el 'connect_timeout' de todos sus
+reintentos antes de responder 503; con él, tras 'failure_threshold' aperturas fallidas
+seguidas las siguientes fallan al instante durante 'reset_timeout' segundos. Pasado ese
+tiempo se deja pasar una sola apertura de prueba (estado 'half_open'): si funciona el
+circuito se cierra y si no se vuelve a abrir.
+"""
+import os
+import random
+import threading
+import time
+from typing import Iterator
+
+import psycopg2
+
+
+class DatabaseUnavailable(psycopg2.OperationalError):
+    """
+    No se ha podido abrir una conexión tras agotar los reintentos.
+    Hereda de OperationalError para que los endpoints lo traten como un 503.
+    """
+
+
+class CircuitOpenError(DatabaseUnavailable):
+    """Se lanza sin intentar conectar mientras el cortocircuito está abierto."""
+
+
+def backoff_delays(retries: int, base: float, cap: float) -> Iterator[float]:
+    """
+    Esperas antes de cada reintento: exponencial (base, 2*base, 4*base...) limitada a 'cap',
+    con jitter completo (un valor aleatorio entre 0 y ese límite) para que los procesos que
+    fallan a la vez no reintenten todos en el mismo instante.
+    """
+    for attempt in range(retries):
+        yield random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Cortocircuito seguro entre hilos con los estados 'closed', 'open' y 'half_open'.
+
+    - before_call() lanza CircuitOpenError si está abierto (o si ya hay una prueba en curso).
+    - record_success() lo cierra y record_failure() cuenta un fallo (y lo abre al llegar al umbral).
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        if failure_threshold < 1:
+            raise ValueError(f"Umbral de fallos inválido ({failure_threshold}).")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None   # Instante (monotonic) en que se abrió; None si está cerrado
+        self._probing = False    # Hay una apertura de prueba en curso (half_open)
+        self._stats = {'opened': 0, 'rejected': 0}
+
+    @classmethod
+    def from_env(cls) -> 'CircuitBreaker':
+        """Crea el cortocircuito leyendo DB_BREAKER_THRESHOLD y DB_BREAKER_RESET."""
+        return cls(
+            failure_threshold=int(os.getenv('DB_BREAKER_THRESHOLD', '3')),
+            reset_timeout=float(os.getenv('DB_BREAKER_RESET', '30')),
+        )
+
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def before_call(self):
+        """Comprueba si se puede intentar conectar; en half_open solo deja pasar una prueba."""
+        with self._lock:
+            state = self._state_locked()
+            if state == 'closed':
+                return
+            if state == 'half_open' and not self._probing:
+                self._probing = True
+                return
+            self._stats['rejected'] += 1
+            remaining = max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+        raise CircuitOpenError(
+            f"Base de datos no disponible: cortocircuito abierto tras {self.failure_threshold} "
+            f"fallos de conexión seguidos (siguiente intento en {remaining:.0f}s)."
+        )
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    self._stats['opened'] += 1
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'circuit_state': self._state_locked(),
+                'circuit_failures': self._failures,
+                'circuit_opened': self._stats['opened'],
+                'circuit_rejected': self._stats['rejected'],
+            }
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+
+# Cortocircuitos del proceso, uno por destino ('primary' y cada réplica, ver replicas.py),
+# compartidos por todos los pools creados con from_env(): el estado de una base de datos es el
+# mismo para todos y, en una Lambda, así sobrevive a los reintentos de DatabaseFactory.get_instance(),
+# que crea un pool nuevo si la inicialización falla.
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str = 'primary') -> CircuitBreaker:
+    """Cortocircuito del proceso para el destino 'name' (se crea en el primer uso con la configuración del entorno)."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker.from_env()
+        return _breakers[name]
@@ -0,0 +1,146 @@
+"""
+Codificadores JSON de las respuestas con items, comunes a ambas arquitecturas.
+
+Los items se codifican directamente a bytes, sin pasar por model_dump() ni por el codificador
+JSON de la librería estándar:
+- 'pydantic' (por defecto): TypeAdapter de pydantic-core (dump_json, implementado en Rust).
+- 'orjson': el paquete opcional orjson (hay que añadirlo a requirements.txt).
+Se elige con JSON_BACKEND.
+
+Cada arquitectura decide qué hace con los bytes (ver su serialization.py): Acoplada los
+comprime según Accept-Encoding y las Lambdas los devuelven como texto a API Gateway.
+pydantic y el modelo se importan al crear el codificador, no al importar este módulo, para
+no cargarlos en el arranque en frío de las Lambdas que no los usan.
+"""
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from models.item import Item
+
+
+class PydanticEncoder:
+    """Codifica con los serializadores de pydantic-core (sin diccionarios intermedios)."""
+
+    name = 'pydantic'
+
+    def __init__(self):
+        from pydantic import TypeAdapter
+        from typing_extensions import TypedDict  # pydantic exige esta versión en Python < 3.12
+        from models.item import Item
+
+        class ItemsPage(TypedDict):
+            """Cuerpo de GET /items."""
+            items: List[Item]
+            next_cursor: Optional[str]
+
+        class SearchPage(TypedDict):
+            """Cuerpo de GET /items/search."""
+            items: List[Item]
+            next_offset: Optional[int]
+
+        class Lookup(TypedDict):
+            """Cuerpo de POST /items/lookup."""
+            items: List[Item]
+            missing: List[str]
+
+        class Change(TypedDict):
+            """Un cambio del feed (ver Database.get_changes)."""
+            op: str
+            id: str
+            version: int
+            changed_at: str
+            item: Optional[Item]
+
+        class Changes(TypedDict):
+            """Cuerpo de GET /items/changes."""
+            changes: List[Change]
+            next_since: int
+            has_more: bool
+
+        self._item = TypeAdapter(Item)
+        self._page = TypeAdapter(ItemsPage)
+        self._search_page = TypeAdapter(SearchPage)
+        self._lookup = TypeAdapter(Lookup)
+        self._change = TypeAdapter(Change)
+        self._changes = TypeAdapter(Changes)
+
+    def item(self, item: Item) -> bytes:
+        return self._item.dump_json(item)
+
+    def page(self, items: List[Item], next_cursor: Optional[str]) -> bytes:
+        return self._page.dump_json({'items': items, 'next_cursor': next_cursor})
+
+    def search_page(self, items: List[Item], next_offset: Optional[int]) -> bytes:
+        return self._search_page.dump_json({'items': items, 'next_offset': next_offset})
+
+    def lookup(self, items: List[Item], missing: List[str]) -> bytes:
+        return self._lookup.dump_json({'items': items, 'missing': missing})
+
+    def change(self, change: Dict) -> bytes:
+        return self._change.dump_json(change)
+
+    def changes(self, changes: List[Dict], next_since: int, has_more: bool) -> bytes:
+        return self._changes.dump_json({'changes': changes, 'next_since': next_since, 'has_more': has_more})
+
+
+class OrjsonEncoder:
+    """Codifica con orjson; los items se pasan como su __dict__ (solo contiene los campos del modelo)."""
+
+    name = 'orjson'
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError as e:
+            raise ValueError("JSON_BACKEND=orjson requiere el paquete 'orjson' (pip install orjson).") from e
+        from models.item import Item
+        self._dumps = orjson.dumps
+        self._item_type = Item
+
+    def _fields(self, obj):
+        if isinstance(obj, self._item_type):
+            return obj.__dict__
+        raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+    def item(self, item: Item) -> bytes:
+        return self._dumps(item.__dict__)
+
+    def page(self, items: List[Item], next_cursor: Optional[str]) -> bytes:
+        return self._dumps({'items': items, 'next_cursor': next_cursor}, default=self._fields)
+
+    def search_page(self, items: List[Item], next_offset: Optional[int]) -> bytes:
+        return self._dumps({'items': items, 'next_offset': next_offset}, default=self._fields)
+
+    def lookup(self, items: List[Item], missing: List[str]) -> bytes:
+        return self._dumps({'items': items, 'missing': missing}, default=self._fields)
+
+    def change(self, change: Dict) -> bytes:
+        return self._dumps(change, default=self._fields)
+
+    def changes(self, changes: List[Dict], next_since: int, has_more: bool) -> bytes:
+        return self._dumps({'changes': changes, 'next_since': next_since, 'has_more': has_more},
+                           default=self._fields)
+
+
+def encoder_from_env():
+    """Crea el codificador indicado por JSON_BACKEND ('pydantic' por defecto u 'orjson')."""
+    backend = os.getenv('JSON_BACKEND', 'pydantic').lower()
+    if backend == 'pydantic':
+        return PydanticEncoder()
+    if backend == 'orjson':
+        return OrjsonEncoder()
+    raise ValueError(f"JSON_BACKEND '{backend}' no es compatible (pydantic u orjson).")
+
+
+_encoder = None
+
+
+def get_encoder():
+    """Codificador del proceso (se crea en la primera llamada y se reutiliza en las siguientes)."""
+    global _encoder
+    if _encoder is None:
+        _encoder = encoder_from_env()
+    return _encoder
@@ -0,0 +1,63 @@
+"""
+ETags (versión de la fila o contador de cambios de la tabla) y lectura de las cabeceras
+condicionales If-None-Match / If-Match, comunes a Acoplada (main.py y asgi.py) y a los
+handlers Lambda de Desacoplada.
+
+Las ETags son la versión entre comillas, fuerte o débil ('W/"42"'): la débil es la que queda
+cuando un proxy o el servidor comprimen el cuerpo, y se compara igual.
+
+'If-Match: *' se cumple con cualquier versión, pero solo si el item existe (RFC 9110, 13.1.1):
+la escritura no compara versión y, si no había fila, responde 412 en lugar de 404.
+"""
+import re
+from typing import Optional, Tuple, Union
+
+from db.db import VersionMismatchError
+
+ETAG_PATTERN = re.compile(r'(?:W/)?"(\d+)"')
+
+# Valor de expected_version() con 'If-Match: *'.
+ANY_VERSION = '*'
+
+
+def get_header(event, name):
+    """Lee una cabecera de un evento de API Gateway sin distinguir mayúsculas/minúsculas."""
+    headers = event.get('headers') or {}
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def etag_versions(value) -> Tuple[int, ...]:
+    """Convierte las ETags de una cabecera If-None-Match/If-Match en versiones numéricas."""
+    return tuple(int(version) for version in ETAG_PATTERN.findall(value or ''))
+
+
+def expected_version(value) -> Union[int, str, None]:
+    """
+    Versión exigida por una cabecera If-Match: None si no hay cabecera, ANY_VERSION si es '*' y
+    -1 si no es una versión válida (ninguna fila la tiene, así que la escritura responde 412).
+    La versión se pasa a update_item/delete_item con write_version().
+    Lanza ValueError si trae varias ETags: la escritura condicionada compara una sola versión,
+    y responder 412 cuando la actual es otra de la lista sería incorrecto.
+    """
+    if not value:
+        return None
+    if value.strip() == '*':
+        return ANY_VERSION
+    if len([tag for tag in value.split(',') if tag.strip()]) > 1:
+        raise ValueError("If-Match admite una sola ETag.")
+    versions = etag_versions(value)
+    return versions[0] if versions else -1
+
+
+def write_version(version) -> Optional[int]:
+    """'expected_version' de update_item/delete_item: con ANY_VERSION no se compara la versión."""
+    return None if version == ANY_VERSION else version
+
+
+def check_exists(version, found, item_id: str):
+    """Con 'If-Match: *', una escritura que no encontró el item no cumple la precondición (412)."""
+    if version == ANY_VERSION and not found:
+        raise VersionMismatchError(f"El item {item_id} no existe (If-Match: *).")
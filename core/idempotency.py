@@ -0,0 +1,232 @@
+"""
+Claves de idempotencia (cabecera Idempotency-Key) para POST /items y PUT /items/<id>.
+
+Cuando API Gateway, el NLB o el propio cliente reintentan una escritura que agotó su tiempo,
+el reintento llega con la misma Idempotency-Key y recibe la respuesta guardada de la primera
+ejecución (con la cabecera Idempotent-Replayed: true) sin validar ni tocar 'items' otra vez:
+un alta repetida devuelve su 201 y no un 409, y un PUT no se vuelve a aplicar. Con la cola de
+escrituras, el reintento recibe el mismo tracking_id en lugar de encolar otra escritura.
+
+Cada clave se asocia a la huella de la petición (método, ruta y cuerpo). Reutilizarla con otra
+petición responde 422; si la primera ejecución aún no ha terminado, el reintento recibe 409 y
+puede volver a intentarlo. Solo se guardan las respuestas definitivas (códigos < 500): tras un
+error del servidor la clave se libera y el reintento se ejecuta de nuevo.
+
+Almacenes disponibles (IDEMPOTENCY_BACKEND; 'none' por defecto, sin idempotencia):
+- 'memory': en memoria del proceso, con LRU (IDEMPOTENCY_MAX_SIZE). Cada worker de gunicorn y
+  cada contenedor Lambda tiene el suyo, así que solo absorbe los reintentos que vuelven al mismo.
+- 'postgres': tabla 'items_idempotency_keys' (ver SCHEMA_SQL), compartida por todos los procesos.
+
+Las claves caducan a los IDEMPOTENCY_TTL segundos (24 h por defecto). Una clave reservada por
+una petición que no terminó (el proceso murió) se libera pasados IDEMPOTENCY_LOCK_TIMEOUT (60).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# Cabeceras propias de la respuesta que se guardan con ella (las de CORS las añade cada endpoint).
+STORED_HEADERS = ('Content-Type', 'ETag', 'Location')
+
+
+class IdempotencyKeyInUse(Exception):
+    """La primera petición con esta clave aún se está procesando (409)."""
+
+
+class IdempotencyKeyReused(Exception):
+    """La clave ya se usó con otra petición (otro método, ruta o cuerpo) (422)."""
+
+
+def validate_key(value: str) -> str:
+    """Comprueba la cabecera Idempotency-Key (ValueError si está vacía o es demasiado larga)."""
+    value = value.strip()
+    if not value or len(value) > MAX_KEY_LENGTH:
+        raise ValueError(f"La cabecera {HEADER} debe tener entre 1 y {MAX_KEY_LENGTH} caracteres.")
+    return value
+
+
+def request_fingerprint(method: str, path: str, body) -> str:
+    """Huella (SHA-256) de la petición: un reintento legítimo repite método, ruta y cuerpo."""
+    digest = hashlib.sha256(f"{method.upper()} {path}\n".encode())
+    digest.update(body.encode() if isinstance(body, str) else (body or b''))
+    return digest.hexdigest()
+
+
+def _stored_response(fingerprint: str, stored_fingerprint: str, response: Optional[Dict]) -> Dict:
+    if stored_fingerprint != fingerprint:
+        raise IdempotencyKeyReused(f"La {HEADER} ya se usó con otra petición.")
+    if response is None:
+        raise IdempotencyKeyInUse(f"La petición con esta {HEADER} aún se está procesando.")
+    return response
+
+
+class MemoryIdempotencyStore:
+    """Almacén en memoria del proceso, seguro entre hilos, con TTL y tamaño máximo (LRU)."""
+
+    name = 'memory'
+
+    def __init__(self, ttl: float = 86400.0, lock_timeout: float = 60.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.max_size = max_size
+        self._data = OrderedDict()  # clave -> (reservada_en, huella, respuesta o None)
+        self._lock = threading.Lock()
+
+    def claim(self, key: str, fingerprint: str) -> Optional[Dict]:
+        """Reserva la clave (retorna None) o retorna la respuesta guardada."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                claimed_at, stored_fingerprint, response = entry
+                expired = now - claimed_at >= (self.ttl if response is not None else self.lock_timeout)
+                if not expired:
+                    self._data.move_to_end(key)
+                    return _stored_response(fingerprint, stored_fingerprint, response)
+            self._data[key] = (now, fingerprint, None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+            return None
+
+    def save(self, key: str, fingerprint: str, response: Dict):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] == fingerprint:
+                self._data[key] = (entry[0], fingerprint, response)
+
+    def release(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[2] is None:
+                del self._data[key]
+
+
+class DatabaseIdempotencyStore:
+    """
+    Almacén en la tabla 'items_idempotency_keys' (Database.claim_idempotency_key y siguientes).
+    'get_db' devuelve la base de datos al usarla: en las Lambdas la conexión se abre en la
+    primera invocación (DatabaseFactory.get_instance).
+    """
+
+    name = 'postgres'
+
+    def __init__(self, get_db: Callable, ttl: float = 86400.0, lock_timeout: float = 60.0):
+        self._get_db = get_db
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+
+    def claim(self, key: str, fingerprint: str) -> Optional[Dict]:
+        stored = self._get_db().claim_idempotency_key(key, fingerprint, ttl=self.ttl, lock_timeout=self.lock_timeout)
+        if stored is None:
+            return None
+        stored_fingerprint, response = stored
+        return _stored_response(fingerprint, stored_fingerprint, json.loads(response) if response else None)
+
+    def save(self, key: str, fingerprint: str, response: Dict):
+        self._get_db().save_idempotent_response(key, fingerprint, json.dumps(response), ttl=self.ttl)
+
+    def release(self, key: str):
+        self._get_db().release_idempotency_key(key)
+
+
+def store_from_env(get_db: Callable):
+    """
+    Crea el almacén indicado por IDEMPOTENCY_BACKEND ('none' por defecto, 'memory' o 'postgres').
+    Devuelve None con 'none': la cabecera Idempotency-Key se ignora.
+    """
+    backend = os.getenv('IDEMPOTENCY_BACKEND', 'none').lower()
+    ttl = float(os.getenv('IDEMPOTENCY_TTL', '86400'))
+    lock_timeout = float(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', '60'))
+    if backend == 'none':
+        return None
+    if backend == 'memory':
+        return MemoryIdempotencyStore(ttl=ttl, lock_timeout=lock_timeout,
+                                      max_size=int(os.getenv('IDEMPOTENCY_MAX_SIZE', '10000')))
+    if backend == 'postgres':
+        return DatabaseIdempotencyStore(get_db, ttl=ttl, lock_timeout=lock_timeout)
+    raise ValueError(f"IDEMPOTENCY_BACKEND '{backend}' no es compatible (none, memory o postgres).")
+
+
+_store = None
+_store_loaded = False
+
+
+def get_store(get_db: Callable):
+    """Almacén del proceso (None si está desactivado); se crea en la primera llamada."""
+    global _store, _store_loaded
+    if not _store_loaded:
+        _store = store_from_env(get_db)
+        _store_loaded = True
+    return _store
+
+
+def run_once(store, key: str, fingerprint: str, run: Callable[[], Dict]) -> Tuple[Dict, bool]:
+    """
+    Ejecuta run() una sola vez por clave. Las respuestas tienen la forma de la integración proxy
+    de API Gateway ({'statusCode', 'headers', 'body'}). Retorna la respuesta y si es una
+    repetición de la guardada. Lanza IdempotencyKeyInUse o IdempotencyKeyReused.
+    """
+    stored = store.claim(key, fingerprint)
+    if stored is not None:
+        return stored, True
+    try:
+        response = run()
+    except BaseException:
+        store.release(key)
+        raise
+    try:
+        if response['statusCode'] < 500:
+            headers = response.get('headers') or {}
+            store.save(key, fingerprint, {
+                'statusCode': response['statusCode'],
+                'headers': {name: value for name, value in headers.items() if name in STORED_HEADERS},
+                'body': response.get('body') or '',
+            })
+        else:
+            store.release(key)
+    except Exception as e:
+        # La escritura ya está hecha: se responde igual. Un reintento esperará a que caduque la reserva.
+        print(f"AVISO: No se pudo guardar la respuesta de la {HEADER}: {e}")
+    return response, False
+
+
+def lambda_response(event: Dict, run: Callable[[], Dict], cors_headers: Dict, get_db: Callable) -> Dict:
+    """
+    Atiende una invocación de la integración proxy con run() (el handler sin idempotencia) si
+    no trae Idempotency-Key o el almacén está desactivado, o una sola vez por clave si la trae.
+    """
+    headers = event.get('headers') or {}
+    key = next((value for name, value in headers.items() if name.lower() == HEADER.lower()), None)
+    store = get_store(get_db) if key is not None else None
+    if store is None:
+        return run()
+
+    def error(status_code: int, message: str) -> Dict:
+        return {'statusCode': status_code, 'headers': cors_headers, 'body': json.dumps({'error': message})}
+
+    try:
+        key = validate_key(key)
+        fingerprint = request_fingerprint(event.get('httpMethod') or '', event.get('path') or '', event.get('body'))
+        response, replayed = run_once(store, key, fingerprint, run)
+    except ValueError as e:
+        return error(400, str(e))
+    except IdempotencyKeyInUse as e:
+        return error(409, str(e))
+    except IdempotencyKeyReused as e:
+        return error(422, str(e))
+    except Exception as e:
+        print(f"ERROR: No se pudo consultar la {HEADER}: {e}")
+        return error(503, 'Servicio no disponible.')
+    if replayed:
+        response = {**response, 'headers': {**cors_headers, **response['headers'], REPLAYED_HEADER: 'true'}}
+    return response
@@ -0,0 +1,148 @@
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, WrapValidator, field_validator
+from typing import Annotated, Dict, List, Optional, Literal, Tuple
+import re
+
+PUESTOS_VALIDOS = Literal['desarrollador', 'administrativo', 'notario', 'comercial']
+
+# Orden de las columnas de las lecturas de la DB (SELECT/RETURNING) que recibe Item.from_row().
+ROW_FIELDS = ('id', 'nombre', 'apellidos', 'numero_telefono', 'puesto_trabajo')
+_ROW_FIELDS_SET = frozenset(ROW_FIELDS)
+
+# --- Patrones de validación (compilados una sola vez al importar el módulo) ---
+# DNI: 8 números y la letra de control. NIE: X, Y o Z, 7 números y la letra de control.
+_DNI_PATTERN = re.compile(r'[0-9XYZ][0-9]{7}[A-Z]')
+# La letra de control es DNI_LETTERS[número % 23]; en un NIE, la X, Y o Z inicial cuenta como 0, 1 o 2.
+DNI_LETTERS = 'TRWAGMYFPDXBNJZSQVHLCKE'
+_NIE_DIGITS = str.maketrans('XYZ', '012')
+_PHONE_SEPARATORS = re.compile(r'[()\s-]')
+_PHONE_PATTERN = re.compile(r'\+?[0-9]{9,15}')
+
+class Item(BaseModel):
+    """
+    Representa un Item (una persona) con sus atributos principales.
+    El DNI actúa como el ID principal del recurso.
+    """
+    id: str = Field(..., min_length=9, max_length=9, description="DNI o NIF de la persona.")
+    nombre: str = Field(..., min_length=1, max_length=100, description="Nombre de pila.")
+    apellidos: str = Field(..., min_length=1, max_length=150, description="Apellidos.")
+    numero_telefono: Optional[str] = Field(None, min_length=9, max_length=20, description="Número de teléfono de contacto.")
+    puesto_trabajo: PUESTOS_VALIDOS = Field(..., description="Puesto de trabajo de la persona.")
+
+    
+    # --- Validadores (Opcionales pero recomendados para Pydantic) ---
+    @field_validator('id', mode='before')
+    @classmethod
+    def validate_dni(cls, value: str) -> str:
+        """Valida que el campo 'id' sea un DNI (8 dígitos y letra) o un NIE (X/Y/Z, 7 dígitos y letra) con su letra de control."""
+        if not isinstance(value, str):
+            return value  # Lo rechaza la validación del tipo (str)
+        value = value.upper()
+        if not _DNI_PATTERN.fullmatch(value):
+            raise ValueError('El DNI debe tener 8 números seguidos de 1 letra (ej: 12345678Z) '
+                             'y el NIE una X, Y o Z, 7 números y 1 letra (ej: X1234567L).')
+        expected = DNI_LETTERS[int(value[:8].translate(_NIE_DIGITS)) % 23]
+        if value[8] != expected:
+            raise ValueError(f'La letra de control del DNI/NIE no es correcta (debería ser {expected}).')
+        return value
+
+    @field_validator('numero_telefono', mode='before')
+    @classmethod
+    def clean_phone_number(cls, value: Optional[str]) -> Optional[str]:
+        """Limpia caracteres comunes en el teléfono antes de la validación."""
+        if not isinstance(value, str):
+            return value  # None, o un tipo que rechaza la validación de Optional[str]
+        if _PHONE_PATTERN.fullmatch(value):
+            return value  # Ya limpio (el caso habitual): sin sustitución
+        # Elimina espacios, guiones y paréntesis para almacenamiento limpio
+        cleaned_value = _PHONE_SEPARATORS.sub('', value)
+        if not _PHONE_PATTERN.fullmatch(cleaned_value):
+             raise ValueError('El número de teléfono debe contener solo dígitos y el prefijo opcional "+".')
+        return cleaned_value
+    
+    # --- Lectura desde la DB ---
+    @classmethod
+    def from_row(cls, row) -> 'Item':
+        """
+        Construye un Item a partir de una fila de la DB (tupla en el orden de ROW_FIELDS) sin
+        volver a ejecutar los validadores: los datos ya se validaron al escribirlos.
+        """
+        return cls.model_construct(
+            _ROW_FIELDS_SET, id=row[0], nombre=row[1], apellidos=row[2],
+            numero_telefono=row[3], puesto_trabajo=row[4],
+        )
+
+    # --- Configuración y Ejemplo ---
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "12345678Z",
+                "nombre": "Ana",
+                "apellidos": "García Pérez",
+                "numero_telefono": "600112233",
+                "puesto_trabajo": "desarrollador"
+            }
+        }
+
+
+# --- Validación por lotes ---
+class _RowErrors(list):
+    """Errores de validación de una fila (lo que devuelve el adaptador de lotes en su posición)."""
+
+
+def _collect_row_errors(value, handler):
+    # Una fila inválida no aborta la lista: sus errores ocupan su posición en el resultado.
+    try:
+        return handler(value)
+    except ValidationError as e:
+        return _RowErrors(e.errors(include_url=False, include_context=False))
+
+
+_items_adapter = None
+
+def items_adapter() -> TypeAdapter:
+    """
+    TypeAdapter de List[Item] del proceso (se construye en el primer uso): valida una lista
+    entera en una sola llamada a pydantic-core y, en lugar de lanzar ValidationError, deja
+    en la posición de cada fila inválida la lista de sus errores.
+    """
+    global _items_adapter
+    if _items_adapter is None:
+        _items_adapter = TypeAdapter(List[Annotated[Item, WrapValidator(_collect_row_errors)]])
+    return _items_adapter
+
+
+def validate_items(rows: list) -> Tuple[List[Tuple[int, Item]], Dict[int, List[dict]]]:
+    """
+    Valida una lista de items (dicts) de una vez, sin un Item(**fila) por fila desde Python.
+    Retorna los items válidos con su posición y los errores de las filas inválidas por
+    posición ('loc' relativo a la fila, como en una validación individual).
+    """
+    valid, errors = [], {}
+    for index, result in enumerate(items_adapter().validate_python(rows)):
+        if isinstance(result, _RowErrors):
+            errors[index] = list(result)
+        else:
+            valid.append((index, result))
+    return valid, errors
+
+
+def validate_bulk(rows: list) -> Tuple[List[Optional[dict]], List[Item], List[int]]:
+    """
+    Validación de una carga masiva (POST /items/bulk): las filas inválidas no abortan el lote.
+    Retorna el resultado 'invalid' de cada fila rechazada (None en las válidas), los items
+    válidos sin DNIs repetidos (gana la primera aparición) y sus posiciones en 'rows'.
+    """
+    items, errors = validate_items(rows)
+    results = [None] * len(rows)
+    for index, details in errors.items():
+        results[index] = {'index': index, 'status': 'invalid', 'details': details}
+    valid, positions, seen = [], [], set()
+    for index, item in items:
+        if item.id in seen:
+            results[index] = {'index': index, 'id': item.id, 'status': 'invalid',
+                              'details': 'DNI duplicado dentro del lote.'}
+            continue
+        seen.add(item.id)
+        valid.append(item)
+        positions.append(index)
+    return results, valid, positions
@@ -0,0 +1,367 @@
+"""
+Cola de escrituras diferidas (write-behind) para POST /items y PUT /items/<id>.
+
+Con WRITE_QUEUE_BACKEND distinto de 'none' (por defecto) el endpoint valida el item, lo encola
+y responde 202 con un identificador de seguimiento (tracking_id) en lugar de hacer el INSERT o
+el UPDATE. Un consumidor vacía la cola por lotes con sentencias de varias filas
+(Database.apply_write_batch) y guarda el resultado de cada escritura en la tabla
+'items_write_results', que se consulta con GET /items/writes/<tracking_id>.
+
+Colas disponibles (con la misma interfaz que SQS: send, receive y delete):
+- 'memory': en memoria del proceso (Acoplada, con el consumidor en un hilo de cada worker).
+- 'file': un directorio (WRITE_QUEUE_DIR) que pueden compartir varios procesos; para probar en
+  local la cola de las Lambdas sin SQS.
+- 'sqs': Amazon SQS (WRITE_QUEUE_URL). En Desacoplada la vacía lambda_write_consumer.py.
+
+Los mensajes se entregan al menos una vez: si el consumidor falla antes de borrarlos, vuelven
+a la cola pasados WRITE_QUEUE_VISIBILITY segundos. Repetir un lote ya aplicado no cambia los
+datos y conserva el primer resultado de cada tracking_id.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    from models.item import Item
+
+WRITE_OPS = ('create', 'update')
+
+# Estados de items_write_results ('pending' = aún sin procesar, o un tracking_id desconocido)
+WRITE_STATUSES = ('created', 'updated', 'conflict', 'not_found', 'error')
+
+
+class QueuedMessage:
+    """Mensaje recibido de la cola; 'receipt' es lo que hay que pasar a delete()."""
+
+    __slots__ = ('message_id', 'body', 'receipt')
+
+    def __init__(self, message_id: str, body: str, receipt: str):
+        self.message_id = message_id
+        self.body = body
+        self.receipt = receipt
+
+
+class MemoryQueue:
+    """Cola en memoria del proceso, segura entre hilos, con tiempo de visibilidad como SQS."""
+
+    name = 'memory'
+
+    def __init__(self, visibility_timeout: float = 60.0):
+        self.visibility_timeout = visibility_timeout
+        self._ready = deque()         # (message_id, body)
+        self._in_flight = OrderedDict()  # receipt -> (visible_at, message_id, body)
+        self._cond = threading.Condition(threading.Lock())
+
+    def send(self, body: str, group: str = None) -> str:
+        message_id = str(uuid.uuid4())
+        with self._cond:
+            self._ready.append((message_id, body))
+            self._cond.notify()
+        return message_id
+
+    def receive(self, max_messages: int = 10, wait: float = 0.0) -> List[QueuedMessage]:
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while True:
+                self._requeue_expired_locked()
+                if self._ready:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(min(remaining, 1.0))
+            messages = []
+            visible_at = time.monotonic() + self.visibility_timeout
+            while self._ready and len(messages) < max_messages:
+                message_id, body = self._ready.popleft()
+                receipt = str(uuid.uuid4())
+                self._in_flight[receipt] = (visible_at, message_id, body)
+                messages.append(QueuedMessage(message_id, body, receipt))
+            return messages
+
+    def delete(self, receipts: List[str]):
+        with self._cond:
+            for receipt in receipts:
+                self._in_flight.pop(receipt, None)
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._ready) + len(self._in_flight)
+
+    def _requeue_expired_locked(self):
+        now = time.monotonic()
+        for receipt, (visible_at, message_id, body) in list(self._in_flight.items()):
+            if visible_at <= now:
+                del self._in_flight[receipt]
+                self._ready.appendleft((message_id, body))
+
+
+class FileQueue:
+    """
+    Cola en un directorio, compartible entre procesos: cada mensaje es un fichero JSON y se
+    reserva moviéndolo (os.rename, atómico) a 'in_flight/'. Los que llevan allí más de
+    'visibility_timeout' segundos vuelven a la cola.
+    """
+
+    name = 'file'
+
+    def __init__(self, directory: str, visibility_timeout: float = 60.0):
+        self.directory = directory
+        self.visibility_timeout = visibility_timeout
+        self._in_flight = os.path.join(directory, 'in_flight')
+        os.makedirs(self._in_flight, exist_ok=True)
+
+    def send(self, body: str, group: str = None) -> str:
+        message_id = str(uuid.uuid4())
+        # El prefijo con la hora mantiene el orden de llegada al listar el directorio.
+        name = f"{time.time_ns():020d}-{message_id}.json"
+        tmp = os.path.join(self.directory, f".{name}.tmp")
+        with open(tmp, 'w') as f:
+            f.write(body)
+        os.rename(tmp, os.path.join(self.directory, name))
+        return message_id
+
+    def receive(self, max_messages: int = 10, wait: float = 0.0) -> List[QueuedMessage]:
+        deadline = time.monotonic() + wait
+        while True:
+            self._requeue_expired()
+            messages = []
+            for name in sorted(os.listdir(self.directory)):
+                if len(messages) >= max_messages:
+                    break
+                if not name.endswith('.json'):
+                    continue
+                claimed = os.path.join(self._in_flight, name)
+                try:
+                    os.rename(os.path.join(self.directory, name), claimed)
+                except FileNotFoundError:
+                    continue  # Lo ha reservado otro consumidor
+                os.utime(claimed)
+                with open(claimed) as f:
+                    body = f.read()
+                messages.append(QueuedMessage(name[21:-5], body, name))
+            if messages or time.monotonic() >= deadline:
+                return messages
+            time.sleep(min(0.2, max(0.0, deadline - time.monotonic())))
+
+    def delete(self, receipts: List[str]):
+        for receipt in receipts:
+            try:
+                os.remove(os.path.join(self._in_flight, receipt))
+            except FileNotFoundError:
+                pass
+
+    def depth(self) -> int:
+        return (sum(name.endswith('.json') for name in os.listdir(self.directory))
+                + len(os.listdir(self._in_flight)))
+
+    def _requeue_expired(self):
+        limit = time.time() - self.visibility_timeout
+        for name in os.listdir(self._in_flight):
+            path = os.path.join(self._in_flight, name)
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.rename(path, os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+class SqsQueue:
+    """
+    Cola de Amazon SQS (boto3 viene incluido en el runtime de Lambda). Con una cola FIFO
+    ('.fifo') los mensajes del mismo DNI se entregan en orden (MessageGroupId = DNI).
+    """
+
+    name = 'sqs'
+
+    def __init__(self, url: str):
+        import boto3
+        self.url = url
+        self.fifo = url.endswith('.fifo')
+        self._client = boto3.client('sqs')
+
+    def send(self, body: str, group: str = None) -> str:
+        params = {'QueueUrl': self.url, 'MessageBody': body}
+        if self.fifo:
+            params['MessageGroupId'] = group or 'items'
+            params['MessageDeduplicationId'] = str(uuid.uuid4())
+        return self._client.send_message(**params)['MessageId']
+
+    def receive(self, max_messages: int = 10, wait: float = 0.0) -> List[QueuedMessage]:
+        response = self._client.receive_message(
+            QueueUrl=self.url, MaxNumberOfMessages=min(max_messages, 10),  # Límite de SQS
+            WaitTimeSeconds=int(min(wait, 20)),
+        )
+        return [QueuedMessage(m['MessageId'], m['Body'], m['ReceiptHandle'])
+                for m in response.get('Messages', [])]
+
+    def delete(self, receipts: List[str]):
+        for start in range(0, len(receipts), 10):
+            self._client.delete_message_batch(QueueUrl=self.url, Entries=[
+                {'Id': str(index), 'ReceiptHandle': receipt}
+                for index, receipt in enumerate(receipts[start:start + 10])
+            ])
+
+    def depth(self) -> int:
+        attributes = self._client.get_queue_attributes(
+            QueueUrl=self.url,
+            AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible'],
+        )['Attributes']
+        return sum(int(value) for value in attributes.values())
+
+
+def queue_from_env():
+    """
+    Crea la cola indicada por WRITE_QUEUE_BACKEND ('none' por defecto, 'memory', 'file' o 'sqs').
+    Devuelve None con 'none': las escrituras se hacen de forma síncrona.
+    """
+    backend = os.getenv('WRITE_QUEUE_BACKEND', 'none').lower()
+    visibility = float(os.getenv('WRITE_QUEUE_VISIBILITY', '60'))
+    if backend == 'none':
+        return None
+    if backend == 'memory':
+        return MemoryQueue(visibility_timeout=visibility)
+    if backend == 'file':
+        return FileQueue(os.getenv('WRITE_QUEUE_DIR', '/tmp/items-write-queue'), visibility_timeout=visibility)
+    if backend == 'sqs':
+        url = os.getenv('WRITE_QUEUE_URL')
+        if not url:
+            raise ValueError("WRITE_QUEUE_BACKEND=sqs requiere WRITE_QUEUE_URL.")
+        return SqsQueue(url)
+    raise ValueError(f"WRITE_QUEUE_BACKEND '{backend}' no es compatible (none, memory, file o sqs).")
+
+
+_queue = None
+_queue_loaded = False
+
+
+def get_queue():
+    """Cola del proceso (None si las escrituras son síncronas); se crea en la primera llamada."""
+    global _queue, _queue_loaded
+    if not _queue_loaded:
+        _queue = queue_from_env()
+        _queue_loaded = True
+    return _queue
+
+
+# --- Mensajes ---
+def enqueue_write(queue, op: str, item: Item) -> str:
+    """Encola una escritura ya validada y devuelve su tracking_id."""
+    if op not in WRITE_OPS:
+        raise ValueError(f"Operación '{op}' no válida ({', '.join(WRITE_OPS)}).")
+    tracking_id = str(uuid.uuid4())
+    body = json.dumps({'tracking_id': tracking_id, 'op': op, 'item': item.model_dump()})
+    queue.send(body, group=item.id)
+    return tracking_id
+
+
+def decode_writes(bodies: List[str]) -> List[Dict]:
+    """
+    Convierte los cuerpos de los mensajes en escrituras para apply_write_batch(). Los items ya
+    se validaron al encolarlos, así que se construyen sin repetir la validación.
+    """
+    from models.item import Item
+    writes = []
+    for body in bodies:
+        message = json.loads(body)
+        writes.append({'tracking_id': message['tracking_id'], 'op': message['op'],
+                       'item': Item.model_construct(**message['item'])})
+    return writes
+
+
+def is_tracking_id(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+# --- Consumidor ---
+class WriteBehindConsumer:
+    """
+    Vacía la cola en un hilo en segundo plano: recibe hasta 'batch_size' mensajes (esperando
+    como mucho 'max_wait' segundos a completar el lote), los aplica con apply_write_batch() y
+    solo entonces los borra de la cola. Si la BD falla, los mensajes vuelven a la cola al
+    vencer su tiempo de visibilidad.
+    """
+
+    def __init__(self, queue, db, batch_size: int = 500, max_wait: float = 0.5):
+        self.queue = queue
+        self.db = db
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'batches': 0, 'messages': 0, 'failed_batches': 0}
+
+    @classmethod
+    def from_env(cls, queue, db) -> 'WriteBehindConsumer':
+        """Crea el consumidor con WRITE_QUEUE_BATCH_SIZE y WRITE_QUEUE_MAX_WAIT."""
+        return cls(
+            queue, db,
+            batch_size=int(os.getenv('WRITE_QUEUE_BATCH_SIZE', '500')),
+            max_wait=float(os.getenv('WRITE_QUEUE_MAX_WAIT', '0.5')),
+        )
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Para el hilo y aplica lo que quede en la cola (una cola 'memory' se pierde con el proceso)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        while self.queue.depth() and self.drain_once():
+            pass
+
+    def stats(self) -> dict:
+        return {'backend': self.queue.name, 'depth': self.queue.depth(),
+                'batch_size': self.batch_size, **self._stats}
+
+    def drain_once(self) -> int:
+        """Recibe y aplica un lote; devuelve el número de mensajes procesados."""
+        messages = self._receive_batch()
+        if not messages:
+            return 0
+        try:
+            self.db.apply_write_batch(decode_writes([m.body for m in messages]))
+        except Exception as e:
+            self._stats['failed_batches'] += 1
+            print(f"ERROR: No se pudo aplicar el lote de {len(messages)} escrituras: {e}")
+            return 0
+        self.queue.delete([m.receipt for m in messages])
+        self._stats['batches'] += 1
+        self._stats['messages'] += len(messages)
+        return len(messages)
+
+    def _receive_batch(self) -> List[QueuedMessage]:
+        messages = self.queue.receive(self.batch_size, wait=1.0)
+        if not messages:
+            return []
+        # Se completa el lote con lo que llegue durante 'max_wait' segundos (ráfagas de altas).
+        deadline = time.monotonic() + self.max_wait
+        while len(messages) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            more = self.queue.receive(self.batch_size - len(messages), wait=remaining)
+            if not more:
+                break
+            messages.extend(more)
+        return messages
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.drain_once()
+            except Exception as e:  # El hilo no debe morir por un error puntual de la cola
+                print(f"ERROR: Fallo en el consumidor de escrituras: {e}")
+                self._stop.wait(1.0)